@@ -0,0 +1,63 @@
+`include "uop_pkg.sv"
+// Pipelined radix-2^R restoring divider: y = a / b (truncating), '0 if b == 0
+// latency = uop_pkg::div_stages(W, R) clocks, one result per clock
+module div_unit #(
+    parameter int W      = 64,
+    parameter int R      = uop_pkg::DIV_RADIX_LOG2,  // quotient bits per stage
+    parameter bit SIGNED = 1'b0
+)(
+    input  logic         clk,
+    input  logic [W-1:0] a ,           // dividend
+    input  logic [W-1:0] b ,           // divisor
+    output logic [W-1:0] y             // quotient
+);
+    localparam int N = uop_pkg::div_stages(W, R) - 2;   // iteration stages
+
+    // per stage: partial remainder, {dividend bits left | quotient bits},
+    // divisor magnitude, result sign, divide-by-zero
+    logic [W:0]   rem  [N+1];
+    logic [W-1:0] nq   [N+1];
+    logic [W-1:0] den  [N+1];
+    logic         neg  [N+1];
+    logic         zero [N+1];
+
+    // ---------- operand stage: magnitudes + sign ------------------
+    assign rem[0] = '0;
+    always_ff @(posedge clk) begin
+        nq[0]   <= (SIGNED && a[W-1]) ? -a : a;
+        den[0]  <= (SIGNED && b[W-1]) ? -b : b;
+        neg[0]  <= SIGNED && (a[W-1] ^ b[W-1]);
+        zero[0] <= (b == '0);
+    end
+
+    // ---------- R restoring steps per stage -----------------------
+    for (genvar k = 0; k < N; k++) begin : g_it
+        logic [W:0]   rem_c;
+        logic [W-1:0] nq_c;
+        always_comb begin
+            rem_c = rem[k];
+            nq_c  = nq[k];
+            for (int j = 0; j < R; j++) begin
+                if (k*R + j < W) begin
+                    rem_c = {rem_c[W-1:0], nq_c[W-1]};
+                    nq_c  = {nq_c[W-2:0], 1'b0};
+                    if (rem_c >= {1'b0, den[k]}) begin
+                        rem_c   = rem_c - {1'b0, den[k]};
+                        nq_c[0] = 1'b1;
+                    end
+                end
+            end
+        end
+        always_ff @(posedge clk) begin
+            rem[k+1]  <= rem_c;
+            nq[k+1]   <= nq_c;
+            den[k+1]  <= den[k];
+            neg[k+1]  <= neg[k];
+            zero[k+1] <= zero[k];
+        end
+    end
+
+    // ---------- sign fix / divide-by-zero -------------------------
+    always_ff @(posedge clk)
+        y <= zero[N] ? '0 : (neg[N] ? -nq[N] : nq[N]);
+endmodule
@@ -52,6 +52,57 @@ package len_table_pkg;
     1,
     1
   };
+  /* per-block datapath width */
+  localparam int W_LUT [N_CASE] = '{
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64,
+    64
+  };
+  localparam bit DATAFLOW_LUT [N_CASE] = '{
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0,
+    1'b0
+  };
   /* variable-width FF mask */
   localparam logic [MAX_LEN-1:0] FF_MASK_LUT [N_CASE] = '{
     {2'h0},
@@ -153,4 +204,54 @@ package len_table_pkg;
     '{ 1'b0, 1'b0, 1'b0 },
     '{ 1'b0, 1'b0, 1'b0 }
   };
+  localparam int SRC_A_LUT [N_CASE][MAX_LEN] = '{
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 }
+  };
+  localparam int SRC_B_LUT [N_CASE][MAX_LEN] = '{
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 },
+    '{ -1, -1, -1 }
+  };
 endpackage
@@ -2,11 +2,21 @@
 (* keep_hierarchy = "yes" *)
 module microop_unit #(
     parameter uop_pkg::op_t OP = uop_pkg::OP_NOP,
-    parameter int W  = 64                 
+    parameter int W  = 64  ,
+    parameter bit C_IMM = 1'b0,        // fused: 2nd op takes c (else its own input)
+    parameter bit D_IMM = 1'b0,        // fused: 3rd op takes d
+    parameter bit CASC_IN = 1'b0,      // ADD/SUB: a is the previous DSP's PCOUT
+    parameter bit B_IS_CONST = 1'b0,   // b is the immediate B_CONST
+    parameter logic [W-1:0] B_CONST = '0
 )(
+    input  logic         clk ,         // DSP / divider pipeline registers
     input  logic [W-1:0] a ,           // operand A
     input  logic [W-1:0] b ,           // operand B / immediate
+    input  logic [W-1:0] c ,           // fused: immediate of the 2nd op
+    input  logic [W-1:0] d ,           // fused: immediate of the 3rd op
     input  logic [$clog2(W)-1:0] shamt, // shift amount : 0‥63
+    input  logic [47:0]  pcin ,        // DSP cascade in (CASC_IN)
+    output logic [47:0]  pcout ,       // DSP cascade out, '0 off the DSP
     output logic [W-1:0] y             // result
 );
 
@@ -20,69 +30,159 @@ module microop_unit #(
         return d >> s;
     endfunction
 
+    // fused chains: bit-exact with the unfused ops, whose
+    // b operand is the previous result unless USE_IMM (C_IMM/D_IMM)
+    function automatic logic [W-1:0] add3 (logic [W-1:0] x, y, z, v);
+        logic [W-1:0] t;
+        if (C_IMM && D_IMM) return x + y + (z + v);   // constants fold
+        t = x + y;
+        t = C_IMM ? t + z : t << 1;
+        return D_IMM ? t + v : t << 1;
+    endfunction
+
+    // multiply by a constant with few CSD digits: shift-add, no DSP
+    localparam bit MUL_CSD = B_IS_CONST && OP inside {uop_pkg::OP_MUL, uop_pkg::OP_IMUL}
+                             && uop_pkg::csd_digits(64'(B_CONST), W) <= uop_pkg::CONST_MUL_MAX_DIGITS;
+
+    // x * B_CONST mod 2^W, one adder per CSD digit (signed and unsigned alike)
+    function automatic logic [W-1:0] mul_csd (logic [W-1:0] x);
+        logic [W:0]   r   = {1'b0, B_CONST};
+        logic [W-1:0] acc = '0;
+        for (int i = 0; i < W; i++) begin
+            if (r[0]) begin
+                if (r[1]) begin acc -= x << i; r += 1; end
+                else      begin acc += x << i; r -= 1; end
+            end
+            r >>= 1;
+        end
+        return acc;
+    endfunction
+
+    // fused shift: the absorbed op's immediate is its count
+    logic [$clog2(W)-1:0] c_shamt;
+    assign c_shamt = C_IMM ? c[$clog2(W)-1:0] : shamt;
+
     // ---------- main ALU mux --------------------------------------
-    if (OP inside {uop_pkg::OP_MUL, uop_pkg::OP_IMUL}) begin : g_mul
+    // MUL_ADD / IMUL_ADD: the ALU behind the multiplier adds C (MAC)
+    if (OP inside {uop_pkg::OP_MUL, uop_pkg::OP_IMUL,
+                   uop_pkg::OP_MUL_ADD, uop_pkg::OP_IMUL_ADD} && !MUL_CSD) begin : g_mul
         (* use_dsp = "yes" *)          
         localparam int AW = 18;
         localparam int BW = 18;
+        localparam bit MAC    = OP inside {uop_pkg::OP_MUL_ADD, uop_pkg::OP_IMUL_ADD};
+        localparam bit SIGNED = OP inside {uop_pkg::OP_IMUL, uop_pkg::OP_IMUL_ADD};
 
         logic [AW-1:0]      dsp_a_u;
         logic [BW-1:0]      dsp_b_u;
         logic signed [AW-1:0] dsp_a_s;
         logic signed [BW-1:0] dsp_b_s;
 
-        assign {dsp_a_u, dsp_b_u} = {a[AW-1:0], b[BW-1:0]};
-        assign {dsp_a_s, dsp_b_s} = {a[AW-1:0], b[BW-1:0]};
+        // W may be narrower than the DSP ports (8/16-bit blocks)
+        assign {dsp_a_u, dsp_b_u} = {AW'(a), BW'(b)};
+        assign {dsp_a_s, dsp_b_s} = {AW'($signed(a)), BW'($signed(b))};
 
         logic [47:0] dsp_p /* synthesis keep */;
 
         DSP48E2 #(
-            .AREG      (1), .BREG(1), .MREG(1), .PREG(1),
+            .AREG      (1), .BREG(1), .CREG(1), .MREG(1), .PREG(1),
             .USE_MULT ("MULTIPLY")
         ) u_mul (
             .CLK      (clk),
-            .A        (OP==uop_pkg::OP_IMUL ? dsp_a_s : dsp_a_u),
-            .B        (OP==uop_pkg::OP_IMUL ? dsp_b_s : dsp_b_u),
-            .C        (48'd0),
+            .A        (SIGNED ? dsp_a_s : dsp_a_u),
+            .B        (SIGNED ? dsp_b_s : dsp_b_u),
+            .C        (MAC && C_IMM ? 48'(c) : 48'd0),
             .PCIN     (48'd0),           
-            .OPMODE   (9'b000_000_101), 
+            .OPMODE   (MAC ? 9'b00_011_01_01 : 9'b000_000_101),  // W=0 Z=C|0 Y=X=M
             .ALUMODE  (4'b0000),
             .INMODE   (5'b00000),
             .CARRYIN  (1'b0), .CARRYINSEL (3'b000),
+            .PCOUT    (pcout),
             .P        (dsp_p)
         );
 
-        assign y = {{(W-48){dsp_p[47]}}, dsp_p};
+        // MAC without an immediate adds the product to itself: 2·P is wiring,
+        // wrapping at 48 bits like the cascaded ADD it replaces
+        if (MAC && !C_IMM) assign y = W'($signed({dsp_p[46:0], 1'b0}));
+        else               assign y = W'($signed(dsp_p));
     end
-else if (OP inside {uop_pkg::OP_ADD, uop_pkg::OP_SUB}) begin : g_addsub
+    /* ---------- DEC_IMUL: pre-adder AD = D - A = a - 1, M = AD * B ---------- */
+    else if (OP == uop_pkg::OP_DEC_IMUL) begin : g_preadd
         (* use_dsp = "yes" *)
-        localparam int AW = 30;
+        localparam int DW = 27;
         localparam int BW = 18;
 
-        logic [AW-1:0] dsp_a = a[AW-1:0];
-        logic [BW-1:0] dsp_b = b[BW-1:0];
-        logic [47:0]   dsp_p /* synthesis keep */;
+        // without an immediate B is the decremented value as well
+        logic [BW-1:0] dsp_b;
+        assign dsp_b = C_IMM ? BW'($signed(c)) : BW'($signed(a - 1'b1));
+
+        logic [47:0] dsp_p /* synthesis keep */;
 
         DSP48E2 #(
-            .AREG(1), .BREG(1), .CREG(1), .PREG(1),
-            .USE_MULT("NONE")            
-        ) u_addsub (
+            .AREG(1), .BREG(2), .DREG(1), .ADREG(1), .MREG(1), .PREG(1),
+            .USE_MULT("MULTIPLY"), .AMULTSEL("AD"), .PREADDINSEL("A")
+        ) u_preadd (
             .CLK      (clk),
-            .A        (dsp_a),
+            .A        (30'd1),
             .B        (dsp_b),
             .C        (48'd0),
-            .PCIN     (48'd0),            
-            .OPMODE   (9'b000_000_010),
-            .ALUMODE  (OP==uop_pkg::OP_SUB ? 4'b0011 : 4'b0000),
+            .D        (DW'($signed(a))),
+            .PCIN     (48'd0),
+            .OPMODE   (9'b000_000_101),
+            .ALUMODE  (4'b0000),
+            .INMODE   (5'b01100),          // D enabled, AD = D - A
+            .CARRYIN  (1'b0), .CARRYINSEL(3'b000),
+            .PCOUT    (pcout),
+            .P        (dsp_p)
+        );
+        assign y = W'($signed(dsp_p));
+    end
+    /* ---------- ADD/SUB: X = A:B = b, Z = C = a, or PCIN when cascaded ---------- */
+    else if (OP inside {uop_pkg::OP_ADD, uop_pkg::OP_SUB}) begin : g_addsub
+        (* use_dsp = "yes" *)
+        // a arrives on PCIN straight from the previous P register, so the
+        // input registers go and only PREG remains
+        localparam int IREG = CASC_IN ? 0 : 1;
+
+        logic [47:0] dsp_ab, dsp_c;
+        assign dsp_ab = 48'(b);
+        assign dsp_c  = 48'(a);
+        logic [47:0] dsp_p /* synthesis keep */;
+
+        DSP48E2 #(
+            .AREG(IREG), .BREG(IREG), .CREG(IREG), .PREG(1),
+            .USE_MULT("NONE")            
+        ) u_addsub (
+            .CLK      (clk),
+            .A        (dsp_ab[47:18]),
+            .B        (dsp_ab[17:0]),
+            .C        (dsp_c),
+            .PCIN     (pcin),
+            .OPMODE   (CASC_IN ? 9'b00_001_00_11 : 9'b00_011_00_11),  // Z=PCIN|C X=A:B
+            .ALUMODE  (OP==uop_pkg::OP_SUB ? 4'b0011 : 4'b0000),     // Z - X : Z + X
             .INMODE   (5'b00000),
             .CARRYIN  (1'b0), .CARRYINSEL(3'b000),
+            .PCOUT    (pcout),
             .P        (dsp_p)
         );
-        assign y = {{(W-48){dsp_p[47]}}, dsp_p};
+        assign y = W'($signed(dsp_p));
+    end
+    /* ---------- pipelined divider (div_stages(W) clocks) ---------- */
+    else if (OP inside {uop_pkg::OP_DIV, uop_pkg::OP_IDIV}) begin : g_div
+        div_unit #(
+            .W      (W),
+            .SIGNED (OP == uop_pkg::OP_IDIV)
+        ) u_div (
+            .clk (clk),
+            .a   (a),
+            .b   (b),
+            .y   (y)
+        );
+        assign pcout = '0;
     end
     /* ---------- LUT/Carry path ---------- */
     else begin : g_lut
         (* use_dsp = "no" *)
+        assign pcout = '0;
         always_comb unique case (OP)
             // arithmetic (LUT/carry)
             uop_pkg::OP_ADC  : y = a + b + 1'b1;
@@ -90,6 +190,8 @@ else if (OP inside {uop_pkg::OP_ADD, uop_pkg::OP_SUB}) begin : g_addsub
             uop_pkg::OP_DEC  : y = a - 1;
             uop_pkg::OP_NEG  : y = ~a + 1;
             uop_pkg::OP_CMP  : y = a - b;
+            uop_pkg::OP_MUL,
+            uop_pkg::OP_IMUL : y = mul_csd(a);      // MUL_CSD only
             // bit-logic
             uop_pkg::OP_AND  : y = a & b;
             uop_pkg::OP_OR   : y = a | b;
@@ -107,9 +209,13 @@ else if (OP inside {uop_pkg::OP_ADD, uop_pkg::OP_SUB}) begin : g_addsub
             uop_pkg::OP_RCR  : y = rshift({a, b[0]}, shamt);
             uop_pkg::OP_SHLD : y = (b << (W-shamt)) | (a << shamt);
             uop_pkg::OP_SHRD : y = (b >> (W-shamt)) | (a >> shamt);
-            // divide (slow, rare)
-            uop_pkg::OP_DIV  : y = (b==0) ? '0 : a / b;
-            uop_pkg::OP_IDIV : y = (b==0) ? '0 : $signed(a)/$signed(b);
+            // fused chains
+            uop_pkg::OP_AND_AND : y = a & b & (C_IMM ? c : '1);
+            uop_pkg::OP_ADD_ADD : y = C_IMM ? a + b + c : (a + b) << 1;
+            uop_pkg::OP_ADD3    : y = add3(a, b, c, d);
+            uop_pkg::OP_INC_SHL : y = lshift(a + 1'b1, c_shamt);
+            uop_pkg::OP_NOT_ADD : y = C_IMM ? c - a - 1'b1 : ~a << 1;
+            uop_pkg::OP_SUB_SAR : y = $signed(a - b) >>> c_shamt;
             // default / NOP
             default          : y = a;
         endcase
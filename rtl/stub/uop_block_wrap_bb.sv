@@ -0,0 +1,25 @@
+`include "uop_pkg.sv"
+
+// Black-box uop_block_wrap for the top-level synthesis of the OOC flow
+// (gen_len_table.py --ooc): run_vivado.tcl reads it instead of the real
+// module and fills every glen[i].blk_i with its cached checkpoint.
+(* black_box = "yes" *)
+module uop_block_wrap #(
+    parameter int             LEN         = 1,
+    parameter int             PIPE_STAGES = 1,
+    parameter logic [31:0]    FF_MASK     = 32'h0,
+    parameter bit             OUT_FF      = 1'b1,
+    parameter uop_pkg::op_t   OPS   [LEN] = '{default:uop_pkg::OP_NOP},
+    parameter logic [31:0]    IMM   [LEN] = '{default:32'h0},
+    parameter logic           USE_IMM[LEN]= '{default:1'b0},
+    parameter bit             DATAFLOW    = 1'b0,
+    parameter int             SRC_A [LEN] = '{default:-1},
+    parameter int             SRC_B [LEN] = '{default:-1},
+    parameter int             W           = 64
+)(
+    input  logic                 clk,
+    input  logic [W-1:0]         src_i,
+    input  logic [$clog2(W)-1:0] shamt_i,
+    output logic [W-1:0]         dst_o
+);
+endmodule
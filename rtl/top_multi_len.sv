@@ -17,6 +17,9 @@ module top_multi_len #(
             localparam int             THIS_LEN   = LEN_LUT[i];
             localparam int             THIS_STAGE = STAGE_LUT[i];
             localparam logic [31:0]    THIS_MASK  = FF_MASK_LUT[i];
+            // block datapath: its widest operand (8/16/32/64), at most W
+            localparam int             THIS_W     = W_LUT[i] < W ? W_LUT[i] : W;
+            logic [THIS_W-1:0] y_i;
             (* keep_hierarchy = "yes",  dont_touch = "true" *)
             uop_block_wrap #(
                 .LEN         (THIS_LEN),
@@ -25,13 +28,17 @@ module top_multi_len #(
                 .OPS         (OPS_LUT   [i][0:THIS_LEN-1]),
                 .IMM         (IMM_LUT   [i][0:THIS_LEN-1]),
                 .USE_IMM     (USE_IMM_LUT[i][0:THIS_LEN-1]),
-                .W           (W)
+                .DATAFLOW    (DATAFLOW_LUT[i]),
+                .SRC_A       (SRC_A_LUT [i][0:THIS_LEN-1]),
+                .SRC_B       (SRC_B_LUT [i][0:THIS_LEN-1]),
+                .W           (THIS_W)
             ) blk_i (
                 .clk    (clk),
-                .src_i  (src_val),
-                .shamt_i(shamt),
-                .dst_o  (y[i])
+                .src_i  (src_val[THIS_W-1:0]),
+                .shamt_i(shamt[$clog2(THIS_W)-1:0]),
+                .dst_o  (y_i)
             );
+            assign y[i] = W'(y_i);
         end
     endgenerate
 
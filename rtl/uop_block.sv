@@ -5,7 +5,7 @@ module uop_block #(
     parameter int             PIPE_STAGES  = 1,
     parameter logic [31:0]    FF_MASK      = 32'h0,
     parameter uop_pkg::op_t   OPS   [LEN]  = '{default:uop_pkg::OP_NOP},
-    parameter logic [31:0]    IMM   [LEN]  = '{default:32'h0},
+    parameter logic [31:0]    IMM   [LEN]  = '{default:32'h0},  // sign-extended
     parameter logic           USE_IMM[LEN] = '{default:1'b0},
     parameter int             W            = 32
 )(
@@ -18,14 +18,55 @@ module uop_block #(
     logic [W-1:0] stage [LEN+1];
     assign stage[0] = src;
 
+    // DSP48E2 cascade: PCOUT of slot i feeds PCIN of slot i+1
+    logic [47:0] pc [LEN+1];
+    assign pc[0] = '0;
+
+    // immediates of the slots a fused op absorbs (k may run past LEN)
+    function automatic logic use_imm_at (int k);
+        return (k < LEN) ? USE_IMM[k] : 1'b0;
+    endfunction
+    function automatic logic [W-1:0] imm_at (int k);
+        return (k < LEN) ? W'($signed(IMM[k])) : '0;
+    endfunction
+    // a constant shift count turns the barrel shifter into wiring
+    function automatic logic sh_imm_at (int k);
+        return use_imm_at(k) && uop_pkg::is_shift(OPS[k]);
+    endfunction
+    function automatic logic b_imm_at (int k);
+        return use_imm_at(k) && !uop_pkg::is_shift(OPS[k]);
+    endfunction
+    // microop_unit MUL_CSD: a constant multiply that left the DSP
+    function automatic logic mul_csd_at (int k);
+        return b_imm_at(k) && OPS[k] inside {uop_pkg::OP_MUL, uop_pkg::OP_IMUL}
+               && uop_pkg::csd_digits(64'(imm_at(k)), W) <= uop_pkg::CONST_MUL_MAX_DIGITS;
+    endfunction
+    // an ADD/SUB right behind another DSP op, no FF in between, takes its
+    // a operand over PCIN (LatencyDB: one register less)
+    function automatic logic casc_at (int k);
+        return k > 0 && OPS[k] inside {uop_pkg::OP_ADD, uop_pkg::OP_SUB}
+               && uop_pkg::is_dsp(OPS[k-1]) && !mul_csd_at(k-1)
+               && !(k-1 < 32 && FF_MASK[k-1]);
+    endfunction
+
     generate
         for (genvar i = 0; i < LEN; i++) begin : g
             logic [W-1:0] alu_out;
 
-            microop_unit #(.OP(OPS[i]), .W(W)) alu_i (
+            microop_unit #(
+                .OP(OPS[i]), .W(W),
+                .C_IMM(use_imm_at(i+1)), .D_IMM(use_imm_at(i+2)),
+                .CASC_IN(casc_at(i)),
+                .B_IS_CONST(b_imm_at(i)), .B_CONST(imm_at(i))
+            ) alu_i (
+                .clk(clk),
                 .a(stage[i]),
-                .b(USE_IMM[i] ? IMM[i] : stage[i]),
-                .shamt(shamt),
+                .b(b_imm_at(i) ? imm_at(i) : stage[i]),
+                .c(imm_at(i+1)),
+                .d(imm_at(i+2)),
+                .shamt(sh_imm_at(i) ? IMM[i][$clog2(W)-1:0] : shamt),
+                .pcin(pc[i]),
+                .pcout(pc[i+1]),
                 .y(alu_out)
             );
 
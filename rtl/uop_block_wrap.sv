@@ -8,6 +8,9 @@ module uop_block_wrap #(
     parameter uop_pkg::op_t   OPS   [LEN] ,
     parameter logic [31:0]    IMM   [LEN] = '{default:32'h0},   
     parameter logic           USE_IMM[LEN]= '{default:1'b0},    
+    parameter bit             DATAFLOW    = 1'b0,   // uop_dag instead of the uop_block chain
+    parameter int             SRC_A [LEN] = '{default:-1},      // uop_dag operand routing
+    parameter int             SRC_B [LEN] = '{default:-1},
     parameter int             W           = 64
 )(
     input  logic                 clk,
@@ -23,20 +26,39 @@ module uop_block_wrap #(
     end
 
     logic [W-1:0] dst_int;
-    uop_block #(
-        .LEN        (LEN),
-        .PIPE_STAGES(PIPE_STAGES),
-        .FF_MASK    (FF_MASK),
-        .OPS        (OPS),
-        .IMM        (IMM),        
-        .USE_IMM    (USE_IMM),    
-        .W          (W)
-    ) core (
-        .clk   (clk),
-        .src   (src_q),
-        .shamt (shamt_q),
-        .dst   (dst_int)
-    );
+    if (DATAFLOW) begin : g_dag
+        uop_dag #(
+            .LEN        (LEN),
+            .PIPE_STAGES(PIPE_STAGES),
+            .FF_MASK    (FF_MASK),
+            .OPS        (OPS),
+            .IMM        (IMM),
+            .USE_IMM    (USE_IMM),
+            .SRC_A      (SRC_A),
+            .SRC_B      (SRC_B),
+            .W          (W)
+        ) core (
+            .clk   (clk),
+            .src   (src_q),
+            .shamt (shamt_q),
+            .dst   (dst_int)
+        );
+    end else begin : g_chain
+        uop_block #(
+            .LEN        (LEN),
+            .PIPE_STAGES(PIPE_STAGES),
+            .FF_MASK    (FF_MASK),
+            .OPS        (OPS),
+            .IMM        (IMM),        
+            .USE_IMM    (USE_IMM),    
+            .W          (W)
+        ) core (
+            .clk   (clk),
+            .src   (src_q),
+            .shamt (shamt_q),
+            .dst   (dst_int)
+        );
+    end
     if (OUT_FF) begin : g_out_ff
         always_ff @(posedge clk) dst_o <= dst_int;
     end else begin
@@ -0,0 +1,139 @@
+`include "uop_pkg.sv"
+
+// Dataflow datapath: slot i reads a / b from slots SRC_A[i] / SRC_B[i]
+// (-1 = src), so independent uops sit side by side and the latency is
+// the critical path.  Registers only after FF_MASK slots and inside the
+// DSP / divider units; an operand that is ready early is delayed to the
+// cycle of the latest one.  dst XORs every live-out (slots nobody reads).
+module uop_dag #(
+    parameter int             LEN          = 4,
+    parameter int             PIPE_STAGES  = 1,
+    parameter logic [31:0]    FF_MASK      = 32'h0,
+    parameter uop_pkg::op_t   OPS   [LEN]  = '{default:uop_pkg::OP_NOP},
+    parameter logic [31:0]    IMM   [LEN]  = '{default:32'h0},  // sign-extended
+    parameter logic           USE_IMM[LEN] = '{default:1'b0},
+    parameter int             SRC_A [LEN]  = '{default:-1},
+    parameter int             SRC_B [LEN]  = '{default:-1},
+    parameter int             W            = 32
+)(
+    input  logic                 clk,
+    input  logic [W-1:0]         src,
+    input  logic [$clog2(W)-1:0] shamt,
+    output logic [W-1:0]         dst
+);
+
+    // immediates: as in uop_block
+    function automatic logic use_imm_at (int k);
+        return (k < LEN) ? USE_IMM[k] : 1'b0;
+    endfunction
+    function automatic logic [W-1:0] imm_at (int k);
+        return (k < LEN) ? W'($signed(IMM[k])) : '0;
+    endfunction
+    function automatic logic sh_imm_at (int k);
+        return use_imm_at(k) && uop_pkg::is_shift(OPS[k]);
+    endfunction
+    function automatic logic b_imm_at (int k);
+        return use_imm_at(k) && !uop_pkg::is_shift(OPS[k]);
+    endfunction
+    function automatic logic mul_csd_at (int k);
+        return b_imm_at(k) && OPS[k] inside {uop_pkg::OP_MUL, uop_pkg::OP_IMUL}
+               && uop_pkg::csd_digits(64'(imm_at(k)), W) <= uop_pkg::CONST_MUL_MAX_DIGITS;
+    endfunction
+
+    function automatic int ff_at (int k);
+        return (k < 32 && FF_MASK[k]) ? 1 : 0;
+    endfunction
+    // clocks inside the unit of slot k (no PCIN cascade in a DAG)
+    function automatic int unit_cyc (int k);
+        if (OPS[k] inside {uop_pkg::OP_DIV, uop_pkg::OP_IDIV}) return uop_pkg::div_stages(W);
+        if (!uop_pkg::is_dsp(OPS[k]) || mul_csd_at(k)) return 0;
+        return uop_pkg::dsp_cycles(OPS[k]);
+    endfunction
+
+    // OUT_CYC[k]: clock at which the result of slot k is valid (src at 0)
+    typedef int cyc_t [LEN];
+    function automatic int in_cyc (cyc_t c, int k);
+        int t = (SRC_A[k] < 0) ? 0 : c[SRC_A[k]];
+        if (!b_imm_at(k) && SRC_B[k] >= 0 && c[SRC_B[k]] > t) t = c[SRC_B[k]];
+        return t;
+    endfunction
+    function automatic cyc_t out_cycles ();
+        cyc_t c;
+        for (int k = 0; k < LEN; k++) c[k] = in_cyc(c, k) + unit_cyc(k) + ff_at(k);
+        return c;
+    endfunction
+    localparam cyc_t OUT_CYC = out_cycles();
+
+    function automatic logic live_out (int k);
+        for (int j = k + 1; j < LEN; j++)
+            if (SRC_A[j] == k || (SRC_B[j] == k && !b_imm_at(j))) return 1'b0;
+        return 1'b1;
+    endfunction
+    function automatic int dst_cycle ();
+        int t = 0;
+        for (int k = 0; k < LEN; k++) if (live_out(k) && OUT_CYC[k] > t) t = OUT_CYC[k];
+        return t;
+    endfunction
+    localparam int DST_CYC = dst_cycle();
+
+    logic [W-1:0] y    [LEN];
+    logic [W-1:0] live [LEN];
+
+    generate
+        for (genvar i = 0; i < LEN; i++) begin : g
+            localparam int SA = SRC_A[i] < 0 ? 0 : SRC_A[i];
+            localparam int SB = SRC_B[i] < 0 ? 0 : SRC_B[i];
+            localparam int CI = in_cyc(OUT_CYC, i);
+            localparam int DA = CI - (SRC_A[i] < 0 ? 0 : OUT_CYC[SA]);
+            localparam int DB = CI - (SRC_B[i] < 0 ? 0 : OUT_CYC[SB]);
+            if (SRC_A[i] >= i || SRC_B[i] >= i) begin : g_bad
+                $error("uop_dag: slot %0d reads slot %0d/%0d", i, SRC_A[i], SRC_B[i]);
+            end
+
+            logic [W-1:0]         a_v, b_v, alu_out;
+            logic [$clog2(W)-1:0] sh_v;
+            uop_delay #(.W(W), .N(DA)) dly_a (
+                .clk(clk), .d(SRC_A[i] < 0 ? src : y[SA]), .q(a_v)
+            );
+            uop_delay #(.W(W), .N(DB < 0 ? 0 : DB)) dly_b (
+                .clk(clk), .d(SRC_B[i] < 0 ? src : y[SB]), .q(b_v)
+            );
+            uop_delay #(.W($clog2(W)), .N(CI)) dly_sh (.clk(clk), .d(shamt), .q(sh_v));
+
+            microop_unit #(
+                .OP(OPS[i]), .W(W),
+                .C_IMM(use_imm_at(i+1)), .D_IMM(use_imm_at(i+2)),
+                .B_IS_CONST(b_imm_at(i)), .B_CONST(imm_at(i))
+            ) alu_i (
+                .clk(clk),
+                .a(a_v),
+                .b(b_imm_at(i) ? imm_at(i) : b_v),
+                .c(imm_at(i+1)),
+                .d(imm_at(i+2)),
+                .shamt(sh_imm_at(i) ? IMM[i][$clog2(W)-1:0] : sh_v),
+                .pcin(48'h0),
+                .pcout(),
+                .y(alu_out)
+            );
+
+            if (ff_at(i)) begin
+                always_ff @(posedge clk) y[i] <= alu_out;
+            end else begin
+                assign y[i] = alu_out;
+            end
+
+            if (live_out(i)) begin : g_live
+                uop_delay #(.W(W), .N(DST_CYC - OUT_CYC[i])) dly_o (
+                    .clk(clk), .d(y[i]), .q(live[i])
+                );
+            end else begin
+                assign live[i] = '0;
+            end
+        end
+    endgenerate
+
+    always_comb begin
+        dst = '0;
+        for (int k = 0; k < LEN; k++) dst ^= live[k];
+    end
+endmodule
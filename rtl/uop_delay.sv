@@ -0,0 +1,20 @@
+// N-cycle delay line (N = 0: wire); uop_dag aligns operands with it
+module uop_delay #(
+    parameter int W = 64,
+    parameter int N = 0
+)(
+    input  logic         clk,
+    input  logic [W-1:0] d,
+    output logic [W-1:0] q
+);
+    if (N == 0) begin : g_wire
+        assign q = d;
+    end else begin : g_sr
+        logic [W-1:0] r [N];
+        always_ff @(posedge clk) begin
+            r[0] <= d;
+            for (int k = 1; k < N; k++) r[k] <= r[k-1];
+        end
+        assign q = r[N-1];
+    end
+endmodule
@@ -19,9 +19,64 @@ package uop_pkg;
       OP_MUL  ,          // unsigned   a * b
       OP_IMUL ,          //   signed   a * b
       OP_DIV  ,          
-      OP_IDIV            
+      OP_IDIV ,
+
+      // fused chains (estimator --fuse); c / d = immediates of absorbed ops
+      OP_AND_AND ,       // (a & b) & c       one AND, combined mask
+      OP_ADD_ADD ,       // (a + b) + c       3-input adder
+      OP_ADD3    ,       // ((a + b) + c) + d
+      OP_INC_SHL ,       // (a + 1) << shamt
+      OP_NOT_ADD ,       // ~a + c  = c - a - 1
+      OP_SUB_SAR ,       // (a - b) >>> shamt
+
+      // fused DSP48E2 chains: one DSP instead of two
+      OP_MUL_ADD ,       // a * b + c         multiplier + post-adder (MAC)
+      OP_IMUL_ADD,       //   signed
+      OP_DEC_IMUL        // (a - 1) * c       pre-adder D - A
    } op_t;
    
    localparam op_t OP_SAL = OP_SHL;
+
+   // DIV/IDIV: div_unit retires this many quotient bits per pipeline stage
+   localparam int DIV_RADIX_LOG2 = 2;
+
+   // multiply by a constant with at most this many CSD digits: shift-add
+   localparam int CONST_MUL_MAX_DIGITS = 4;
+
+   // non-zero canonical signed digits of k mod 2^w (= LatencyDB.csd_digits)
+   function automatic int csd_digits(logic [63:0] k, int w = 64);
+      logic [64:0] r = {1'b0, k};
+      int          n = 0;
+      for (int i = 0; i < w; i++) begin
+         if (r[0]) begin
+            n++;
+            r = r[1] ? r + 1 : r - 1;   // digit -1 (..11) or +1 (..01)
+         end
+         r >>= 1;
+      end
+      return n;
+   endfunction
+
+   // ops whose immediate is the shift count, not operand b
+   function automatic bit is_shift(op_t op);
+      return op inside {OP_SHL, OP_SHR, OP_SAR, OP_ROL, OP_ROR,
+                        OP_RCL, OP_RCR, OP_SHLD, OP_SHRD};
+   endfunction
+
+   // ops microop_unit maps onto a DSP48E2 (P / PCOUT registered)
+   function automatic bit is_dsp(op_t op);
+      return op inside {OP_ADD, OP_SUB, OP_MUL, OP_IMUL,
+                        OP_MUL_ADD, OP_IMUL_ADD, OP_DEC_IMUL};
+   endfunction
+
+   // microop_unit DSP48E2 latency (input / AD / M / P registers; CASC_IN off)
+   function automatic int dsp_cycles(op_t op);
+      return op == OP_DEC_IMUL ? 4 : op inside {OP_ADD, OP_SUB} ? 2 : 3;
+   endfunction
+
+   // div_unit latency: operand stage + ceil(w/r) step stages + sign fix
+   function automatic int div_stages(int w, int r = DIV_RADIX_LOG2);
+      return (w + r - 1) / r + 2;
+   endfunction
 endpackage
 `endif
@@ -3,6 +3,7 @@
 
 # Usage:
 #   vivado -mode batch -source run_vivado.tcl | tee build.log
+#   (many configurations at once: tools/orchestrate_builds.py)
 
 # Outputs:
 #   reports/  : timing / utilization / power summaries
@@ -14,6 +15,10 @@ set TOP_MODULE  "top_multi_len"
 set PROJ_NAME   "custom_core_impl"
 set RPT_DIR     "reports"
 
+# threads per build (orchestrate_builds.py sets it for each concurrent run)
+if {[info exists ::env(VIVADO_MAX_THREADS)]} {
+    set_param general.maxThreads $::env(VIVADO_MAX_THREADS)
+}
 
 file mkdir $RPT_DIR
 if {[file exists $PROJ_NAME]}    { file delete -force $PROJ_NAME }
@@ -35,7 +40,35 @@ if {[file exists constraints/clocks.xdc]} {
 }
 
 # 3. Synthesis 
-synth_design -top $TOP_MODULE -part $PART -flatten_hierarchy none
+# constraints/ooc_blocks.tcl (gen_len_table.py --ooc): each unique block is
+# synthesised out of context once into $OOC_CACHE/<key>.dcp, the top is
+# synthesised against a black-box uop_block_wrap and the checkpoints are
+# linked into its glen[i].blk_i cells
+if {[file exists constraints/ooc_blocks.tcl]} {
+    source constraints/ooc_blocks.tcl
+    foreach {cell key} $OOC_BLOCKS {
+        set dcp [file join $OOC_CACHE $key.dcp]
+        if {[file exists $dcp]} { continue }
+        puts "Info: OOC synth of $cell (block $key)"
+        read_verilog -sv [file join $OOC_CACHE blk_$key.sv]
+        synth_design -top blk_$key -part $PART -mode out_of_context -flatten_hierarchy none
+        # concurrent builds may share the cache: publish by rename
+        set tmp [file join $OOC_CACHE $key.[pid].tmp.dcp]
+        write_checkpoint -force $tmp
+        file rename -force $tmp $dcp
+        close_design
+    }
+    remove_files [get_files */rtl/uop_block_wrap.sv]
+    read_verilog -sv [file join $RTL_DIR stub uop_block_wrap_bb.sv]
+    set_property file_type SystemVerilog [get_files *.sv]
+    synth_design -top $TOP_MODULE -part $PART -flatten_hierarchy none
+    foreach {cell key} $OOC_BLOCKS {
+        read_checkpoint -cell [get_cells -hier -filter "NAME == $cell"] \
+            [file join $OOC_CACHE $key.dcp]
+    }
+} else {
+    synth_design -top $TOP_MODULE -part $PART -flatten_hierarchy none
+}
 update_timing  
 
 # 4. design-time Tcl constraints
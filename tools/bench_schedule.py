@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+python tools/bench_schedule.py [--sizes 10 100 1000 10000] [--check]
+
+Per-group list_schedule time on synthetic random DAGs.  --check also runs
+the old sort-per-stage scheduler (up to --ref-max uops) and asserts that
+both give the same order / ff_boundaries / stage metrics.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from typing import List
+
+from pipeline_staging_estimator import LatencyDB, Uop, list_schedule, topo_sort
+
+OPS = sorted(LatencyDB.BASE)
+
+
+def synth_dag(n: int, rng: random.Random, window: int = 64):
+    """n uops, each depending on 0-2 of the previous `window` uops"""
+    node = []
+    for i in range(n):
+        op = rng.choice(OPS)
+        bw = rng.choice((8, 16, 32, 64))
+        node.append(
+            Uop(
+                i,
+                op,
+                bw,
+                LatencyDB.latency(op, bw) + LatencyDB.carry_penalty(op, bw),
+                LatencyDB.dsp_need(op, bw),
+                LatencyDB.lut_need(bw),
+            )
+        )
+    edges: set[tuple[int, int]] = set()
+    for i in range(1, n):
+        for _ in range(rng.randint(0, 2)):
+            edges.add((rng.randrange(max(0, i - window), i), i))
+    for a, _ in edges:
+        node[a].succ += 1
+    return node, edges
+
+
+def reference_schedule(node, edges, max_comb: int, max_dsp: int):
+    """the original O(n^2 log n) scheduler, kept verbatim for --check"""
+    N = len(node)
+    order0, succ = topo_sort(N, edges)
+    indeg = [0] * N
+    for _, b in edges:
+        indeg[b] += 1
+    ready = [i for i in order0 if indeg[i] == 0]
+    order: List[int] = []
+    stage_ff: List[int] = []
+    stage_metrics = []
+    while ready:
+        ready.sort(key=lambda i: (node[i].lat, node[i].dsp, node[i].succ), reverse=True)
+        used_comb = used_dsp = used_lut = net_cong = 0
+        this_stage = []
+        i = 0
+        while i < len(ready):
+            u = node[ready[i]]
+            if used_comb + u.lat <= max_comb and used_dsp + u.dsp <= max_dsp:
+                this_stage.append(ready.pop(i))
+                used_comb += u.lat
+                used_dsp += u.dsp
+                used_lut += u.lut
+                net_cong += u.succ * u.lat
+            else:
+                i += 1
+        if not this_stage:
+            this_stage.append(ready.pop(0))
+        order.extend(this_stage)
+        stage_metrics.append((used_comb, used_dsp, used_lut, net_cong))
+        if ready:
+            stage_ff.append(this_stage[-1])
+        for u in this_stage:
+            for v in succ[u]:
+                indeg[v] -= 1
+                if indeg[v] == 0:
+                    ready.append(v)
+    return order, stage_ff, stage_metrics
+
+
+def timeit(fn, reps: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        fn()
+    return (time.perf_counter() - t0) / reps
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    ap.add_argument("--max-comb", type=int, default=2)
+    ap.add_argument("--max-dsp", type=int, default=2)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--check", action="store_true", help="compare with old scheduler")
+    ap.add_argument("--ref-max", type=int, default=2000, help="largest n for --check")
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'uops':>6} {'stages':>7} {'ms/group':>10} {'old ms':>10}")
+    for n in args.sizes:
+        node, edges = synth_dag(n, rng)
+        reps = max(1, 2000 // n)
+        new = list_schedule(node, edges, args.max_comb, args.max_dsp)
+        t_new = timeit(lambda: list_schedule(node, edges, args.max_comb, args.max_dsp), reps)
+        t_old = "-"
+        if args.check and n <= args.ref_max:
+            old = reference_schedule(node, edges, args.max_comb, args.max_dsp)
+            if old != new:
+                sys.exit(f"mismatch at n={n}")
+            t = timeit(lambda: reference_schedule(node, edges, args.max_comb, args.max_dsp), reps)
+            t_old = f"{t * 1e3:.2f}"
+        print(f"{n:6d} {len(new[1]) + 1:7d} {t_new * 1e3:10.2f} {t_old:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,186 @@
 #!/usr/bin/env python3
-"python tools/choose_blocks.py <blk_dir> id0 id1 ... [-o out.json]"
+"""
+python tools/chose_block.py <blk_dir> id0 id1 ... [-o out.json]
+python tools/chose_block.py <blk_dir> --auto --rows 60 --cols 8 [--max-stages 40]
+
+--auto picks the blocks that maximise  execution_count × (x86 cycles − pipeline
+latency)  within the Slice / DSP budget of the make_pblock.py ROWS × COLS
+rectangle (and an optional total pipeline-stage budget).  Up to --exact-max
+candidates are solved exactly (branch & bound), larger sets greedily.
+"""
 
 from pathlib import Path
-import argparse, json, re, sys, subprocess
+from math import ceil
+import argparse, json, re, sys
+
+import make_pblock
+import pipeline_staging_estimator as estimator
+from pipeline_staging_estimator import LatencyDB, build_dag, topo_sort
+
+RTL_W = LatencyDB.RTL_W  # widest block; each is built at its "width" (W_LUT)
+BB_NODE_LIMIT = 2_000_000
+
+
+def block_cost(g: dict) -> dict:
+    """resources, latency and benefit of one augmented block"""
+    ops = [i["opcode"].upper() for i in g["instructions"]]
+    w = g.get("width") or LatencyDB.block_width(g["instructions"])
+    lut = dsps = 0
+    for i, op in zip(g["instructions"], ops):
+        adders = LatencyDB.const_reduced(op, estimator.imm_value(i), w)
+        if adders is not None:  # wiring or shift-add (microop_unit MUL_CSD)
+            lut += adders * w
+        elif op in LatencyDB.DSP_OPS:
+            dsps += 1
+        else:
+            lut += LatencyDB.lut_est(op, w)
+    # --fuse DSP compounds (MAC, pre-adder): all members on one DSP48E2
+    for f in g.get("fused", []):
+        if f["op"] in LatencyDB.DSP_FUSED:
+            part = ops[f["at"] : f["at"] + f["len"]]
+            dsps -= sum(op in LatencyDB.DSP_OPS for op in part) - 1
+            lut -= sum(LatencyDB.lut_est(op, w) for op in part if op not in LatencyDB.DSP_OPS)
+    ff = len(g.get("ff_boundaries", [])) * w
+    # div_unit stage registers: remainder, dividend/quotient, divisor
+    ff += sum(LatencyDB.div_stages(w) * 3 * w for op in ops if op in {"DIV", "IDIV"})
+    stages = g.get("stage_count", 1)
+    lat = g.get("latency_cycles", stages)
+
+    # x86 time = critical path of the dependency DAG in core cycles; the
+    # core renames registers, so only true dependences count, in program
+    # order (order_map: slot -> original index)
+    prog = list(g["instructions"])
+    if len(g.get("order_map", [])) == len(prog):
+        for slot, orig in enumerate(g["order_map"]):
+            prog[orig] = g["instructions"][slot]
+    node, edges = build_dag(prog, deps="precise")
+    order, succ = topo_sort(len(node), edges)
+    finish = [0] * len(node)
+    for i in order:
+        finish[i] += LatencyDB.x86_latency(node[i].op, node[i].bw)
+        for j in succ[i]:
+            finish[j] = max(finish[j], finish[i])
+    x86 = max(finish, default=0)
+
+    return {
+        "slices": max(ceil(lut / 8), ceil(ff / 16)),
+        "dsps": dsps,
+        "stages": stages,
+        "x86_cycles": x86,
+        "latency": lat,
+        "benefit": g.get("execution_count", 0) * (x86 - lat),
+    }
 
-ESTIM = Path(__file__).resolve().parents[0] / "pipeline_staging_estimator.py"
+
+def _density(v: float, w: tuple, caps: tuple) -> float:
+    use = sum(x / c for x, c in zip(w, caps) if c)
+    return v / use if use else float("inf")
+
+
+def knapsack_greedy(items: list, caps: tuple) -> list:
+    """benefit density on normalised weights; best single item as fallback"""
+    order = sorted(range(len(items)), key=lambda i: -_density(*items[i], caps))
+    load = [0] * len(caps)
+    pick = []
+    for i in order:
+        v, w = items[i]
+        if all(l + x <= c for l, x, c in zip(load, w, caps)):
+            pick.append(i)
+            load = [l + x for l, x in zip(load, w)]
+    fits = [i for i, (_, w) in enumerate(items) if all(x <= c for x, c in zip(w, caps))]
+    best1 = max(fits, key=lambda i: items[i][0], default=None)
+    if best1 is not None and items[best1][0] > sum(items[i][0] for i in pick):
+        pick = [best1]
+    return sorted(pick)
+
+
+def knapsack_exact(items: list, caps: tuple) -> list:
+    """branch & bound, bound = min over dimensions of the fractional knapsack"""
+    n = len(items)
+    order = sorted(range(n), key=lambda i: -_density(*items[i], caps))
+    val = [items[i][0] for i in order]
+    wt = [items[i][1] for i in order]
+    D = len(caps)
+    # per dimension: suffix items by value/weight for the fractional bound
+    by_dim = [
+        sorted(range(n), key=lambda k: -(val[k] / wt[k][d] if wt[k][d] else float("inf")))
+        for d in range(D)
+    ]
+
+    def bound(k: int, load: list, cur: int) -> float:
+        best = float("inf")
+        for d in range(D):
+            room, b = caps[d] - load[d], cur
+            for j in by_dim[d]:
+                if j < k:
+                    continue
+                w = wt[j][d]
+                if w <= room:
+                    room -= w
+                    b += val[j]
+                else:
+                    b += val[j] * room / w
+                    break
+            best = min(best, b)
+        return best
+
+    best_val, best_set = 0, []
+    stack = [(0, [0] * D, 0, [])]
+    nodes = 0
+    while stack:
+        k, load, cur, chosen = stack.pop()
+        nodes += 1
+        if nodes > BB_NODE_LIMIT:
+            raise RuntimeError("branch & bound node limit")
+        if cur > best_val:
+            best_val, best_set = cur, chosen
+        if k == n or bound(k, load, cur) <= best_val:
+            continue
+        stack.append((k + 1, load, cur, chosen))  # skip k (explored last)
+        new = [l + x for l, x in zip(load, wt[k])]
+        if all(l <= c for l, c in zip(new, caps)):
+            stack.append((k + 1, new, cur + val[k], chosen + [k]))
+    return sorted(order[k] for k in best_set)
+
+
+def auto_select(blocks: list, caps: tuple, exact_max: int) -> tuple:
+    """return (picked block indices, costs, method)"""
+    costs = [block_cost(b) for b in blocks]
+    cand = [i for i, c in enumerate(costs) if c["benefit"] > 0]
+    dims = ("slices", "dsps", "stages")
+    items = [(costs[i]["benefit"], tuple(costs[i][d] for d in dims)) for i in cand]
+    # an unset budget (None) never binds
+    caps_all = tuple(
+        c if c is not None else sum(w[d] for _, w in items) for d, c in enumerate(caps)
+    )
+    method = "greedy"
+    if len(items) <= exact_max:
+        try:
+            pick, method = knapsack_exact(items, caps_all), "exact"
+        except RuntimeError:
+            pick = knapsack_greedy(items, caps_all)
+    else:
+        pick = knapsack_greedy(items, caps_all)
+    return [cand[k] for k in pick], costs, method
 
 
 def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("blk_dir", help="directory produced by split_block.py")
-    ap.add_argument("ids", nargs="+", help="decimal ids from filename, e.g. 0 7 11")
+    ap.add_argument("ids", nargs="*", help="decimal ids from filename, e.g. 0 7 11")
     ap.add_argument("-o", "--out", default=None)
     ap.add_argument(
         "--tcl-dir",
         default="constraints",
         help="where pipe_stages.tcl should be written",
     )
+    ap.add_argument("--auto", action="store_true", help="knapsack selection (no ids)")
+    ap.add_argument("--rows", type=int, help="--auto: make_pblock Slice rows")
+    ap.add_argument("--cols", type=int, help="--auto: make_pblock Slice columns")
+    ap.add_argument("--max-stages", type=int, default=None, help="--auto: total stages")
+    ap.add_argument(
+        "--exact-max", type=int, default=40, help="--auto: largest set solved exactly"
+    )
     args = ap.parse_args()
 
     blk_dir = Path(args.blk_dir)
@@ -29,30 +193,73 @@ def main() -> None:
     if not candidates:
         sys.exit("no block files found in the directory")
 
-    try:
-        want = {int(x) for x in args.ids}
-    except ValueError:
-        sys.exit("ids must be decimal numbers (e.g. 0 3 11)")
+    if args.auto:
+        if args.ids:
+            sys.exit("--auto and explicit ids are exclusive")
+        if args.rows is None or args.cols is None:
+            sys.exit("--auto needs --rows and --cols (same as make_pblock.py)")
+        slices, dsps = make_pblock.capacity(args.rows, args.cols)
+        all_blocks = [json.loads(p.read_text()) for p in candidates]
+        pick, costs, method = auto_select(
+            all_blocks, (slices, dsps, args.max_stages), args.exact_max
+        )
+        if not pick:
+            sys.exit("no block fits the budget with a positive benefit")
+        chosen = [candidates[i] for i in pick]
+        used = {d: sum(costs[i][d] for i in pick) for d in ("slices", "dsps", "stages")}
+        print(f"auto ({method}): {len(pick)} of {len(candidates)} blocks")
+        for i in pick:
+            c = costs[i]
+            print(
+                f"  {candidates[i].name}: benefit={c['benefit']} "
+                f"x86={c['x86_cycles']} lat={c['latency']} "
+                f"slices={c['slices']} dsps={c['dsps']}"
+            )
+        print(
+            f"  slices {used['slices']}/{slices}  dsps {used['dsps']}/{dsps}  "
+            f"stages {used['stages']}/{args.max_stages or '-'}  "
+            f"benefit {sum(costs[i]['benefit'] for i in pick)}"
+        )
+    else:
+        if not args.ids:
+            sys.exit("give block ids or --auto")
+        try:
+            want = {int(x) for x in args.ids}
+        except ValueError:
+            sys.exit("ids must be decimal numbers (e.g. 0 3 11)")
 
-    chosen = [
-        p for p in candidates if int(re.search(r"blk(\d{3})_", p.name).group(1)) in want
-    ]
-    if not chosen:
-        sys.exit("no blocks matched the given ids")
+        chosen = [
+            p for p in candidates if int(re.search(r"blk(\d{3})_", p.name).group(1)) in want
+        ]
+        if not chosen:
+            sys.exit("no blocks matched the given ids")
 
     out_path = Path(args.out) if args.out else blk_dir.parent / "selected_blocks.json"
     blocks = [json.loads(p.read_text()) for p in chosen]
     out_path.write_text(json.dumps(blocks, indent=2))
     print(f"Done, {len(blocks)} blocks → {out_path}")
 
-    print(">> re-estimating stages / FF …")
+    # re-estimate in the mode the blocks were scheduled in
+    modes = {(b.get("datapath", "chain"), b.get("deps", "conservative"), bool(b.get("fuse")),
+              b.get("scheduler", "greedy"), b.get("opt_max_uops", estimator.OPT_MAX_UOPS),
+              b.get("target_mhz"), b.get("max_comb", 2), b.get("max_dsp", 2))
+             for b in blocks}
+    if len(modes) > 1:
+        sys.exit("selected blocks mix --datapath / --deps / --fuse / --scheduler / "
+                 "--target-mhz / --max-comb / --max-dsp settings; "
+                 "re-estimate them with one set of flags first")
+    datapath, deps, fuse, scheduler, opt_max, mhz, max_comb, max_dsp = modes.pop()
+    argv = [str(out_path), "--emit-tcl", "--tcl-dir", args.tcl_dir,
+            "--datapath", datapath, "--deps", deps, "--scheduler", scheduler,
+            "--opt-max-uops", str(opt_max), "--max-comb", str(max_comb),
+            "--max-dsp", str(max_dsp)] + ["--fuse"] * fuse
+    if mhz:
+        argv += ["--target-mhz", str(mhz)]
+    print(f">> re-estimating stages / FF ({' '.join(argv[4:])}) …")
     try:
-        subprocess.check_call(
-            ["python3", str(ESTIM), str(out_path),
-             "--emit-tcl", "--tcl-dir", args.tcl_dir]
-        )
-    except subprocess.CalledProcessError as e:
-        sys.exit(f"[choose_blocks] pipeline_staging_estimator failed (exit {e.returncode})")
+        estimator.main(argv)
+    except Exception as e:
+        sys.exit(f"[choose_blocks] pipeline_staging_estimator failed: {e}")
 
 
 
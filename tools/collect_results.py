@@ -8,6 +8,9 @@ from pathlib import Path
 from typing import Any, Dict, List, Tuple
 import glob, re
 
+import flow_io
+import pc_table
+
 ROOT = Path(__file__).resolve().parents[1]
 RPT_DIR = ROOT / "reports"
 LEN_PKG = ROOT / "rtl" / "len_table_pkg.sv"
@@ -85,7 +88,7 @@ def parse_util(rpt: Path) -> dict[str, Any]:
 
 
 #  stage / u-op info
-def parse_len_pkg() -> tuple[str, str]:
+def parse_len_pkg() -> tuple[str, str, str]:
     src = text(LEN_PKG)
 
     stages = re.findall(r"STAGE_LUT\s*\[N_CASE\].+?\{\s*([^}]+)\}", src, re.S)
@@ -94,6 +97,8 @@ def parse_len_pkg() -> tuple[str, str]:
         stage_expr = "+".join(str(n) for n in nums)
     else:
         stage_expr = "?"
+    w_lut = re.search(r"W_LUT\s*\[N_CASE\].+?\{\s*([^}]+)\}", src, re.S)
+    width_expr = "+".join(x.strip() for x in w_lut.group(1).split(",")) if w_lut else ""
 
     ops_rows = re.findall(
         r"\{\s*([^}]+)\}", re.search(r"OPS_LUT.+?=\s*'\{(.+?)\};", src, re.S).group(1)
@@ -106,13 +111,13 @@ def parse_len_pkg() -> tuple[str, str]:
         )
         for row in ops_rows
     )
-    return stage_expr, muops
+    return stage_expr, muops, width_expr
 
 
 #  collect all data
 def collect(tag: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
     wns, fmax = parse_timing()
-    stage_expr, muops = parse_len_pkg()
+    stage_expr, muops, width_expr = parse_len_pkg()
     rows        : List[Dict[str, Any]] = [] 
     sniper_rows : List[Dict[str, Any]] = []
     block_rows  : List[Dict[str, Any]] = []
@@ -120,13 +125,14 @@ def collect(tag: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[
     lats_all    : list[str] = []
 
     CANDIDATE_JSON = [
-        ROOT / "examples/selected_blocks_result_augmented.json",
-        ROOT / "examples/alu_only_result_augmented.json",
+        ROOT / f"examples/{stem}_result_augmented.{ext}"
+        for stem in ("selected_blocks", "alu_only")
+        for ext in ("json", "ndjson", "ccpk")
     ]
     blk_groups: List[dict] = []
     for fp in CANDIDATE_JSON:
         if fp.is_file():
-            blk_groups = json.loads(fp.read_text())
+            blk_groups = flow_io.load_groups(fp)
             break
     if not blk_groups:           
         blk_groups = [
@@ -134,31 +140,39 @@ def collect(tag: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[
             for p in (ROOT / "examples/blocks").glob("blk*.json")
         ]
 
-    for g in blk_groups:
-        bench = g.get("bench", "?")
-        src   = g.get("src",   "?" )
+    for bi, g in enumerate(blk_groups):
         pcs = [ins["address"] for ins in g.get("instructions", [])]
         if not pcs:
             continue
         lat_first = str(g.get("latency_cycles", g.get("stage_count", 1)))
-        sniper_rows += [
-            {"bench": bench, "src": src, "pc": pcs[0], "latency": lat_first},
-            *({"bench": bench, "src": src, "pc": p, "latency": "0"} for p in pcs[1:])
-        ]
         lat_list = [lat_first] + ["0"]*(len(pcs)-1)
-        pcs_all  += pcs
-        lats_all += lat_list
-
-        block_rows.append({
-            "bench": bench,
-            "src":   src,                         
-            "pcs":       ",".join(pcs),
-            "latencies": ",".join(lat_list),
-            "stage_count": g.get("stage_count", 1),
-            "muops": "-".join(op["opcode"].upper() for op in g["instructions"]),
-            "bench": bench,
-            "src":   src,
-        })
+        # split_block merges equivalent blocks; each copy keeps its own PCs
+        occurrences = g.get("occurrences") or [
+            {"bench": g.get("bench", "?"), "src": g.get("src", "?"), "pcs": pcs}
+        ]
+        for occ in occurrences:
+            bench, src, pcs = occ["bench"], occ["src"], occ["pcs"]
+            # block / ii go to the binary table only (uop_block, uop_dag and
+            # div_unit all take a new input every clock)
+            sniper_rows += [
+                {"bench": bench, "src": src, "pc": pcs[0], "latency": lat_first,
+                 "block": bi, "ii": 1},
+                *({"bench": bench, "src": src, "pc": p, "latency": "0", "block": bi, "ii": 1}
+                  for p in pcs[1:])
+            ]
+            pcs_all  += pcs
+            lats_all += lat_list
+
+            block_rows.append({
+                "bench": bench,
+                "src":   src,                         
+                "pcs":       ",".join(pcs),
+                "latencies": ",".join(lat_list),
+                "stage_count": g.get("stage_count", 1),
+                "muops": "-".join(op["opcode"].upper() for op in g["instructions"]),
+                "bench": bench,
+                "src":   src,
+            })
 
     for util_rpt in sorted(RPT_DIR.glob("utilization_pblock_*.rpt")):
         pb_name  = util_rpt.stem.replace("utilization_", "")
@@ -175,12 +189,33 @@ def collect(tag: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[
                 "muops": muops,
                 "pcs":       ",".join(pcs_all),
                 "latencies": ",".join(lats_all),
+                "widths": width_expr,
             }
         )
         
     return rows, block_rows, sniper_rows
 
 
+def append_all_runs(master: Path, rows: List[Dict[str, Any]]) -> None:
+    """append rows to master; columns it lacks are added by rewriting it once"""
+    hdr, old = list(rows[0].keys()), None
+    if master.exists():
+        with master.open(newline="") as f:
+            rd = csv.DictReader(f)
+            known = rd.fieldnames or []
+            if set(hdr) - set(known):  # new columns: rewrite once with them
+                old = list(rd)
+            hdr = known + [k for k in hdr if k not in known]
+    append = master.exists() and old is None
+    master.parent.mkdir(parents=True, exist_ok=True)
+    with master.open("a" if append else "w", newline="") as f:
+        w = csv.DictWriter(f, hdr)
+        if not append:
+            w.writeheader()
+            w.writerows(old or [])
+        w.writerows(rows)
+
+
 def dump(rows, block_rows, sniper_rows, tag):
     base = RPT_DIR / f"impl_summary_{tag}"
     base.with_suffix(".json").write_text(json.dumps(rows, indent=2))
@@ -189,13 +224,7 @@ def dump(rows, block_rows, sniper_rows, tag):
         w.writeheader()
         w.writerows(rows)
 
-    master = RPT_DIR / "all_runs.csv"
-    new_hdr = not master.exists()
-    with master.open("a", newline="") as f:
-        w = csv.DictWriter(f, rows[0].keys())
-        if new_hdr:
-            w.writeheader()
-        w.writerows(rows)
+    append_all_runs(RPT_DIR / "all_runs.csv", rows)
 
     print(f"Done,  {base.name}.json / .csv written")
     print(f"Done,  all_runs.csv updated")
@@ -208,10 +237,13 @@ def dump(rows, block_rows, sniper_rows, tag):
                 seen.add(key);  uniq.append(r)
         sfile = RPT_DIR / f"sniper_{tag}.csv"
         with sfile.open("w", newline="") as f:
-            w = csv.DictWriter(f, ["bench", "src", "pc", "latency"])
+            w = csv.DictWriter(f, ["bench", "src", "pc", "latency"], extrasaction="ignore")
             w.writeheader()
             w.writerows(uniq)
         print(f"Done,  {sfile.name}  (for Sniper cfg)")
+        tfile = sfile.with_suffix(pc_table.SUFFIX)
+        n = pc_table.write_table(tfile, uniq)
+        print(f"Done,  {tfile.name}  ({n} PCs, mmap + binary search)")
 
     if block_rows:
         bfile = RPT_DIR / f"block_summary_{tag}.json"
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+python3 tools/fake_vivado.py -mode batch -source run_vivado.tcl [--seconds 2]
+
+Stand-in for `vivado` that writes canned reports/ instead of building, so
+orchestrate_builds.py and collect_results.py run without the tool:
+
+  python tools/orchestrate_builds.py sweep.json --vivado "python3 tools/fake_vivado.py"
+
+Run from a build directory (rtl/, constraints/, run_vivado.tcl).  The
+numbers are predict_impl's estimate for rtl/len_table_pkg.sv in the pblock
+of constraints/auto_pblock.tcl, plus a few percent of noise seeded by
+both files, so a sweep gives distinct but repeatable rows.  With
+constraints/ooc_blocks.tcl it fills the OOC cache with empty <key>.dcp
+files, as run_vivado.tcl would with checkpoints.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import zlib
+from math import ceil
+from pathlib import Path
+
+import make_pblock
+import predict_impl as pi
+from chose_block import RTL_W
+from collect_results import TARGET_T_NS
+
+OOC_RE = re.compile(r"\{(glen\[\d+\]\.blk_i)\}\s+([0-9a-f]+)")
+PBLOCK_RE = re.compile(r"SLICE_X(\d+)Y(\d+):SLICE_X(\d+)Y(\d+)")
+DSP_RECT_RE = re.compile(r"DSP48E2_X(\d+)Y(\d+):DSP48E2_X(\d+)Y(\d+)")
+DEVICE = {"luts": 1182240, "slices": 147780, "dsps": 6840}  # xcu200
+
+
+def pblock_sites(tcl: str) -> tuple:
+    """(slices, dsps) inside the auto_pblock.tcl rectangles"""
+    s = PBLOCK_RE.search(tcl)
+    d = DSP_RECT_RE.search(tcl)
+    if not s or not d:
+        return make_pblock.capacity(make_pblock.ROW_SLICE, len(make_pblock.SLICE_COLS))
+    x0, y0, x1, y1 = map(int, s.groups())
+    cols = sum(x0 <= x <= x1 for x in make_pblock.SLICE_COLS)
+    dx0, dy0, dx1, dy1 = map(int, d.groups())
+    dcols = sum(dx0 <= x <= dx1 for x in make_pblock.DSP_COLS_ALL)
+    return (y1 - y0 + 1) * cols, (dy1 - dy0 + 1) * dcols
+
+
+def len_pkg_blocks(src: str) -> list:
+    """uop rows and stages of len_table_pkg.sv, as collect_results reads them"""
+    m = re.search(r"OPS_LUT.+?=\s*'\{(.+?)\};", src, re.S)
+    if not m:
+        return []
+    rows = re.findall(r"\{\s*([^}]+)\}", m.group(1))
+    muops = ", ".join(
+        "-".join(t.strip().replace("OP_", "") for t in r.split(",") if t.strip() != "OP_NOP")
+        for r in rows
+    )
+    st = re.search(r"STAGE_LUT\s*\[N_CASE\].+?\{\s*([^}]+)\}", src, re.S)
+    stage_expr = "+".join(x.strip() for x in st.group(1).split(",")) if st else ""
+    wl = re.search(r"W_LUT\s*\[N_CASE\].+?\{\s*([^}]+)\}", src, re.S)
+    width_expr = "+".join(x.strip() for x in wl.group(1).split(",")) if wl else ""
+    return pi.parse_muops(muops, stage_expr, RTL_W, width_expr)
+
+
+def table(rows: list) -> str:
+    hdr = ("Site Type", "Used", "Fixed", "Prohibited", "Available", "Util%")
+    w = [max(len(str(r[i])) for r in [hdr, *rows]) + 2 for i in range(6)]
+    line = "+" + "+".join("-" * n for n in w) + "+"
+    fmt = lambda r: "|" + "|".join(
+        f" {str(v):<{n - 2}} " if i == 0 else f" {str(v):>{n - 2}} " for i, (v, n) in enumerate(zip(r, w))
+    ) + "|"
+    return "\n".join([line, fmt(hdr), line, *map(fmt, rows), line])
+
+
+def util_report(title: str, luts: int, dsps: int, avail: tuple) -> str:
+    pct = lambda u, a: f"{100.0 * u / a:.2f}" if a else "0.00"
+    clb = ceil(luts / 4)
+    return "\n".join([
+        f"Utilization Design Information ({title}, canned by fake_vivado.py)",
+        "",
+        "1. CLB Logic",
+        "------------",
+        "",
+        table([("CLB LUTs", luts, 0, 0, avail[0] * 8, pct(luts, avail[0] * 8)),
+               ("CLB Registers", 2 * luts, 0, 0, avail[0] * 16, pct(2 * luts, avail[0] * 16))]),
+        "",
+        "2. CLB Logic Distribution",
+        "-------------------------",
+        "",
+        table([("CLB", clb, 0, 0, avail[0], pct(clb, avail[0]))]),
+        "",
+        "3. ARITHMETIC",
+        "-------------",
+        "",
+        table([("DSPs", dsps, 0, 0, avail[1], pct(dsps, avail[1]))]),
+        "",
+    ])
+
+
+def timing_report(wns: float) -> str:
+    tns = min(wns, 0.0) * 3
+    cols = ("WNS(ns)", "TNS(ns)", "TNS Failing Endpoints", "TNS Total Endpoints",
+            "WHS(ns)", "THS(ns)", "THS Failing Endpoints", "THS Total Endpoints")
+    vals = (f"{wns:.3f}", f"{tns:.3f}", 3 if wns < 0 else 0, 1024,
+            "0.030", "0.000", 0, 1024)
+    row = lambda vs: "  " + "".join(f"{str(v):>{len(c) + 2}}" for v, c in zip(vs, cols))
+    return "\n".join([
+        "Timing Report (canned by fake_vivado.py)",
+        "",
+        "-" * 96,
+        "| Design Timing Summary",
+        "| ---------------------",
+        "-" * 96,
+        "",
+        row(cols),
+        row("-" * len(c) for c in cols),
+        row(vals),
+        "",
+        "All user specified timing constraints are met." if wns >= 0
+        else "Timing constraints are not met.",
+        "",
+    ])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-mode", default="batch")
+    ap.add_argument("-source", default="run_vivado.tcl")
+    ap.add_argument("-log", type=Path)
+    ap.add_argument("--seconds", type=float, default=1.0, help="pretend build time")
+    args, _ = ap.parse_known_args()
+
+    log = []
+    say = lambda s: (print(s, flush=True), log.append(s))
+    cwd = Path.cwd()
+    if not (cwd / args.source).is_file():
+        sys.exit(f"ERROR: [Common 17-165] couldn't read {args.source}")
+    if not list((cwd / "rtl").glob("*.sv")):
+        sys.exit("ERROR: no *.sv")
+    pkg = (cwd / "rtl" / "len_table_pkg.sv").read_text()
+    pb = cwd / "constraints" / "auto_pblock.tcl"
+    pb_tcl = pb.read_text() if pb.is_file() else ""
+    say(f"fake_vivado: {args.source} in {cwd}, "
+        f"maxThreads {os.environ.get('VIVADO_MAX_THREADS', 'default')}")
+
+    blocks = len_pkg_blocks(pkg)
+    runs = pi.load_history(pi.HISTORY, RTL_W) if pi.HISTORY.is_file() else []
+    coef = pi.fit(runs, 1.0)
+    x = pi.features(blocks)
+    rng = random.Random(zlib.crc32((pkg + pb_tcl).encode()))
+    jit = lambda: 1.0 + rng.uniform(-0.05, 0.05)
+    luts = max(1, round(pi._dot(coef["slices"], x["slices"]) * jit()))
+    dsps = max(0, round(pi._dot(coef["dsps"], x["dsps"])))
+    period = max(0.5, pi._dot(coef["period"], x["period"]) * jit())
+    wns = TARGET_T_NS - period
+    time.sleep(args.seconds)
+
+    ooc = cwd / "constraints" / "ooc_blocks.tcl"
+    if ooc.is_file():
+        tcl = ooc.read_text()
+        cache = Path(re.search(r"set OOC_CACHE \{(.*?)\}", tcl).group(1))
+        cache.mkdir(parents=True, exist_ok=True)
+        keys = dict.fromkeys(k for _, k in OOC_RE.findall(tcl))
+        miss = [k for k in keys if not (cache / f"{k}.dcp").is_file()]
+        for k in miss:
+            (cache / f"{k}.dcp").touch()
+        say(f"fake_vivado: OOC {len(keys)} unique blocks, {len(miss)} synthesised, "
+            f"{len(keys) - len(miss)} from {cache}")
+
+    rpt = cwd / "reports"
+    rpt.mkdir(exist_ok=True)
+    (rpt / "post_route_timing.rpt").write_text(timing_report(wns))
+    (rpt / "post_route_util.rpt").write_text(
+        util_report("top_multi_len", luts, dsps, (DEVICE["slices"], DEVICE["dsps"])))
+    (rpt / f"utilization_{make_pblock.PBLOCK_ID}.rpt").write_text(
+        util_report(make_pblock.PBLOCK_ID, luts, dsps, pblock_sites(pb_tcl)))
+    (rpt / "post_route_power.rpt").write_text(
+        f"Power Report (canned by fake_vivado.py)\n\n"
+        f"| Total On-Chip Power (W)  | {2.5 + luts * 1e-4:.3f} |\n")
+    say(f"fake_vivado: {len(blocks)} blocks, {luts} LUTs, {dsps} DSPs, WNS {wns:.3f} ns")
+    if args.log:
+        args.log.write_text("\n".join(log) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+flow_io.py  -  group list I/O shared by the flow tools
+
+  *.json            one JSON array (pretty-printed, the classic format)
+  *.ndjson/*.jsonl  one group per line, streamable
+  *.ccpk            packed binary: interned string table + fixed-width
+                    group / instruction records, mmap-able (open_packed)
+
+python3 tools/flow_io.py IN OUT      convert between the formats above
+"""
+from __future__ import annotations
+
+import gc
+import json
+import mmap
+import struct
+import sys
+from array import array
+from contextlib import contextmanager
+from itertools import accumulate
+from pathlib import Path
+from typing import Iterable, Iterator, List
+
+NDJSON_SUFFIXES = {".ndjson", ".jsonl"}
+PACKED_SUFFIX = ".ccpk"
+CHUNK = 1 << 20
+
+
+@contextmanager
+def _gc_paused():
+    """Bulk (de)serialisation allocates millions of acyclic objects; the
+    cyclic GC only slows that down."""
+    was = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was:
+            gc.enable()
+
+
+def is_ndjson(path: Path) -> bool:
+    return Path(path).suffix.lower() in NDJSON_SUFFIXES
+
+
+def iter_json_array(path: Path, chunk: int = CHUNK) -> Iterator[dict]:
+    """Yield the elements of a top-level JSON array one at a time.
+
+    Only one element (plus one read chunk) is held in memory at once.
+    """
+    dec = json.JSONDecoder()
+    with Path(path).open(encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+
+        def fill(size: int = chunk) -> bool:
+            nonlocal buf, pos, eof
+            data = f.read(size)
+            if not data:
+                eof = True
+                return False
+            buf = buf[pos:] + data
+            pos = 0
+            return True
+
+        def skip_ws() -> None:
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf) or not fill():
+                    return
+
+        skip_ws()
+        if pos >= len(buf) or buf[pos] != "[":
+            raise ValueError(f"{path}: top-level JSON array expected")
+        pos += 1
+        skip_ws()
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        while True:
+            skip_ws()
+            grow = chunk
+            while True:
+                try:
+                    obj, end = dec.raw_decode(buf, pos)
+                    break
+                except json.JSONDecodeError:
+                    # element spans the buffer edge: read more (geometrically,
+                    # so a single huge group is not re-parsed quadratically)
+                    if eof or not fill(grow):
+                        raise
+                    grow *= 2
+            pos = end
+            yield obj
+            skip_ws()
+            if pos >= len(buf):
+                raise ValueError(f"{path}: unterminated JSON array")
+            if buf[pos] == "]":
+                return
+            if buf[pos] != ",":
+                raise ValueError(f"{path}: ',' expected at offset {pos}")
+            pos += 1
+
+
+def iter_groups(path: Path) -> Iterator[dict]:
+    """Stream groups from a JSON array, NDJSON or packed file."""
+    p = Path(path)
+    if is_packed(p):
+        with open_packed(p) as pk:
+            yield from pk
+    elif is_ndjson(p):
+        with p.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        yield from iter_json_array(p)
+
+
+def load_groups(path: Path) -> List[dict]:
+    """Load a whole group list (a single dict is wrapped into a list)."""
+    p = Path(path)
+    if is_packed(p):
+        with _gc_paused():
+            return list(iter_groups(p))
+    if is_ndjson(p):
+        return list(iter_groups(p))
+    obj = json.loads(p.read_text())
+    return obj if isinstance(obj, list) else [obj]
+
+
+def write_ndjson(f, groups: Iterable[dict]) -> int:
+    """Write groups to an open text file, one per line; return the count."""
+    n = 0
+    for g in groups:
+        f.write(json.dumps(g, separators=(",", ":")))
+        f.write("\n")
+        n += 1
+    return n
+
+
+def write_json_array(f, groups: Iterable[dict]) -> int:
+    """Stream groups as a JSON array, byte-identical to json.dumps(.., indent=2)."""
+    n = 0
+    for g in groups:
+        f.write("[\n" if n == 0 else ",\n")
+        f.write("\n".join("  " + ln for ln in json.dumps(g, indent=2).split("\n")))
+        n += 1
+    f.write("\n]" if n else "[]")
+    return n
+
+
+def dump_groups(path: Path, groups: Iterable[dict]) -> int:
+    """Write groups in the format implied by the file suffix, streaming."""
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    if is_packed(p):
+        with _gc_paused():
+            return write_packed(p, groups)
+    with p.open("w", encoding="utf-8") as f:
+        return (write_ndjson if is_ndjson(p) else write_json_array)(f, groups)
+
+
+# packed format
+#
+#   header   <4sHHQQQQQ  magic, version, 0, n_group, n_instr, n_opnd, n_str, blob
+#   groups   n_group x 3 u32   instr_start, n_instr, meta_sid
+#   instr    n_instr x 6 u32   index, addr_sid, opcode_sid, opnd_start,
+#                              n_raw | n_in << 8 | n_out << 16, extra_sid
+#   opnd     n_opnd  x u32     operand string ids (raw, in, out back to back)
+#   stroff   (n_str+1) x u64   byte offsets into blob
+#   blob     utf-8 strings
+#
+# every section starts 8-byte aligned.  sid 0 is the empty string; a group's
+# meta (the group with "instructions": null) and non-standard instruction
+# keys are stored as compact JSON strings.  An instruction whose keys are
+# not INSTR_KEYS followed by its own extras (one is missing, or the order
+# differs) also stores its key list under KEY_ORDER, so it reads back as
+# written.
+MAGIC = b"CCPK"
+VERSION = 1
+HDR = struct.Struct("<4sHHQQQQQ")
+G_REC, I_REC = 3, 6
+INSTR_KEYS = ("index", "address", "opcode", "raw_operands", "in_operands", "out_operands")
+KEY_ORDER = "__keys__"
+_LE = sys.byteorder == "little"
+
+
+def is_packed(path: Path) -> bool:
+    return Path(path).suffix.lower() == PACKED_SUFFIX
+
+
+def _pad8(n: int) -> int:
+    return -n % 8
+
+
+class _Interner(dict):
+    def __missing__(self, s: str) -> int:
+        k = self[s] = len(self)
+        return k
+
+
+def _with_extra(d: dict, xs: dict) -> dict:
+    """decoded instruction d plus its extra keys, in the written key order"""
+    order = xs.pop(KEY_ORDER, None)
+    d.update(xs)
+    return d if order is None else {k: d[k] for k in order}
+
+
+def write_packed(path: Path, groups: Iterable[dict]) -> int:
+    sid = _Interner({"": 0})
+    intern = sid.__getitem__
+    compact = json.JSONEncoder(separators=(",", ":")).encode
+    std_keys = set(INSTR_KEYS)
+    grec, irec, opnd = array("I"), array("I"), array("I")
+    n_group = 0
+
+    for g in groups:
+        ins = g.get("instructions", [])
+        meta = dict(g, instructions=None)  # placeholder keeps key order
+        grec.extend((len(irec) // I_REC, len(ins), intern(compact(meta))))
+        for i in ins:
+            raw = i.get("raw_operands", [])
+            src = i.get("in_operands", [])
+            dst = i.get("out_operands", [])
+            if len(raw) > 255 or len(src) > 255 or len(dst) > 255:
+                raise ValueError("packed format: more than 255 operands")
+            extra = 0
+            if tuple(i) != INSTR_KEYS:
+                xs = {k: v for k, v in i.items() if k not in std_keys}
+                if tuple(i) != INSTR_KEYS + tuple(xs):
+                    xs[KEY_ORDER] = list(i)
+                extra = intern(compact(xs)) if xs else 0
+            irec.extend(
+                (
+                    i.get("index", 0),
+                    intern(i.get("address", "")),
+                    intern(i.get("opcode", "")),
+                    len(opnd),
+                    len(raw) | len(src) << 8 | len(dst) << 16,
+                    extra,
+                )
+            )
+            opnd.extend(map(intern, raw + src + dst))
+        n_group += 1
+
+    enc = [s.encode("utf-8") for s in sid]
+    stroff = array("Q", [0])
+    stroff.extend(accumulate(map(len, enc)))
+    blob = b"".join(enc)
+    if not _LE:
+        for a in (grec, irec, opnd, stroff):
+            a.byteswap()
+
+    with Path(path).open("wb") as f:
+        f.write(HDR.pack(MAGIC, VERSION, 0, n_group, len(irec) // I_REC,
+                         len(opnd), len(enc), len(blob)))
+        for a in (grec, irec, opnd, stroff):
+            b = a.tobytes()
+            f.write(b)
+            f.write(b"\0" * _pad8(len(b)))
+        f.write(blob)
+    return n_group
+
+
+class PackedGroups:
+    """Read-only, zero-copy view of a .ccpk file.
+
+    Sections are memoryviews over an mmap; groups are decoded into dicts
+    only when indexed, so opening is O(1) in the file size.
+    """
+
+    def __init__(self, path: Path):
+        self._f = Path(path).open("rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, ver, _, ng, ni, no, ns, nb = HDR.unpack_from(self._mm, 0)
+        if magic != MAGIC or ver != VERSION:
+            raise ValueError(f"{path}: not a packed group file (v{VERSION})")
+        self.n_group = ng
+        off = HDR.size
+        secs = []
+        for n, code, w in ((ng * G_REC, "I", 4), (ni * I_REC, "I", 4), (no, "I", 4),
+                           (ns + 1, "Q", 8)):
+            raw = memoryview(self._mm)[off:off + n * w]
+            if _LE:
+                secs.append(raw.cast(code))
+            else:
+                a = array(code, raw)
+                a.byteswap()
+                secs.append(a)
+            off += n * w + _pad8(n * w)
+        self._g, self._i, self._o, self._soff = secs
+        self._blob = off
+        self._sym: dict[int, str] = {}
+
+    def _str(self, k: int) -> str:
+        b = self._blob
+        return str(self._mm[b + self._soff[k]:b + self._soff[k + 1]], "utf-8")
+
+    def _sym_str(self, k: int) -> str:
+        # opcodes / operands repeat a lot -> memoise
+        s = self._sym.get(k)
+        if s is None:
+            s = self._sym[k] = self._str(k)
+        return s
+
+    def __len__(self) -> int:
+        return self.n_group
+
+    def __getitem__(self, gi: int) -> dict:
+        if gi < 0:
+            gi += self.n_group
+        if not 0 <= gi < self.n_group:
+            raise IndexError(gi)
+        G, I, O, sym = self._g, self._i, self._o, self._sym_str
+        start, n, meta = G[3 * gi:3 * gi + 3]
+        g = json.loads(self._str(meta))
+        ins = []
+        for r in range(start * I_REC, (start + n) * I_REC, I_REC):
+            idx, addr, opc, o0, cnt, extra = I[r:r + I_REC]
+            nr, ni, no = cnt & 0xFF, cnt >> 8 & 0xFF, cnt >> 16
+            d = {
+                "index": idx,
+                "address": self._str(addr),
+                "opcode": sym(opc),
+                "raw_operands": [sym(k) for k in O[o0:o0 + nr]],
+                "in_operands": [sym(k) for k in O[o0 + nr:o0 + nr + ni]],
+                "out_operands": [sym(k) for k in O[o0 + nr + ni:o0 + nr + ni + no]],
+            }
+            if extra:
+                d = _with_extra(d, json.loads(self._str(extra)))
+            ins.append(d)
+        g["instructions"] = ins
+        return g
+
+    def __iter__(self) -> Iterator[dict]:
+        # bulk path: decode the string table and all group metas in one go
+        mm, b, off = self._mm, self._blob, self._soff.tolist()
+        strs = [str(mm[b + off[k]:b + off[k + 1]], "utf-8") for k in range(len(off) - 1)]
+        G, I, O = self._g.tolist(), self._i.tolist(), self._o.tolist()
+        metas = json.loads("[" + ",".join(strs[m] for m in G[2::3]) + "]")
+        for gi, g in enumerate(metas):
+            start, n = G[3 * gi], G[3 * gi + 1]
+            ins = []
+            for r in range(start * I_REC, (start + n) * I_REC, I_REC):
+                o0, cnt = I[r + 3], I[r + 4]
+                o1 = o0 + (cnt & 0xFF)
+                o2 = o1 + (cnt >> 8 & 0xFF)
+                o3 = o2 + (cnt >> 16)
+                d = {
+                    "index": I[r],
+                    "address": strs[I[r + 1]],
+                    "opcode": strs[I[r + 2]],
+                    "raw_operands": [strs[k] for k in O[o0:o1]],
+                    "in_operands": [strs[k] for k in O[o1:o2]],
+                    "out_operands": [strs[k] for k in O[o2:o3]],
+                }
+                if I[r + 5]:
+                    d = _with_extra(d, json.loads(strs[I[r + 5]]))
+                ins.append(d)
+            g["instructions"] = ins
+            yield g
+
+    def close(self) -> None:
+        self._g = self._i = self._o = self._soff = None
+        self._mm.close()
+        self._f.close()
+
+    def __enter__(self) -> "PackedGroups":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_packed(path: Path) -> PackedGroups:
+    return PackedGroups(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: flow_io.py IN OUT   (.json / .ndjson / .ccpk)")
+    n = dump_groups(Path(sys.argv[2]), iter_groups(Path(sys.argv[1])))
+    print(f"Done, {n} groups -> {sys.argv[2]}")
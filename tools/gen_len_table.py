@@ -1,13 +1,25 @@
 #!/usr/bin/env python3
 """
 python tools/gen_len_table.py  examples/blocks/.json  --out rtl/len_table_pkg.sv
+python tools/gen_len_table.py  examples/blocks --ooc [.cache/ooc]
+
+--ooc: also write one wrapper module per unique block into the cache dir and
+constraints/ooc_blocks.tcl; run_vivado.tcl then synthesises each block out of
+context once (<cache>/<key>.dcp) and links the checkpoints into the top.  The
+key hashes the block's parameters (OPS, IMM, FF_MASK, W, stages, routing) and
+the block RTL, so editing one block costs one block's synthesis.
 """
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
 import sys
 from pathlib import Path
 
+import flow_io
+from pipeline_staging_estimator import LatencyDB, imm_value, operand_sources
+
 OPS_MAP = {
     "ADD": "OP_ADD",
     "ADC": "OP_ADC",
@@ -36,6 +48,16 @@ OPS_MAP = {
     "IMUL": "OP_IMUL",
     "DIV": "OP_DIV",
     "IDIV": "OP_IDIV",
+    # compound ops of the estimator's --fuse pass
+    "AND_AND": "OP_AND_AND",
+    "ADD_ADD": "OP_ADD_ADD",
+    "ADD3": "OP_ADD3",
+    "INC_SHL": "OP_INC_SHL",
+    "NOT_ADD": "OP_NOT_ADD",
+    "SUB_SAR": "OP_SUB_SAR",
+    "MUL_ADD": "OP_MUL_ADD",
+    "IMUL_ADD": "OP_IMUL_ADD",
+    "DEC_IMUL": "OP_DEC_IMUL",
 }
 
 
@@ -52,6 +74,12 @@ def hex32(tok):  # imm → 32-bit hex
     return f"32'h{v&0xffffffff:08x}"
 
 
+OOC_CACHE = Path(__file__).resolve().parents[1] / ".cache" / "ooc"
+OOC_TCL = Path("constraints/ooc_blocks.tcl")
+# top-level files: everything else in rtl/ ends up inside a block
+TOP_RTL = ("top_multi_len.sv", "len_table_pkg.sv")
+
+
 def load_blocks(path: str):
     p = Path(path)
     if path == "-":
@@ -65,15 +93,41 @@ def load_blocks(path: str):
             blocks.append(blk)
         return blocks
     else:
-        obj = json.loads(p.read_text())
-        # single file may be dict or list
-        return obj if isinstance(obj, list) else [obj]
+        # single file may be dict, list or NDJSON
+        return flow_io.load_groups(p)
+
+
+def block_params(b) -> dict:
+    """SV literals of one block's parameters, one per uop slot (unpadded)"""
+    ops = [OPS_MAP[i["opcode"].upper()] for i in b["instructions"]]
+    # fused chain: compound op in the first slot, absorbed slots pass through
+    for f in b.get("fused", []):
+        ops[f["at"]] = OPS_MAP[f["op"]]
+        ops[f["at"] + 1 : f["at"] + f["len"]] = ["OP_NOP"] * (f["len"] - 1)
+    # IMM: operand b, or the shift count of shifts / rotates (uop_block)
+    vals = [imm_value(i) for i in b["instructions"]]
+    dag = b.get("datapath") == "dataflow"
+    # SRC_A / SRC_B: producing slot of operand a / b, -1 = block input
+    src = operand_sources(b) if dag else ([-1] * len(ops),) * 2
+    return {
+        "len": len(ops),
+        "stages": b["stage_count"],
+        "width": b.get("width", 64),
+        "dataflow": dag,
+        "ff_mask": sum(1 << i for i in b["ff_boundaries"]),
+        "ops": ops,
+        "imm": ["32'h00000000" if v is None else hex32(v) for v in vals],
+        "use_imm": ["1'b0" if v is None else "1'b1" for v in vals],
+        "src_a": list(src[0]),
+        "src_b": list(src[1]),
+    }
 
 
 # make_pkg 
 def make_pkg(blocks) -> str:
     n = len(blocks)
     max_len = max(len(b["instructions"]) for b in blocks)
+    par = [block_params(b) for b in blocks]
     out = []
 
     o = out.append
@@ -87,7 +141,20 @@ def make_pkg(blocks) -> str:
     o(",\n".join(f"    {len(b['instructions'])}" for b in blocks))
     o("  };")
     o("  localparam int STAGE_LUT [N_CASE] = '{")
-    o(",\n".join(f"    {b['stage_count']}" for b in blocks))
+    o(",\n".join(f"    {p['stages']}" for p in par))
+    o("  };")
+    # estimator latency_cycles (golden_model --fusion-check compares it)
+    o("  localparam int LAT_LUT [N_CASE] = '{")
+    o(",\n".join(f"    {b.get('latency_cycles', b['stage_count'])}" for b in blocks))
+    o("  };")
+    # datapath width per block (estimator "width", 64 for older JSON)
+    o("  /* per-block datapath width */")
+    o("  localparam int W_LUT [N_CASE] = '{")
+    o(",\n".join(f"    {p['width']}" for p in par))
+    o("  };")
+    # estimator --datapath dataflow: uop_dag, operands routed by SRC_A/SRC_B
+    o("  localparam bit DATAFLOW_LUT [N_CASE] = '{")
+    o(",\n".join(f"    1'b{int(p['dataflow'])}" for p in par))
     o("  };")
 
     # FF mask
@@ -101,53 +168,115 @@ def make_pkg(blocks) -> str:
     o("  };")
 
     # OPS
-    o("  localparam op_t OPS_LUT [N_CASE][MAX_LEN] = '{")
-    for idx, b in enumerate(blocks):
-        ops = [OPS_MAP[i["opcode"].upper()] for i in b["instructions"]]
-        ops += ["OP_NOP"] * (max_len - len(ops))
-        o("    '{ " + ", ".join(ops) + " }" + ("" if idx == n - 1 else ","))
-    o("  };")
-
-    # IMM
-    o("  localparam logic [31:0] IMM_LUT [N_CASE][MAX_LEN] = '{")
-    for idx, b in enumerate(blocks):
-        imm = [
-            (
-                hex32(i["raw_operands"][1])
-                if i["opcode"].lower() == "test" and len(i["raw_operands"]) == 2
-                else "32'h00000000"
-            )
-            for i in b["instructions"]
-        ]
-        imm += ["32'h00000000"] * (max_len - len(imm))
-        o("    '{ " + ", ".join(imm) + " }" + ("" if idx == n - 1 else ","))
-    o("  };")
-
-    # USE_IMM
-    o("  localparam logic USE_IMM_LUT [N_CASE][MAX_LEN] = '{")
-    for idx, b in enumerate(blocks):
-        use = [
-            (
-                "1'b1"
-                if i["opcode"].lower() == "test" and len(i["raw_operands"]) == 2
-                else "1'b0"
-            )
-            for i in b["instructions"]
-        ]
-        use += ["1'b0"] * (max_len - len(use))
-        o("    '{ " + ", ".join(use) + " }" + ("" if idx == n - 1 else ","))
-    o("  };")
+    # OPS / IMM / USE_IMM / SRC_A / SRC_B rows, padded to MAX_LEN
+    for name, key, pad in (
+        ("op_t OPS_LUT", "ops", "OP_NOP"),
+        ("logic [31:0] IMM_LUT", "imm", "32'h00000000"),
+        ("logic USE_IMM_LUT", "use_imm", "1'b0"),
+        ("int SRC_A_LUT", "src_a", -1),
+        ("int SRC_B_LUT", "src_b", -1),
+    ):
+        o(f"  localparam {name} [N_CASE][MAX_LEN] = '{{")
+        for idx, p in enumerate(par):
+            row = p[key] + [pad] * (max_len - p["len"])
+            o("    '{ " + ", ".join(map(str, row)) + " }" + ("" if idx == n - 1 else ","))
+        o("  };")
 
     o("endpackage")
     return "\n".join(out) + "\n"
 
+
+# out-of-context blocks
+def rtl_digest(rtl: Path) -> str:
+    h = hashlib.sha256()
+    for f in sorted(rtl.glob("*.sv")):
+        if f.name not in TOP_RTL:
+            h.update(f.name.encode() + b"\0" + f.read_bytes())
+    return h.hexdigest()
+
+
+def block_key(p: dict, digest: str) -> str:
+    """cache key: every parameter uop_block_wrap sees, plus the block RTL"""
+    blob = json.dumps([p, digest], sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+def ooc_wrapper(key: str, p: dict) -> str:
+    """blk_<key>: one block with literal parameters, ports as glen[i].blk_i"""
+    w = min(p["width"], 64)  # top_multi_len clamps W_LUT to its W
+    arr = lambda xs: "'{" + ", ".join(map(str, xs)) + "}"
+    return f"""// generated by gen_len_table.py --ooc; key {key}
+module blk_{key} (
+    input  logic                    clk,
+    input  logic [{w - 1}:0]            src_i,
+    input  logic [$clog2({w})-1:0]   shamt_i,
+    output logic [{w - 1}:0]            dst_o
+);
+    uop_block_wrap #(
+        .LEN         ({p["len"]}),
+        .PIPE_STAGES ({p["stages"]}),
+        .FF_MASK     (32'h{p["ff_mask"] & 0xFFFFFFFF:08x}),
+        .OPS         ({arr("uop_pkg::" + op for op in p["ops"])}),
+        .IMM         ({arr(p["imm"])}),
+        .USE_IMM     ({arr(p["use_imm"])}),
+        .DATAFLOW    (1'b{int(p["dataflow"])}),
+        .SRC_A       ({arr(p["src_a"])}),
+        .SRC_B       ({arr(p["src_b"])}),
+        .W           ({w})
+    ) blk (
+        .clk    (clk),
+        .src_i  (src_i),
+        .shamt_i(shamt_i),
+        .dst_o  (dst_o)
+    );
+endmodule
+"""
+
+
+def write_ooc(blocks, cache: Path, rtl: Path = Path("rtl")) -> int:
+    """wrappers into the cache and OOC_TCL; returns the unique block count"""
+    digest = rtl_digest(rtl)
+    cache.mkdir(parents=True, exist_ok=True)
+    cells, keys = [], {}
+    for i, b in enumerate(blocks):
+        p = block_params(b)
+        key = block_key(p, digest)
+        if key not in keys:
+            keys[key] = p
+            (cache / f"blk_{key}.sv").write_text(ooc_wrapper(key, p), encoding="utf-8")
+        cells.append(f"    {{glen[{i}].blk_i}} {key}")
+    OOC_TCL.parent.mkdir(parents=True, exist_ok=True)
+    OOC_TCL.write_text(
+        "# ooc_blocks.tcl (generated by gen_len_table.py --ooc)\n"
+        f"set OOC_CACHE {{{cache.resolve().as_posix()}}}\n"
+        "set OOC_BLOCKS {\n" + "\n".join(cells) + "\n}\n",
+        encoding="utf-8",
+    )
+    return len(keys)
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        sys.exit("usage: gen_len_table.py <json|dir|->")
-    blocks = load_blocks(sys.argv[1])
+    ap = argparse.ArgumentParser()
+    ap.add_argument("src", help="augmented json / ndjson / ccpk, block directory, or -")
+    ap.add_argument("--ooc", nargs="?", type=Path, const=OOC_CACHE, metavar="CACHE",
+                    help="per-block OOC synthesis cache (default: .cache/ooc)")
+    args = ap.parse_args()
+    blocks = load_blocks(args.src)
     pkg = make_pkg(blocks)
+    no_rtl = [i for i, b in enumerate(blocks)
+              if any(u["opcode"].upper() in LatencyDB.NO_RTL for u in b["instructions"])]
+    if no_rtl:
+        print(f"warning: blocks {', '.join(map(str, no_rtl))} use ops microop_unit "
+              f"passes through ({'/'.join(sorted(LatencyDB.NO_RTL))}), so their results are not x86")
 
     out = Path("rtl/len_table_pkg.sv")
     out.parent.mkdir(exist_ok=True)
     out.write_text(pkg, encoding="utf-8", newline="\n")
     print(f"Done, {out}  (N_CASE={len(blocks)})")
+    if args.ooc:
+        n = write_ooc(blocks, args.ooc)
+        print(f"Done, {OOC_TCL}  ({n} unique blocks, cache {args.ooc})")
+    elif OOC_TCL.is_file():
+        # its keys describe an older table
+        OOC_TCL.unlink()
+        print(f"Done, removed stale {OOC_TCL}")
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+python tools/golden_model.py rtl/len_table_pkg.sv [-n 1000000] [--vectors tb/vectors.hex]
+python tools/golden_model.py rtl/len_table_pkg.sv --check tb/vectors.hex
+python tools/golden_model.py rtl/len_table_pkg.sv --fusion-check [-n 100000]
+
+Bit-accurate model of top_multi_len for the block set of a len_table_pkg:
+every slot computes what its microop_unit computes (DSP48E2 port widths
+and PCIN cascade, div_unit, fused op_t), uop_block / uop_dag route the
+operands and result is the XOR of all blocks, each zero-extended from
+its W_LUT.  Vectors go through NumPy in uint64 batches when it is
+installed, one at a time in plain Python otherwise (same numbers).
+
+--vectors writes "src shamt result" as hex words ($readmemh): hold each
+vector for the "// hold" clocks of the header, then compare result.
+--check recomputes such a file (e.g. from an older block set or a
+simulation dump) and lists the mismatches.
+--fusion-check runs every block with a --fuse compound op against the
+same block with the member ops in its slots; they must agree bit for bit.
+It also checks each block's LAT_LUT (the estimator's latency_cycles)
+against the clocks the RTL takes, less the wrapper input FF.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pipeline_staging_estimator import LatencyDB
+
+try:
+    import numpy as np
+except ImportError:  # plain Python, one vector at a time
+    np = None
+
+M48 = (1 << 48) - 1
+DSP_OPS = LatencyDB.DSP_OPS  # uop_pkg::is_dsp
+MEMBERS = {k: list(m) for k, (m, _) in {**LatencyDB.FUSED, **LatencyDB.DSP_FUSED}.items()}
+SHIFT_OPS = {"SHL", "SAL", "SHR", "SAR", "ROL", "ROR", "RCL", "RCR", "SHLD", "SHRD"}
+CHUNK = 1 << 20  # vectors per NumPy batch
+EDGE_SRC = (0, 1, 1 << 63, (1 << 64) - 1, 0x5555_5555_5555_5555, 0x7FFF_FFFF_FFFF_FFFF)
+EDGE_SHAMT = (0, 1, 31, 63)
+
+
+# ---------- len_table_pkg ------------------------------------------------
+SCALAR_RE = re.compile(r"localparam\s+int\s+(\w+)\s*=\s*(\d+)\s*;")
+TABLE_RE = re.compile(
+    r"localparam\s+[\w:]+(?:\s*\[[^\]]*\])?\s+(\w+)\s*(?:\[[^\]]*\]\s*)+=\s*'\{(.*?)\};", re.S
+)
+NUM_RE = re.compile(r"(\d*)'([hbd])([0-9a-fA-F_]+)")
+
+
+def _value(tok: str):
+    tok = tok.strip().strip("{}").strip()
+    m = NUM_RE.fullmatch(tok)
+    if m:
+        return int(m.group(3).replace("_", ""), {"h": 16, "b": 2, "d": 10}[m.group(2)])
+    if re.fullmatch(r"-?\d+", tok):
+        return int(tok)
+    return tok.split("::")[-1].removeprefix("OP_")
+
+
+def parse_pkg(text: str) -> Dict[str, object]:
+    """localparams of a gen_len_table package: ints, 1-D and 2-D tables"""
+    text = re.sub(r"/\*.*?\*/|//[^\n]*", "", text, flags=re.S)
+    t: Dict[str, object] = {k: int(v) for k, v in SCALAR_RE.findall(text)}
+    for name, body in TABLE_RE.findall(text):
+        rows = re.findall(r"'\{([^{}]*)\}", body)
+        if rows:
+            t[name] = [[_value(x) for x in r.split(",")] for r in rows]
+        else:
+            t[name] = [_value(x) for x in body.split(",")]
+    return t
+
+
+@dataclass
+class Block:
+    ops: List[str]
+    imm: List[int]  # IMM_LUT, 32-bit
+    use_imm: List[int]
+    ff_mask: int
+    w: int
+    dataflow: bool = False
+    src_a: Optional[List[int]] = None
+    src_b: Optional[List[int]] = None
+    est_latency: Optional[int] = None  # LAT_LUT: estimator latency_cycles
+
+    # ----- the uop_block / uop_dag parameter functions -----
+    def use_imm_at(self, k: int) -> bool:
+        return k < len(self.ops) and bool(self.use_imm[k])
+
+    def imm_at(self, k: int) -> int:
+        return _sext_int(self.imm[k], 32, self.w) if k < len(self.ops) else 0
+
+    def sh_imm_at(self, k: int) -> bool:
+        return self.use_imm_at(k) and self.ops[k] in SHIFT_OPS
+
+    def b_imm_at(self, k: int) -> bool:
+        return self.use_imm_at(k) and self.ops[k] not in SHIFT_OPS
+
+    def mul_csd_at(self, k: int) -> bool:
+        return (
+            self.b_imm_at(k) and self.ops[k] in {"MUL", "IMUL"}
+            and LatencyDB.csd_digits(self.imm_at(k), self.w) <= LatencyDB.CONST_MUL_MAX_DIGITS
+        )
+
+    def ff_at(self, k: int) -> bool:
+        return k < 32 and bool(self.ff_mask >> k & 1)
+
+    def casc_at(self, k: int) -> bool:
+        return (
+            not self.dataflow and k > 0 and self.ops[k] in {"ADD", "SUB"}
+            and self.ops[k - 1] in DSP_OPS and not self.mul_csd_at(k - 1)
+            and not self.ff_at(k - 1)
+        )
+
+    def unit_cyc(self, k: int) -> int:
+        op = self.ops[k]
+        if op in {"DIV", "IDIV"}:
+            return LatencyDB.div_stages(self.w)
+        if op not in DSP_OPS or self.mul_csd_at(k):
+            return 0
+        cyc = 4 if op == "DEC_IMUL" else 2 if op in {"ADD", "SUB"} else 3  # uop_pkg::dsp_cycles
+        return cyc - self.casc_at(k)  # PCIN: no input registers
+
+    def live_out(self, k: int) -> bool:
+        return not any(
+            self.src_a[j] == k or (self.src_b[j] == k and not self.b_imm_at(j))
+            for j in range(k + 1, len(self.ops))
+        )
+
+    def latency(self) -> int:
+        """clocks from src_val to result: wrapper in/out FFs + the core.
+
+        The estimator's latency_cycles leaves out the input FF: it is one
+        less."""
+        n = len(self.ops)
+        if not self.dataflow:
+            return 2 + sum(self.ff_at(k) + self.unit_cyc(k) for k in range(n))
+        out = [0] * n
+        for k in range(n):
+            c = out[self.src_a[k]] if self.src_a[k] >= 0 else 0
+            if not self.b_imm_at(k) and self.src_b[k] >= 0:
+                c = max(c, out[self.src_b[k]])
+            out[k] = c + self.unit_cyc(k) + self.ff_at(k)
+        return 2 + max((out[k] for k in range(n) if self.live_out(k)), default=0)
+
+
+def load_pkg(path: Path, width: int = LatencyDB.RTL_W) -> List[Block]:
+    """blocks of a len_table_pkg.sv; width = top_multi_len W"""
+    t = parse_pkg(path.read_text())
+    blocks = []
+    for i in range(t["N_CASE"]):
+        n = t["LEN_LUT"][i]
+        dag = bool(t.get("DATAFLOW_LUT", [0] * t["N_CASE"])[i])
+        blocks.append(
+            Block(
+                ops=["SHL" if op == "SAL" else op for op in t["OPS_LUT"][i][:n]],
+                imm=t["IMM_LUT"][i][:n],
+                use_imm=t["USE_IMM_LUT"][i][:n],
+                ff_mask=t["FF_MASK_LUT"][i],
+                w=min(t.get("W_LUT", [width] * t["N_CASE"])[i], width),
+                dataflow=dag,
+                src_a=t["SRC_A_LUT"][i][:n] if dag else [k - 1 for k in range(n)],
+                src_b=t["SRC_B_LUT"][i][:n] if dag else [k - 1 for k in range(n)],
+                est_latency=t["LAT_LUT"][i] if "LAT_LUT" in t else None,
+            )
+        )
+    return blocks
+
+
+def unfuse(blk: Block) -> Block:
+    """blk with each compound op back as its member ops in its slots"""
+    ops = list(blk.ops)
+    for k, op in enumerate(blk.ops):
+        if op in MEMBERS:
+            ops[k : k + len(MEMBERS[op])] = MEMBERS[op]
+    return replace(blk, ops=ops)
+
+
+def _sext_int(x: int, frm: int, to: int) -> int:
+    x &= (1 << frm) - 1
+    if x >> (frm - 1) and to > frm:
+        x |= ((1 << to) - 1) ^ ((1 << frm) - 1)
+    return x & ((1 << to) - 1)
+
+
+# ---------- evaluation -----------------------------------------------------
+class Model:
+    """microop_unit / uop_block / uop_dag / top_multi_len on unsigned values;
+    numpy=True: every value is a uint64 array, else a Python int"""
+
+    def __init__(self, blocks: List[Block], numpy: bool = False):
+        self.blocks = blocks
+        self.np = numpy
+
+    def where(self, c, x, y):
+        if self.np:
+            return np.where(c, x, y).astype(np.uint64, copy=False)
+        return x if c else y
+
+    def sext(self, x, frm: int, to: int):
+        """frm-bit x sign-extended (or truncated) to `to` bits: W'($signed(x))"""
+        mf, mt = (1 << frm) - 1, (1 << to) - 1
+        x = x & mf
+        if to <= frm:
+            return x & mt
+        return self.where(x >> (frm - 1) & 1, x | (mt ^ mf), x)
+
+    def shl(self, x, s, w: int):  # x << s in a w-bit context, 0 from s >= w
+        return self.where(s >= w, 0, x << self.where(s >= w, 0, s) & ((1 << w) - 1))
+
+    def shr(self, x, s, w: int):
+        return self.where(s >= w, 0, x >> self.where(s >= w, 0, s))
+
+    def sar(self, x, s, w: int):
+        m = (1 << w) - 1
+        return (x >> s) | self.where(x >> (w - 1) & 1, m ^ (m >> s), 0)
+
+    def unit(self, blk: Block, k: int, a, b, sh, pcin):
+        """(y, pcout) of slot k; pcin is used by casc_at slots only"""
+        op, w = blk.ops[k], blk.w
+        m = (1 << w) - 1
+        c, d = blk.imm_at(k + 1), blk.imm_at(k + 2)
+        c_imm, d_imm = blk.use_imm_at(k + 1), blk.use_imm_at(k + 2)
+        if op in {"MUL", "IMUL", "MUL_ADD", "IMUL_ADD"} and not blk.mul_csd_at(k):
+            # A = a[17:0] zero-extended (the port ?: is unsigned), B = b[17:0]
+            # signed: the DSP multiplies signed 27x18 whatever SIGNED says
+            p = (a & 0x3FFFF) * self.sext(b, 18, 48)
+            if op in {"MUL_ADD", "IMUL_ADD"} and c_imm:
+                p = p + (c & M48)
+            p = p & M48
+            if op in {"MUL_ADD", "IMUL_ADD"} and not c_imm:
+                return self.sext(p << 1, 48, w), p
+            return self.sext(p, 48, w), p
+        if op == "DEC_IMUL":  # AD = D - A = a - 1 (27 bit), B = c or a - 1
+            ad = self.sext((self.sext(a, w, 27) - 1) & ((1 << 27) - 1), 27, 48)
+            bb = self.sext(c if c_imm else (a - 1) & m, w, 18)
+            p = ad * self.sext(bb, 18, 48) & M48
+            return self.sext(p, 48, w), p
+        if op in {"ADD", "SUB"}:  # Z = C = a (PCIN when cascaded), X = A:B = b
+            z = pcin if blk.casc_at(k) else a & M48
+            p = (z - (b & M48) if op == "SUB" else z + (b & M48)) & M48
+            return self.sext(p, 48, w), p
+        return self.lut(op, w, blk, k, a, b, c, d, c_imm, d_imm, sh), 0
+
+    def lut(self, op, w, blk, k, a, b, c, d, c_imm, d_imm, sh):
+        m = (1 << w) - 1
+        csh = c & (w - 1) if c_imm else sh
+        if op in {"DIV", "IDIV"}:  # div_unit: magnitudes, truncating, '0 on b == 0
+            sa = a >> (w - 1) & 1 if op == "IDIV" else 0
+            sb = b >> (w - 1) & 1 if op == "IDIV" else 0
+            ua = self.where(sa, (~a + 1) & m, a)
+            ub = self.where(sb, (~b + 1) & m, b)
+            q = ua // self.where(ub == 0, 1, ub)
+            q = self.where((sa ^ sb) & 1, (~q + 1) & m, q)
+            return self.where(ub == 0, 0, q)
+        if op in {"MUL", "IMUL"}:  # MUL_CSD: x * B_CONST mod 2^W
+            return a * blk.imm_at(k) & m
+        if op == "ADC":
+            return (a + b + 1) & m
+        if op == "INC":
+            return (a + 1) & m
+        if op == "DEC":
+            return (a - 1) & m
+        if op == "NEG":
+            return (~a + 1) & m
+        if op == "CMP":
+            return (a - b) & m
+        if op in {"AND", "TEST"}:
+            return a & b
+        if op == "OR":
+            return a | b
+        if op == "XOR":
+            return a ^ b
+        if op == "NOT":
+            return ~a & m
+        if op == "SHL":
+            return self.shl(a, sh, w)
+        if op == "SHR":
+            return a >> sh
+        if op == "SAR":
+            return self.sar(a, sh, w)
+        if op == "ROL":
+            return self.shl(a, sh, w) | self.shr(a, w - sh, w)
+        if op == "ROR":
+            return (a >> sh) | self.shl(a, w - sh, w)
+        if op == "RCL":  # lshift() takes W bits: b[0] falls off
+            return self.shl(a, sh, w)
+        if op == "RCR":  # rshift({a, b[0]}) keeps the low W bits
+            return ((a << 1 | b & 1) & m) >> sh
+        if op == "SHLD":
+            return self.shl(b, w - sh, w) | self.shl(a, sh, w)
+        if op == "SHRD":
+            return self.shr(b, w - sh, w) | (a >> sh)
+        if op == "AND_AND":
+            return a & b & (c if c_imm else m)
+        if op == "ADD_ADD":
+            return (a + b + c) & m if c_imm else (a + b) << 1 & m
+        if op == "ADD3":
+            if c_imm and d_imm:
+                return (a + b + (c + d)) & m
+            t = (a + b) & m
+            t = (t + c) & m if c_imm else t << 1 & m
+            return (t + d) & m if d_imm else t << 1 & m
+        if op == "INC_SHL":
+            return self.shl((a + 1) & m, csh, w)
+        if op == "NOT_ADD":
+            return (c - a - 1) & m if c_imm else ~a << 1 & m
+        if op == "SUB_SAR":
+            return self.sar((a - b) & m, csh, w)
+        return a  # NOP and the ops microop_unit passes through (SBB)
+
+    def block(self, blk: Block, src, shamt):
+        w = blk.w
+        src, shamt = src & ((1 << w) - 1), shamt & (w - 1)
+        y: list = []
+        pc = 0
+        for k in range(len(blk.ops)):
+            a = y[blk.src_a[k]] if blk.src_a[k] >= 0 else src
+            b = y[blk.src_b[k]] if blk.src_b[k] >= 0 else src
+            if blk.b_imm_at(k):
+                b = blk.imm_at(k)
+            sh = blk.imm[k] & (w - 1) if blk.sh_imm_at(k) else shamt
+            out, pc = self.unit(blk, k, a, b, sh, pc)
+            y.append(out)
+        if not blk.dataflow:
+            return y[-1]
+        dst = 0
+        for k in range(len(y)):
+            if blk.live_out(k):
+                dst = dst ^ y[k]
+        return dst
+
+    def result(self, src, shamt):
+        r = 0
+        for blk in self.blocks:
+            r = r ^ self.block(blk, src, shamt)
+        return r
+
+    def run(self, src: List[int], shamt: List[int]) -> List[int]:
+        if not self.np:
+            return [self.result(s, h) for s, h in zip(src, shamt)]
+        out: List[int] = []
+        for i in range(0, len(src), CHUNK):
+            s = np.array(src[i : i + CHUNK], dtype=np.uint64)
+            h = np.array(shamt[i : i + CHUNK], dtype=np.uint64)
+            out += self.result(s, h).tolist()
+        return out
+
+
+# ---------- vectors ---------------------------------------------------------
+def make_vectors(n: int, seed: int, width: int):
+    """corner values first, then uniform random (same for both backends)"""
+    edges = [(s & ((1 << width) - 1), h & (width - 1)) for s in EDGE_SRC for h in EDGE_SHAMT]
+    rng = random.Random(seed)
+    sb = (width - 1).bit_length()
+    vec = edges[:n] + [(rng.getrandbits(width), rng.getrandbits(sb)) for _ in range(n - len(edges))]
+    return [v[0] for v in vec], [v[1] for v in vec]
+
+
+def write_vectors(path: Path, src, shamt, res, hold: int, width: int) -> None:
+    hw = width // 4
+    with path.open("w") as f:
+        f.write(f"// hold {hold}\n// src shamt result, W = {width}\n")
+        for i in range(0, len(src), CHUNK):
+            f.write("".join(
+                f"{s:0{hw}x} {h:02x} {r:0{hw}x}\n"
+                for s, h, r in zip(src[i : i + CHUNK], shamt[i : i + CHUNK], res[i : i + CHUNK])
+            ))
+
+
+def read_vectors(path: Path):
+    src, shamt, res = [], [], []
+    for line in path.read_text().splitlines():
+        f = line.split("//")[0].split()
+        if len(f) == 3:
+            src.append(int(f[0], 16))
+            shamt.append(int(f[1], 16))
+            res.append(int(f[2], 16))
+    return src, shamt, res
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("pkg", type=Path, help="len_table_pkg.sv (gen_len_table.py)")
+    ap.add_argument("-n", type=int, default=1_000_000, help="random vectors")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--width", type=int, default=LatencyDB.RTL_W, help="top_multi_len W")
+    ap.add_argument("--vectors", type=Path, help="write src / shamt / result (hex)")
+    ap.add_argument("--check", type=Path, help="recompute a vector file, list mismatches")
+    ap.add_argument("--fusion-check", action="store_true",
+                    help="compare fused blocks with their unfused ops")
+    ap.add_argument("--no-numpy", action="store_true", help="plain Python evaluation")
+    args = ap.parse_args()
+
+    blocks = load_pkg(args.pkg, args.width)
+    model = Model(blocks, numpy=np is not None and not args.no_numpy)
+    backend = "numpy" if model.np else "python"
+    if args.check:
+        src, shamt, want = read_vectors(args.check)
+    else:
+        src, shamt = make_vectors(args.n, args.seed, args.width)
+    t0 = time.perf_counter()
+    res = model.run(src, shamt)
+    dt = time.perf_counter() - t0
+    rate = len(src) / dt / 1e6 if dt else float("inf")
+    print(f"{len(blocks)} blocks, {len(src)} vectors in {dt:.2f} s ({rate:.2f} M/s, {backend})")
+
+    if args.check:
+        bad = [i for i, (r, x) in enumerate(zip(res, want)) if r != x]
+        for i in bad[:10]:
+            print(f"  mismatch #{i}: src={src[i]:x} shamt={shamt[i]} "
+                  f"model={res[i]:x} file={want[i]:x}")
+        if bad:
+            sys.exit(f"{len(bad)} of {len(src)} vectors differ")
+        print(f"Done, {len(src)} vectors match {args.check}")
+    if args.fusion_check:
+        fused = [(i, b) for i, b in enumerate(blocks) if unfuse(b).ops != b.ops]
+        bad = 0
+        for i, blk in fused:
+            plain = Model([unfuse(blk)], model.np).run(src, shamt)
+            n = sum(r != x for r, x in zip(Model([blk], model.np).run(src, shamt), plain))
+            if n:
+                bad += 1
+                print(f"  block {i} {'-'.join(blk.ops)} (W {blk.w}): {n} vectors differ unfused")
+        late = [(i, b) for i, b in enumerate(blocks)
+                if b.est_latency is not None and b.latency() - 1 != b.est_latency]
+        for i, blk in late:
+            print(f"  block {i} {'-'.join(blk.ops)}: latency_cycles {blk.est_latency}, "
+                  f"RTL {blk.latency() - 1} (+ input FF)")
+        if bad or late:
+            sys.exit(f"{bad} of {len(fused)} fused blocks differ from their unfused ops, "
+                     f"{len(late)} latencies differ from the RTL")
+        print(f"Done, {len(fused)} fused blocks match their unfused ops, "
+              f"{sum(b.est_latency is not None for b in blocks)} latencies match the RTL")
+    if args.vectors:
+        hold = max(b.latency() for b in blocks) + 1
+        args.vectors.parent.mkdir(parents=True, exist_ok=True)
+        write_vectors(args.vectors, src, shamt, res, hold, args.width)
+        print(f"Done, {args.vectors}  (hold {hold} clocks)")
+
+
+if __name__ == "__main__":
+    main()
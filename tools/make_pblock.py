@@ -32,8 +32,8 @@ PBLOCK_ID = "pblock_1"  # single pblock name used everywhere
 
 
 # -----------------------------------------------------------------------
-def build(rows: int, cols: int) -> None:
-    """emit auto_pblock.tcl for the requested rows × cols rectangle"""
+def rects(rows: int, cols: int) -> dict:
+    """Slice / DSP site rectangles and site counts for rows × cols"""
 
     # ---- Slice rectangle ------------------------------------------------
     x_lo, x_hi = SLICE_COLS[cols - 1], SLICE_COLS[0]
@@ -51,6 +51,25 @@ def build(rows: int, cols: int) -> None:
     dsp_rect = f"DSP48E2_X{dx_lo}Y{y_d_lo}:DSP48E2_X{dx_hi}Y{Y_D_HI}"
     dsp_cnt = dsp_rows * len(dsp_cols)
 
+    return {
+        "slice_rect": slice_rect,
+        "dsp_rect": dsp_rect,
+        "slices": rows * cols,
+        "dsps": dsp_cnt,
+    }
+
+
+def capacity(rows: int, cols: int) -> tuple:
+    """(slices, dsps) available to the custom blocks in rows × cols"""
+    r = rects(rows, cols)
+    return r["slices"], r["dsps"]
+
+
+def build(rows: int, cols: int) -> None:
+    """emit auto_pblock.tcl for the requested rows × cols rectangle"""
+    r = rects(rows, cols)
+    slice_rect, dsp_rect = r["slice_rect"], r["dsp_rect"]
+
     # ---- TCL output -----------------------------------------------------
     auto_tcl = textwrap.dedent(
         f"""\
@@ -75,10 +94,9 @@ def build(rows: int, cols: int) -> None:
     out.write_text(auto_tcl, "utf-8")
 
     # ---- console summary ------------------------------------------------
-    slice_cnt = rows * cols
     print("Done, auto_pblock.tcl written")
-    print(f"  Slice rect : {slice_rect}  (Slices {slice_cnt})")
-    print(f"  DSP   rect : {dsp_rect}    (DSPs  {dsp_cnt})")
+    print(f"  Slice rect : {slice_rect}  (Slices {r['slices']})")
+    print(f"  DSP   rect : {dsp_rect}    (DSPs  {r['dsps']})")
 
 
 # -----------------------------------------------------------------------
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+python tools/orchestrate_builds.py sweep.json [--max-cores 32 --max-mem-gb 96] [--threads 8 --mem-gb 12]
+python tools/orchestrate_builds.py sweep.json --vivado "python3 tools/fake_vivado.py --seconds 5"
+
+Run many build configurations at once.  run_vivado.tcl works on fixed
+paths under the current directory, so every configuration gets its own
+copy of rtl/, constraints/, tools/ and run_vivado.tcl in <work>/<tag>/ and
+the whole flow runs there:
+
+  pipeline_staging_estimator (input) -> gen_len_table (input / blocks)
+  -> make_pblock (rows, cols) -> vivado -> collect_results <tag>
+
+A build starts once its --threads cores and --mem-gb GB fit in what the
+running builds leave of --max-cores / --max-mem-gb (Vivado gets the thread
+count as VIVADO_MAX_THREADS).  Each finished run's impl_summary rows are
+appended to --all-runs as it completes; build.log in the work dir has every
+step's output.  A work dir with an impl_summary is skipped unless --force.
+With --ooc all runs share one per-block synthesis cache (gen_len_table.py
+--ooc), so a sweep synthesises each distinct block once.
+
+sweep.json is a list of runs:
+
+  [{"tag": "r60c8-c2", "input": "examples/alu_only_2.json",
+    "estimator": "--max-comb 2 --fuse", "rows": 60, "cols": 8},
+   {"tag": "set-a", "blocks": "examples/selected_blocks_result_augmented.json",
+    "rows": 120, "cols": 8, "threads": 4, "mem_gb": 8}]
+
+input is estimated in the work dir (estimator args as a string or list);
+blocks is an augmented file or split_block directory used as is; neither
+keeps the tree's rtl/len_table_pkg.sv and examples/.  Paths are relative to
+the repository root.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Optional
+
+from collect_results import append_all_runs
+
+ROOT = Path(__file__).resolve().parents[1]
+COPY = ("rtl", "constraints", "tools", "run_vivado.tcl")
+KEYS = {"tag", "input", "estimator", "blocks", "rows", "cols", "threads", "mem_gb"}
+TAG_RE = re.compile(r"^[A-Za-z0-9_.+-]+$")
+
+
+def mem_total_gb() -> Optional[float]:
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) / 2**20
+    except OSError:
+        pass
+    return None
+
+
+def load_configs(path: Path) -> List[dict]:
+    runs = json.loads(path.read_text())
+    if not isinstance(runs, list):
+        sys.exit(f"{path}: expected a list of runs")
+    tags = set()
+    for r in runs:
+        bad = set(r) - KEYS
+        if bad:
+            sys.exit(f"{path}: unknown keys {sorted(bad)} in run {r.get('tag')}")
+        tag = str(r.get("tag", ""))
+        if not TAG_RE.match(tag) or tag in tags:
+            sys.exit(f"{path}: missing, duplicate or unsafe tag {tag!r}")
+        if r.get("input") and r.get("blocks"):
+            sys.exit(f"{path}: run {tag} gives both input and blocks")
+        if ("rows" in r) != ("cols" in r):
+            sys.exit(f"{path}: run {tag} needs both rows and cols")
+        tags.add(tag)
+    return runs
+
+
+class Budget:
+    """cores / GB shared by the builds in flight"""
+
+    def __init__(self, cores: int, mem_gb: float):
+        self.total = (cores, mem_gb)
+        self.cores, self.mem = cores, mem_gb
+        self.cv = threading.Condition()
+
+    def clamp(self, cores: int, mem_gb: float) -> tuple:
+        # a run larger than the whole budget runs alone
+        return min(cores, self.total[0]), min(mem_gb, self.total[1])
+
+    def acquire(self, cores: int, mem_gb: float) -> None:
+        with self.cv:
+            self.cv.wait_for(lambda: self.cores >= cores and self.mem >= mem_gb)
+            self.cores -= cores
+            self.mem -= mem_gb
+
+    def release(self, cores: int, mem_gb: float) -> None:
+        with self.cv:
+            self.cores += cores
+            self.mem += mem_gb
+            self.cv.notify_all()
+
+
+class Orchestrator:
+    def __init__(self, args):
+        self.args = args
+        self.vivado = shlex.split(args.vivado)
+        self.budget = Budget(args.max_cores, args.max_mem_gb)
+        self.procs: set = set()
+        self.lock = threading.Lock()
+        self.stopping = False
+
+    # ---- one run -----------------------------------------------------
+    def prepare(self, run: dict, work: Path) -> None:
+        if work.exists():
+            shutil.rmtree(work)
+        work.mkdir(parents=True)
+        for name in COPY:
+            src = ROOT / name
+            if src.is_dir():
+                shutil.copytree(src, work / name, ignore=shutil.ignore_patterns("__pycache__"))
+            else:
+                shutil.copy2(src, work / name)
+        ex = work / "examples"
+        blocks = run.get("blocks")
+        if blocks:
+            src = ROOT / blocks
+            if src.is_dir():
+                shutil.copytree(src, ex / "blocks")
+            else:
+                ex.mkdir()
+                shutil.copy2(src, ex / f"selected_blocks_result_augmented{src.suffix}")
+        elif not run.get("input") and (ROOT / "examples").is_dir():
+            shutil.copytree(ROOT / "examples", ex)
+        (work / "reports").mkdir(exist_ok=True)
+
+    def steps(self, run: dict, work: Path) -> List[tuple]:
+        py = sys.executable
+        out = []
+        aug = None
+        if run.get("input"):
+            est = run.get("estimator") or []
+            est = shlex.split(est) if isinstance(est, str) else [str(a) for a in est]
+            out.append(("estimator", [py, "tools/pipeline_staging_estimator.py", str(ROOT / run["input"]),
+                                      "-o", "examples/selected_blocks_result", "--emit-tcl", *est]))
+            aug = "examples/selected_blocks_result_augmented.json"
+        elif run.get("blocks"):
+            src = ROOT / run["blocks"]
+            aug = ("examples/blocks" if src.is_dir()
+                   else f"examples/selected_blocks_result_augmented{src.suffix}")
+        if aug:
+            ooc = ["--ooc", str(self.args.ooc)] if self.args.ooc else []
+            out.append(("gen_len_table", [py, "tools/gen_len_table.py", aug, *ooc]))
+        if "rows" in run:
+            out.append(("make_pblock", [py, "tools/make_pblock.py", str(run["rows"]), str(run["cols"])]))
+        out.append(("vivado", [*self.vivado, "-mode", "batch", "-source", "run_vivado.tcl",
+                               "-log", "vivado.log", "-nojournal"]))
+        out.append(("collect_results", [py, "tools/collect_results.py", run["tag"]]))
+        return out
+
+    def call(self, cmd: List[str], work: Path, log, env: dict) -> int:
+        with self.lock:
+            if self.stopping:
+                return -1
+            p = subprocess.Popen(cmd, cwd=work, stdout=log, stderr=subprocess.STDOUT, env=env)
+            self.procs.add(p)
+        try:
+            return p.wait()
+        finally:
+            with self.lock:
+                self.procs.discard(p)
+
+    def build(self, run: dict) -> dict:
+        tag = run["tag"]
+        work = self.args.work / tag
+        cores, mem = self.budget.clamp(int(run.get("threads", self.args.threads)),
+                                       float(run.get("mem_gb", self.args.mem_gb)))
+        self.budget.acquire(cores, mem)
+        t0 = time.perf_counter()
+        res = {"tag": tag, "work": work, "ok": False, "step": None}
+        try:
+            if self.stopping:
+                res["step"] = "interrupted"
+                return res
+            self.prepare(run, work)
+            env = dict(os.environ, VIVADO_MAX_THREADS=str(cores), PYTHONDONTWRITEBYTECODE="1")
+            with (work / "build.log").open("w") as log:
+                for step, cmd in self.steps(run, work):
+                    log.write(f"==== {step}: {shlex.join(cmd)}\n")
+                    log.flush()
+                    rc = self.call(cmd, work, log, env)
+                    if rc:
+                        res["step"] = f"{step} (exit {rc})"
+                        break
+                else:
+                    res["ok"] = True
+        except OSError as e:
+            res["step"] = f"setup: {e}"
+        finally:
+            self.budget.release(cores, mem)
+        res["seconds"] = time.perf_counter() - t0
+        return res
+
+    def stop(self) -> None:
+        with self.lock:
+            self.stopping = True
+            for p in self.procs:
+                p.terminate()
+
+
+def summary_rows(work: Path, tag: str) -> List[dict]:
+    p = work / "reports" / f"impl_summary_{tag}.csv"
+    if not p.is_file():
+        return []
+    with p.open(newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def main() -> None:
+    mem = mem_total_gb()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("configs", type=Path, help="JSON list of runs (see module docstring)")
+    ap.add_argument("--work", type=Path, default=ROOT / "builds", help="work dirs <work>/<tag>/")
+    ap.add_argument("--all-runs", type=Path, help="shared CSV (default: <work>/all_runs.csv)")
+    ap.add_argument("--vivado", default="vivado", help="Vivado command (or fake_vivado.py)")
+    ap.add_argument("--max-cores", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--max-mem-gb", type=float, default=round(0.9 * mem, 1) if mem else float("inf"))
+    ap.add_argument("--threads", type=int, default=8, help="cores per build (VIVADO_MAX_THREADS)")
+    ap.add_argument("--mem-gb", type=float, default=12.0, help="peak GB per build")
+    ap.add_argument("--force", action="store_true", help="rebuild runs that already have results")
+    ap.add_argument("--ooc", nargs="?", type=Path, const=ROOT / ".cache" / "ooc", metavar="CACHE",
+                    help="per-block OOC synthesis, cache shared by all runs (default: .cache/ooc)")
+    args = ap.parse_args()
+    if args.ooc:
+        args.ooc = args.ooc.resolve()
+
+    runs = load_configs(args.configs)
+    args.work = args.work.resolve()
+    master = args.all_runs or args.work / "all_runs.csv"
+    todo = []
+    for r in runs:
+        if not args.force and summary_rows(args.work / r["tag"], r["tag"]):
+            print(f"  {r['tag']:<24} skipped (results in {args.work / r['tag']})")
+        else:
+            todo.append(r)
+    if not todo:
+        print("Done, nothing to build")
+        return
+
+    orch = Orchestrator(args)
+    slots = min(len(todo), max(1, args.max_cores // max(1, args.threads)))
+    if args.max_mem_gb != float("inf"):
+        slots = min(slots, max(1, int(args.max_mem_gb // max(args.mem_gb, 1e-9))))
+    print(f"{len(todo)} builds, up to {slots} at once "
+          f"({args.max_cores} cores, {args.max_mem_gb:g} GB; {args.threads} threads, "
+          f"{args.mem_gb:g} GB each)")
+    t0 = time.perf_counter()
+    failed = 0
+    # one thread per run: they only wait on the budget and their subprocesses
+    with ThreadPoolExecutor(len(todo)) as ex:
+        futs = [ex.submit(orch.build, r) for r in todo]
+        try:
+            for fut in as_completed(futs):
+                res = fut.result()
+                rows = summary_rows(res["work"], res["tag"]) if res["ok"] else []
+                if rows:
+                    append_all_runs(master, rows)
+                    fmax = min((float(r["fmax_mhz"]) for r in rows if r["fmax_mhz"]), default=None)
+                    print(f"  {res['tag']:<24} ok   {res['seconds']:7.0f} s  "
+                          + (f"Fmax {fmax:.1f} MHz" if fmax else "no Fmax"))
+                else:
+                    failed += 1
+                    why = res["step"] or "no impl_summary written"
+                    print(f"  {res['tag']:<24} FAILED at {why}, see {res['work'] / 'build.log'}")
+        except KeyboardInterrupt:
+            orch.stop()
+            sys.exit("interrupted, running builds terminated")
+    print(f"Done, {len(todo) - failed}/{len(todo)} builds in "
+          f"{time.perf_counter() - t0:.0f} s, rows appended to {master}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+python3 tools/pc_table.py reports/sniper_<tag>.csv [-o reports/sniper_<tag>.ccpc]
+python3 tools/pc_table.py reports/sniper_<tag>.ccpc --check reports/sniper_<tag>.csv
+python3 tools/pc_table.py reports/sniper_<tag>.ccpc --lookup 500.perlbench_r 0x621bfa94a098 [--src S]
+
+Binary PC -> latency table for the simulator: one fixed-width record per
+(bench, src, pc) row of sniper_<tag>.csv, sorted by (bench, pc, src), so a
+reader mmaps the file and binary-searches it instead of parsing the CSV.
+Regions of one bench may share a PC; lookup() returns the first src unless
+given one.  collect_results.py writes a table next to the CSV; from a CSV
+alone, block ids are re-derived (a block starts at each row with a
+non-zero latency).  --check is the round trip against every CSV row.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import mmap
+import struct
+import sys
+from bisect import bisect_left
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# layout
+#
+#   header   <4sHHQQQ   magic, version, record size, n_rec, n_str, blob size
+#   records  n_rec x <QIIIHH   pc, bench_sid, src_sid, block, latency, ii
+#                              sorted by (bench_sid, pc, src_sid); sids follow name order
+#   stroff   (n_str+1) x u64   byte offsets into blob
+#   blob     utf-8 bench / src names, sid 0 is ""
+#
+# latency sits on the first PC of a block (0 on the others, as in the CSV);
+# ii is the initiation interval in fabric clocks.  Sections are 8-byte
+# aligned; all fields little-endian.
+MAGIC = b"CCPC"
+VERSION = 2
+HDR = struct.Struct("<4sHHQQQ")
+REC = struct.Struct("<QIIIHH")
+SUFFIX = ".ccpc"
+
+
+def _pad8(n: int) -> int:
+    return -n % 8
+
+
+def _pc(v) -> int:
+    return v if isinstance(v, int) else int(v, 0)
+
+
+def unique_rows(rows: Iterable[dict]) -> List[dict]:
+    """first row of every (bench, src, pc), as collect_results dedups"""
+    seen, out = set(), []
+    for r in rows:
+        key = (r["bench"], r["src"], _pc(r["pc"]))
+        if key not in seen:
+            seen.add(key)
+            out.append(r)
+    return out
+
+
+def write_table(path: Path, rows: Iterable[dict]) -> int:
+    """rows: bench, src, pc, latency, block, ii (ii defaults to 1)"""
+    rows = unique_rows(rows)
+    names = sorted({""} | {r["bench"] for r in rows} | {r["src"] for r in rows})
+    sid = {s: k for k, s in enumerate(names)}
+    recs = sorted(
+        ((_pc(r["pc"]), sid[r["bench"]], sid[r["src"]], int(r.get("block", 0)),
+          int(r["latency"]), int(r.get("ii", 1))) for r in rows),
+        key=lambda t: (t[1], t[0], t[2]),
+    )
+    enc = [s.encode("utf-8") for s in names]
+    stroff = struct.pack(f"<{len(enc) + 1}Q", 0, *accumulate(map(len, enc)))
+    blob = b"".join(enc)
+    body = b"".join(REC.pack(*t) for t in recs)
+    with Path(path).open("wb") as f:
+        f.write(HDR.pack(MAGIC, VERSION, REC.size, len(recs), len(enc), len(blob)))
+        for b in (body, stroff):
+            f.write(b)
+            f.write(b"\0" * _pad8(len(b)))
+        f.write(blob)
+    return len(recs)
+
+
+class PcTable:
+    """mmap view of a .ccpc file; lookup() is a binary search"""
+
+    def __init__(self, path: Path):
+        self._f = Path(path).open("rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, ver, size, n, ns, _ = HDR.unpack_from(self._mm, 0)
+        if magic != MAGIC or ver != VERSION or size != REC.size:
+            raise ValueError(f"{path}: not a PC table (v{VERSION})")
+        self.n = n
+        self._rec = HDR.size
+        off = self._rec + n * size + _pad8(n * size)
+        soff = struct.unpack_from(f"<{ns + 1}Q", self._mm, off)
+        blob = off + 8 * (ns + 1) + _pad8(8 * (ns + 1))
+        self.names = [str(self._mm[blob + a:blob + b], "utf-8") for a, b in zip(soff, soff[1:])]
+        self._sid: Dict[str, int] = {s: k for k, s in enumerate(self.names)}
+
+    def _key(self, i: int) -> tuple:
+        pc, bench = struct.unpack_from("<QI", self._mm, self._rec + i * REC.size)
+        return bench, pc
+
+    def _row(self, i: int) -> dict:
+        pc, bench, src, block, lat, ii = REC.unpack_from(self._mm, self._rec + i * REC.size)
+        return {"bench": self.names[bench], "src": self.names[src], "pc": pc,
+                "block": block, "latency": lat, "ii": ii}
+
+    def lookup(self, bench: str, pc, src: Optional[str] = None) -> Optional[dict]:
+        """record of (bench, pc), of region src if given, else the first"""
+        sid = self._sid.get(bench)
+        if sid is None:
+            return None
+        key = (sid, _pc(pc))
+        i = bisect_left(range(self.n), key, key=self._key)
+        for i in range(i, self.n):
+            if self._key(i) != key:
+                break
+            r = self._row(i)
+            if src is None or r["src"] == src:
+                return r
+        return None
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __iter__(self) -> Iterator[dict]:
+        return (self._row(i) for i in range(self.n))
+
+    def close(self) -> None:
+        self._mm.close()
+        self._f.close()
+
+    def __enter__(self) -> "PcTable":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def rows_from_csv(path: Path) -> List[dict]:
+    """sniper_<tag>.csv rows with block ids re-derived"""
+    rows, block = [], -1
+    with Path(path).open(newline="") as f:
+        for r in csv.DictReader(f):
+            if r["latency"] != "0" or not rows or (r["bench"], r["src"]) != (
+                rows[-1]["bench"], rows[-1]["src"]
+            ):
+                block += 1
+            rows.append(dict(r, block=block))
+    return rows
+
+
+def check(table: Path, csv_path: Path) -> List[str]:
+    """differences between a table and the CSV it should encode, row by row"""
+    rows = rows_from_csv(csv_path)
+    errs = []
+    with PcTable(table) as t:
+        n = len(unique_rows(rows))
+        if len(t) != n:
+            errs.append(f"{len(t)} records, CSV has {n} distinct (bench, src, pc)")
+        for r in rows:
+            got = t.lookup(r["bench"], r["pc"], r["src"])
+            if got is None:
+                errs.append(f"{r['bench']} {r['src']} {r['pc']}: missing")
+            elif got["latency"] != int(r["latency"]):
+                errs.append(f"{r['bench']} {r['src']} {r['pc']}: latency "
+                            f"{got['latency']}, CSV {r['latency']}")
+    return errs
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("src", type=Path, help="sniper_<tag>.csv to convert, or a .ccpc table")
+    ap.add_argument("-o", "--out", type=Path, help="table path (default: CSV name, .ccpc)")
+    ap.add_argument("--check", type=Path, help="compare a table with this CSV")
+    ap.add_argument("--lookup", nargs=2, metavar=("BENCH", "PC"))
+    ap.add_argument("--src", dest="lookup_src", help="--lookup: region of the bench (default: first)")
+    args = ap.parse_args()
+
+    if args.src.suffix.lower() != SUFFIX:
+        out = args.out or args.src.with_suffix(SUFFIX)
+        n = write_table(out, rows_from_csv(args.src))
+        print(f"Done, {n} records -> {out}")
+        args.src, args.check = out, args.check or args.src
+    if args.lookup:
+        with PcTable(args.src) as t:
+            print(t.lookup(*args.lookup, args.lookup_src) or "not found")
+    if args.check:
+        errs = check(args.src, args.check)
+        for e in errs[:20]:
+            print("  " + e)
+        if errs:
+            sys.exit(f"{len(errs)} differences between {args.src} and {args.check}")
+        print(f"Done, {args.src} matches {args.check}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,34 @@ python tools/pipeline_staging_estimator.py examples/alu_only.json -o examples/re
 """
 
 from __future__ import annotations
-import argparse, csv, json, re, sys
+import argparse, contextlib, csv, hashlib, heapq, io, json, os, re, sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 from collections import deque
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from statistics import pstdev
 
+import flow_io
+
+
+def _regs() -> Dict[str, Tuple[str, int]]:
+    """x86-64 register name -> (full register it aliases, width in bits)"""
+    w: Dict[str, Tuple[str, int]] = {"rip": ("rip", 64), "eip": ("rip", 32), "ip": ("rip", 16)}
+    for r in "abcd":
+        q = f"r{r}x"
+        w.update({q: (q, 64), f"e{r}x": (q, 32), f"{r}x": (q, 16), f"{r}l": (q, 8), f"{r}h": (q, 8)})
+    for r in ("si", "di", "bp", "sp"):
+        q = f"r{r}"
+        w.update({q: (q, 64), f"e{r}": (q, 32), r: (q, 16), f"{r}l": (q, 8)})
+    for n in range(8, 16):
+        q = f"r{n}"
+        w.update({q: (q, 64), f"{q}d": (q, 32), f"{q}w": (q, 16), f"{q}b": (q, 8), f"{q}l": (q, 8)})
+    for n in range(32):
+        q = f"zmm{n}"
+        w.update({f"xmm{n}": (q, 128), f"ymm{n}": (q, 256), q: (q, 512)})
+    return w
+
 
 # base latency table
 class LatencyDB:
@@ -40,11 +61,13 @@ class LatencyDB:
         "SHRD": 3,
         "MUL": 2,
         "IMUL": 2,
-        "DIV": 4,
-        "IDIV": 4,
+        "DIV": 2,  # per div_unit stage: DIV_RADIX_LOG2 chained subtracts
+        "IDIV": 2,
     }
-    DSP_ALU_W = 48
-    DSP_MUL_W = 18
+    DSP_ALU_W = 48  # DSP48E2 P / C port
+    DIV_RADIX_LOG2 = 2  # = uop_pkg::DIV_RADIX_LOG2
+    RTL_W = 64  # widest block datapath (top_multi_len W); a block uses block_width
+    DSP_MUL_W = 18  # DSP48E2 B port (microop_unit feeds A 18 bits too)
     CARRY8_PER_LUT = 12  # UltraScale+ –2
     FANOUT_THRESH = 5
 
@@ -73,18 +96,90 @@ class LatencyDB:
         "SHRD",
     }
     FLAG_RD = FLAG_WR | {"SBB", "ADC", "RCL", "RCR"}
+    # --deps precise: CF and OSZAP are renamed apart, so INC/DEC keep CF
+    # and rotates keep OSZAP without reading them
+    CF_RD = {"SBB", "ADC", "RCL", "RCR"}
+    CF_ONLY_WR = {"ROL", "ROR", "RCL", "RCR"}
+    OSZAP_ONLY_WR = {"INC", "DEC"}
+    # no microop_unit datapath: its default case passes operand a through
+    NO_RTL = {"SBB"}
 
-    @staticmethod
-    def bitwidth(tokens: List[str]) -> int:
-        bw = 32
-        for t in tokens:
-            if m := re.search(r"(\d+)", t):
-                bw = max(bw, int(m.group(1)))
-            elif t.lower().startswith(("xmm", "ymm", "zmm")):
-                bw = max(bw, 128)
-            elif "qword" in t.lower():
-                bw = max(bw, 64)
-        return bw
+    # x86 reg/imm latency in core cycles (Skylake-class, 32-bit operands)
+    X86_LAT: Dict[str, int] = {
+        "SBB": 2,
+        "ADC": 2,
+        "RCL": 2,
+        "RCR": 2,
+        "SHLD": 3,
+        "SHRD": 3,
+        "MUL": 3,
+        "IMUL": 3,
+        "DIV": 26,
+        "IDIV": 26,
+    }
+    # LUT6 per result bit of the comb microop_unit path
+    LUT_PER_BIT: Dict[str, int] = {
+        "SHL": 3,
+        "SAL": 3,
+        "SHR": 3,
+        "SAR": 3,
+        "ROL": 3,
+        "ROR": 3,
+        "RCL": 3,
+        "RCR": 3,
+        "SHLD": 6,
+        "SHRD": 6,
+    }
+
+    REGS: Dict[str, Tuple[str, int]] = _regs()
+    REG_WIDTH: Dict[str, int] = {r: w for r, (_, w) in REGS.items()}
+    MEM_WIDTH: Dict[str, int] = {
+        "byte": 8,
+        "word": 16,
+        "dword": 32,
+        "qword": 64,
+        "tbyte": 80,
+        "xmmword": 128,
+        "ymmword": 256,
+        "zmmword": 512,
+    }
+
+    @classmethod
+    def operand_width(cls, tok: str) -> Optional[int]:
+        """register or sized memory operand width; None for immediates / unknown"""
+        t = tok.strip().lower()
+        if "ptr" in t:  # the address registers inside [...] do not count
+            return cls.MEM_WIDTH.get(t.split()[0])
+        return cls.REG_WIDTH.get(t)
+
+    @classmethod
+    def flags_written(cls, op: str) -> Tuple[str, ...]:
+        opu = op.upper()
+        if opu in cls.OSZAP_ONLY_WR:
+            return ("OSZAP",)
+        if opu in cls.CF_ONLY_WR:
+            return ("CF",)
+        if opu in cls.FLAG_WR or opu in {"MUL", "IMUL"}:
+            return ("CF", "OSZAP")
+        return ()
+
+    @classmethod
+    def flags_read(cls, op: str) -> Tuple[str, ...]:
+        return ("CF",) if op.upper() in cls.CF_RD else ()
+
+    @classmethod
+    def bitwidth(cls, tokens: List[str]) -> int:
+        """operation width: widest operand, the x86-64 default 32 if none is known"""
+        return max((w for t in tokens if (w := cls.operand_width(t))), default=32)
+
+    @classmethod
+    def block_width(cls, uops: List[dict]) -> int:
+        """datapath W a block is built at: 8/16/32/64 covering every uop"""
+        bw = max((cls.bitwidth(u.get("raw_operands", [])) for u in uops), default=32)
+        w = 8
+        while w < min(bw, cls.RTL_W):
+            w *= 2
+        return w
 
     @classmethod
     def latency(cls, op: str, bw: int) -> int:
@@ -94,10 +189,13 @@ class LatencyDB:
             lat += 1
         if opu in {"MUL", "IMUL"} and bw > 32:
             lat += 1
-        if opu in {"DIV", "IDIV"} and bw > 32:
-            lat += 2
         return lat
 
+    @classmethod
+    def div_stages(cls, bw: int) -> int:
+        """div_unit latency, = uop_pkg::div_stages(bw)"""
+        return -(-bw // cls.DIV_RADIX_LOG2) + 2
+
     @classmethod
     def carry_penalty(cls, op: str, bw: int) -> int:
         return (
@@ -106,19 +204,178 @@ class LatencyDB:
             else max(0, (bw // 8 - 1) // cls.CARRY8_PER_LUT)
         )
 
+    # microop_unit DSP48E2 branches at every width (= uop_pkg::is_dsp); a
+    # MUL/IMUL by a constant with few CSD digits leaves it (const_reduced)
+    DSP_OPS = {"ADD", "SUB", "MUL", "IMUL", "MUL_ADD", "IMUL_ADD", "DEC_IMUL"}
+
     @classmethod
     def dsp_need(cls, op: str, bw: int) -> int:
+        return int(op.upper() in cls.DSP_OPS)
+
+    # constant operand (gen_len_table USE_IMM): shifts / rotates by a
+    # constant and constant masks are wiring, a multiply by a constant with
+    # few CSD digits is shift-add in LUTs (uop_pkg::CONST_MUL_MAX_DIGITS)
+    WIRE_IMM = {"AND", "OR", "XOR", "TEST", "SHL", "SAL", "SHR", "SAR",
+                "ROL", "ROR", "RCL", "RCR", "SHLD", "SHRD"}
+    CONST_MUL_MAX_DIGITS = 4
+
+    @classmethod
+    def csd_digits(cls, k: int, w: Optional[int] = None) -> int:
+        """non-zero canonical signed digits of k mod 2^w (= uop_pkg::csd_digits)"""
+        w = w or cls.RTL_W
+        k &= (1 << w) - 1
+        n = 0
+        for _ in range(w):  # a digit at 2^w is shifted out
+            if k & 1:
+                n += 1
+                k -= 2 - (k & 3)  # digit +1 (..01) or -1 (..11)
+            k >>= 1
+        return n
+
+    @classmethod
+    def const_reduced(cls, op: str, imm: Optional[int], w: Optional[int] = None) -> Optional[int]:
+        """adders left once the constant operand is folded in at block width
+        w: 0 = wiring, None = unit unchanged"""
+        if imm is None:
+            return None
         opu = op.upper()
-        if opu in {"MUL", "IMUL"} and bw > cls.DSP_MUL_W:
-            return 1
-        if opu in {"ADD", "SUB"} and bw > cls.DSP_ALU_W:
-            return 1
-        return 0
+        if opu in cls.WIRE_IMM:
+            return 0
+        if opu in {"MUL", "IMUL"}:
+            d = cls.csd_digits(imm, w)
+            if d <= cls.CONST_MUL_MAX_DIGITS:
+                return max(d - 1, 0)
+        return None
 
     @staticmethod
     def lut_need(bw: int) -> int:
         return (bw + 31) // 32
 
+    @classmethod
+    def x86_latency(cls, op: str, bw: int) -> int:
+        opu = op.upper()
+        lat = cls.X86_LAT.get(opu, 1)
+        if opu in {"DIV", "IDIV"} and bw > 32:
+            lat += 16
+        return lat
+
+    @classmethod
+    def lut_est(cls, op: str, w: int) -> int:
+        """LUT6 count of one microop_unit instance built at width w"""
+        opu = op.upper()
+        if opu in {"DIV", "IDIV"}:
+            return w * w  # div_unit: one w-bit subtract + restore per quotient bit
+        return w * cls.LUT_PER_BIT.get(opu, 1)
+
+    # --fuse compound ops: member opcodes along the chain, comb units
+    FUSED: Dict[str, Tuple[Tuple[str, ...], int]] = {
+        "AND_AND": (("AND", "AND"), 1),  # one AND, combined mask
+        "ADD_ADD": (("ADD", "ADD"), 1),  # 3-input adder, one carry chain
+        "ADD3": (("ADD", "ADD", "ADD"), 2),
+        "INC_SHL": (("INC", "SHL"), 3),
+        "NOT_ADD": (("NOT", "ADD"), 1),  # c - a - 1: NOT folds into the adder LUT
+        "SUB_SAR": (("SUB", "SAR"), 3),
+    }
+    # --fuse DSP48E2 compounds, one DSP each: member opcodes, pipeline registers
+    DSP_FUSED: Dict[str, Tuple[Tuple[str, ...], int]] = {
+        "MUL_ADD": (("MUL", "ADD"), 3),  # P = A*B + C: ALU behind the multiplier
+        "IMUL_ADD": (("IMUL", "ADD"), 3),
+        "DEC_IMUL": (("DEC", "IMUL"), 4),  # (D - A)*B: pre-adder + ADREG
+    }
+    # widest block W a compound is bit-exact at: the unfused ADD/SUB runs
+    # on a DSP48E2 and wraps at 48 bits, the LUT compound does not; the
+    # pre-adder feeds the multiplier 27 bits where IMUL alone takes 18
+    FUSED_MAX_W: Dict[str, int] = {
+        "ADD_ADD": DSP_ALU_W, "ADD3": DSP_ALU_W, "NOT_ADD": DSP_ALU_W, "SUB_SAR": DSP_ALU_W,
+        "DEC_IMUL": DSP_MUL_W,
+    }
+
+    # UltraScale+ -2 delay model (ps), used by --target-mhz
+    LUT_PS = 120  # LUT6 cell
+    NET_PS = 350  # average local route per LUT level
+    CARRY8_PS = 60  # per CARRY8 along a carry chain
+    CARRY_IO_PS = 250  # into / out of a carry chain
+    DSP_SETUP_PS = 350  # fabric -> A/B/C input register
+    DSP_CLK_OUT_PS = 400  # P register -> fabric
+    FF_PS = 150  # fabric FF clk->q + setup
+    UNCERTAINTY_PS = 100  # clock jitter / skew
+    ROUTE_MARGIN = 0.10  # congestion on top of NET_PS
+    ARITH = {"ADD", "SUB", "ADC", "SBB", "INC", "DEC", "NEG", "CMP"}
+
+    @classmethod
+    def pipe_cycles(cls, op: str, bw: int, dsp: int, w: Optional[int] = None) -> int:
+        """register stages inside the unit (div_unit, DSP48E2 AREG/BREG, MREG, PREG)"""
+        opu = op.upper()
+        if opu in {"DIV", "IDIV"}:
+            return cls.div_stages(w or cls.RTL_W)  # div_unit is built at the block W
+        if opu in cls.DSP_FUSED:
+            return cls.DSP_FUSED[opu][1]
+        if not dsp:
+            return 0
+        return 3 if opu in {"MUL", "IMUL"} else 2
+
+    @classmethod
+    def unit_in_ps(cls, op: str, bw: int, dsp: int) -> int:
+        """fabric -> first register of a pipelined unit"""
+        return cls.DSP_SETUP_PS if dsp else cls.NET_PS
+
+    @classmethod
+    def unit_step_ps(cls, op: str, bw: int, dsp: int, w: Optional[int] = None) -> int:
+        """register-to-register path inside a pipelined unit at block width w"""
+        if dsp or op.upper() not in {"DIV", "IDIV"}:
+            return 0
+        carry = cls.CARRY_IO_PS + -(-((w or cls.RTL_W) + 1) // 8) * cls.CARRY8_PS
+        step = cls.LUT_PS + cls.NET_PS + carry
+        return round(cls.DIV_RADIX_LOG2 * step * (1 + cls.ROUTE_MARGIN))
+
+    @classmethod
+    def delay_ps(cls, op: str, bw: int, dsp: int = 0) -> int:
+        """comb delay of one unit; for pipelined units only the out -> fabric part"""
+        if dsp:
+            return cls.DSP_CLK_OUT_PS
+        opu = op.upper()
+        if opu in {"DIV", "IDIV"}:
+            return cls.NET_PS  # div_unit output is registered
+        lvl = cls.LUT_PS + cls.NET_PS
+        carry = cls.CARRY_IO_PS + -(-bw // 8) * cls.CARRY8_PS
+        mux4 = -(-(bw - 1).bit_length() // 2)  # LUT6 = 4:1 mux per level
+        if opu in cls.ARITH:
+            d = lvl + carry
+        elif opu in {"SHLD", "SHRD"}:
+            d = (mux4 + 1) * lvl
+        elif opu in cls.LUT_PER_BIT:
+            d = mux4 * lvl
+        elif opu in {"MUL", "IMUL"}:
+            d = 2 * (bw - 1).bit_length() * lvl + carry  # narrow fabric multiplier
+        else:
+            d = lvl
+        return round(d * (1 + cls.ROUTE_MARGIN))
+
+    @classmethod
+    def fused_latency(cls, kind: str, bw: int, delay: bool = False) -> int:
+        """comb units (or ps) of a compound op; one unit, no route between members"""
+        if kind in cls.DSP_FUSED:  # registered like the multiply alone
+            mul = cls.DSP_FUSED[kind][0][-1 if kind == "DEC_IMUL" else 0]
+            if delay:
+                return cls.delay_ps(mul, bw, 1)
+            return cls.latency(mul, bw) + cls.carry_penalty(mul, bw)
+        members, units = cls.FUSED[kind]
+        if not delay:
+            return units + max(cls.carry_penalty(m, bw) for m in members)
+        lvl = round((cls.LUT_PS + cls.NET_PS) * (1 + cls.ROUTE_MARGIN))
+        d = sum(cls.delay_ps(m, bw) for m in members) - (len(members) - 1) * cls.NET_PS
+        carry = cls.CARRY_IO_PS + -(-bw // 8) * cls.CARRY8_PS
+        if kind in {"AND_AND", "NOT_ADD"}:
+            d -= lvl - cls.NET_PS  # first op absorbed into the second op's LUT
+        elif kind in {"ADD_ADD", "ADD3"}:
+            d -= (len(members) - 1) * (carry - cls.LUT_PS)  # compressor LUT, one chain
+        return d
+
+    @classmethod
+    def stage_budget_ps(cls, mhz: float) -> int:
+        """register-to-register comb budget at the target clock"""
+        return int(1e6 / mhz) - cls.FF_PS - cls.UNCERTAINTY_PS
+
 
 @dataclass
 class Uop:
@@ -129,6 +386,8 @@ class Uop:
     dsp: int
     lut: int
     succ: int = 0  # will fill later
+    cyc: int = 0  # pipeline registers inside the unit (DSP48E2, div_unit)
+    step: int = 0  # ps between those registers (LatencyDB.unit_step_ps)
 
 
 #  dependency graph builder
@@ -136,51 +395,186 @@ def _add_edge(edges: set[tuple[int, int]], a: int, b: int):
     edges.add((a, b))
 
 
-def build_dag(uops: List[dict]) -> Tuple[List[Uop], set[tuple[int, int]]]:
+DEPS = ("conservative", "precise")
+DATAPATHS = ("chain", "dataflow")  # uop_block, uop_dag
+ADDR_RE = re.compile(r"[a-z][a-z0-9]*")
+SHAMT_OPS = {"SHL", "SAL", "SHR", "SAR", "ROL", "ROR", "RCL", "RCR"}  # cl: shamt port
+
+
+def _locations(tok: str) -> Tuple[set, set]:
+    """(registers read to form an address, locations named) of one operand;
+    sub-registers map to their full register, all memory is one location"""
+    t = tok.strip().lower()
+    if "[" in t:
+        addr = {LatencyDB.REGS[r][0] for r in ADDR_RE.findall(t) if r in LatencyDB.REGS}
+        return addr, {"mem"}
+    if IMM_RE.fullmatch(t):
+        return set(), set()
+    return set(), {LatencyDB.REGS[r][0] if r in LatencyDB.REGS else r for r in t.split(":")}
+
+
+def dep_edges(uops: List[dict]) -> Dict[str, set]:
+    """Dependences of a block by kind: raw / war / waw on full registers
+    and memory, flag = CF / OSZAP read after write.
+
+    8/16-bit destinations merge into the old register, so they also read
+    it; 32-bit writes zero-extend and do not.  Only raw and flag edges
+    survive register renaming (--deps precise).
+    """
+    kinds: Dict[str, set] = {"raw": set(), "war": set(), "waw": set(), "flag": set()}
+    last_write: Dict[str, int] = {}
+    readers: Dict[str, List[int]] = {}
+    flag_write: Dict[str, int] = {}
+    for i, u in enumerate(uops):
+        reads, writes = set(), set()
+        for o in u.get("in_operands", []):
+            if o != "flag":
+                addr, loc = _locations(o)
+                reads |= addr | loc
+        for o in u.get("out_operands", []):
+            if o != "flag":
+                addr, loc = _locations(o)
+                reads |= addr
+                writes |= loc
+                if (LatencyDB.operand_width(o) or 32) < 32:
+                    reads |= loc
+        for r in reads:
+            if r in last_write:
+                kinds["raw"].add((last_write[r], i))
+        for r in writes:
+            kinds["war"].update((j, i) for j in readers.get(r, []) if j != i)
+            if r in last_write:
+                kinds["waw"].add((last_write[r], i))
+        for f in LatencyDB.flags_read(u["opcode"]):
+            if f in flag_write:
+                kinds["flag"].add((flag_write[f], i))
+        for r in reads:
+            readers.setdefault(r, []).append(i)
+        for r in writes:
+            last_write[r] = i
+            readers[r] = []
+        for f in LatencyDB.flags_written(u["opcode"]):
+            flag_write[f] = i
+    return kinds
+
+
+def operand_sources(g: dict) -> Tuple[List[int], List[int]]:
+    """uop_dag SRC_A / SRC_B of an augmented block: the slot producing
+    operand a / b of each slot, -1 for the block input.
+
+    a is the operand the uop also writes (x86 two-operand form), b the
+    other register or memory operand; producers are the last writers in
+    program order (order_map).  Slots a fused op absorbs read nothing but
+    the slot before (fuse_dag routed=True), like uop_block.
+    """
+    uops = g["instructions"]
+    n = len(uops)
+    prog = list(range(n))
+    if len(g.get("order_map", [])) == n:
+        prog.sort(key=lambda slot: g["order_map"][slot])
+    src_a, src_b = [-1] * n, [-1] * n
+    last_write: Dict[str, int] = {}
+
+    def producer(tok: str) -> int:
+        return max((last_write.get(r, -1) for r in _locations(tok)[1]), default=-1)
+
+    for slot in prog:
+        u = uops[slot]
+        ins = [o for o in u.get("in_operands", []) if o != "flag" and _locations(o)[1]]
+        outs = [o for o in u.get("out_operands", []) if o != "flag"]
+        a = next((o for o in ins if o in outs), ins[0] if ins else None)
+        rest = [o for o in ins if o != a]
+        if a is not None:
+            src_a[slot] = producer(a)
+        if rest and u["opcode"].upper() not in SHAMT_OPS:
+            src_b[slot] = producer(rest[0])
+        elif a is not None:
+            src_b[slot] = src_a[slot]
+        for o in outs:
+            for r in _locations(o)[1]:
+                last_write[r] = slot
+    for f in g.get("fused", []):
+        for slot in range(f["at"] + 1, f["at"] + f["len"]):
+            src_a[slot] = src_b[slot] = slot - 1
+    for slot in range(n):
+        if max(src_a[slot], src_b[slot]) >= slot:
+            raise ValueError(f"slot {slot} reads a later slot: not in dependence order")
+    return src_a, src_b
+
+
+def build_dag(
+    uops: List[dict], delay: bool = False, deps: str = "conservative", flags: bool = True
+) -> Tuple[List[Uop], set[tuple[int, int]]]:
+    """delay=True: Uop.lat in ps (LatencyDB.delay_ps) instead of comb units.
+
+    deps="conservative" orders every reuse of an operand name and chains
+    flag users to the last flag writer; "precise" keeps only the true
+    register and flag dependences of dep_edges.  flags=False drops the
+    flag dependences of "precise" (uop_dag routes no flags).
+    """
     edges: set[tuple[int, int]] = set()
     last_write: Dict[str, int] = {}
     live_out: Dict[str, int] = {}
 
     # Pass 1: latency & resource table
     node: List[Uop] = []
+    w = LatencyDB.block_width(uops)
     for i, u in enumerate(uops):
         bw = LatencyDB.bitwidth(u.get("raw_operands", []))
-        base = LatencyDB.latency(u["opcode"], bw)
-        extra = LatencyDB.carry_penalty(u["opcode"], bw)
+        dsp = LatencyDB.dsp_need(u["opcode"], bw)
+        adders = LatencyDB.const_reduced(u["opcode"], imm_value(u), w)
+        if adders is not None:
+            # strength-reduced: wiring, or a short shift-add tree off the DSP
+            dsp = 0
+            if delay:
+                lat = adders * LatencyDB.delay_ps("ADD", bw)
+            else:
+                lat = adders * (LatencyDB.latency("ADD", bw) + LatencyDB.carry_penalty("ADD", bw))
+        elif delay:
+            lat = LatencyDB.delay_ps(u["opcode"], bw, dsp)
+        else:
+            lat = LatencyDB.latency(u["opcode"], bw) + LatencyDB.carry_penalty(u["opcode"], bw)
+        cyc = LatencyDB.pipe_cycles(u["opcode"], bw, dsp, w)
         node.append(
             Uop(
                 i,
                 u["opcode"],
                 bw,
-                base + extra,
-                LatencyDB.dsp_need(u["opcode"], bw),
-                LatencyDB.lut_need(bw),
+                lat,
+                dsp,
+                0 if adders == 0 else LatencyDB.lut_need(bw),
+                cyc=cyc,
+                step=LatencyDB.unit_step_ps(u["opcode"], bw, dsp, w),
             )
         )
 
-    # Pass 2: RAW/WAR/WAW edges
+    # Pass 2: RAW/WAR/WAW edges (last_write / live_out also feed the prune)
+    precise = deps == "precise"
     for i, u in enumerate(uops):
         dst = set(u.get("out_operands", []))
         src = set(u.get("in_operands", []))
         for o in src:
-            if o in last_write:
+            if o in last_write and not precise:
                 _add_edge(edges, last_write[o], i)
         for o in dst:
-            if o in last_write:
+            if o in last_write and not precise:
                 _add_edge(edges, last_write[o], i)  # WAW/WAR
             last_write[o] = i
         for o in src | dst:
             live_out[o] = i
 
     # Pass 3: flag chain
-    flag_src = None
-
-    for i, u in enumerate(uops):
-        opc = u["opcode"].upper()
-        if opc in LatencyDB.FLAG_WR:
-            flag_src = i
-        if opc in LatencyDB.FLAG_RD and flag_src is not None and flag_src != i:
-            _add_edge(edges, flag_src, i)
+    if precise:
+        kinds = dep_edges(uops)
+        edges = kinds["raw"] | kinds["flag"] if flags else kinds["raw"]
+    else:
+        flag_src = None
+        for i, u in enumerate(uops):
+            opc = u["opcode"].upper()
+            if opc in LatencyDB.FLAG_WR:
+                flag_src = i
+            if opc in LatencyDB.FLAG_RD and flag_src is not None and flag_src != i:
+                _add_edge(edges, flag_src, i)
 
     # Pass 4: succ count & dead-write prune
     for a, b in edges:
@@ -192,11 +586,127 @@ def build_dag(uops: List[dict]) -> Tuple[List[Uop], set[tuple[int, int]]]:
 
     for n in node:
         if n.succ > LatencyDB.FANOUT_THRESH:
-            n.lat += 1
+            n.lat += LatencyDB.NET_PS if delay else 1
 
     return node, edges
 
 
+FUSE_PATTERNS: Dict[Tuple[str, ...], str] = {
+    m: kind for kind, (m, _) in {**LatencyDB.FUSED, **LatencyDB.DSP_FUSED}.items()
+}
+FUSE_PATTERNS[("INC", "SAL")] = "INC_SHL"
+
+
+def fuse_dag(
+    node: List[Uop], edges: set[tuple[int, int]], uops: List[dict], delay: bool = False,
+    routed: bool = False,
+) -> Tuple[List[Uop], set[tuple[int, int]], List[List[int]]]:
+    """Peephole fusion: rewrite chains matching FUSE_PATTERNS into one node.
+
+    A link i -> j is fused only if j is i's single successor, i is j's
+    single predecessor and j reads i's result register, so the chain is
+    private and can sit in adjacent uop_block slots.  routed=True (uop_dag)
+    also needs every register / memory operand of j to be i's result: the
+    compound op only sees the head's a / b and the absorbed immediates.
+    Returns the new DAG (node k = members[k], kept in head order) and the
+    member lists.
+    """
+    N = len(node)
+    succ: List[List[int]] = [[] for _ in range(N)]
+    pred: List[List[int]] = [[] for _ in range(N)]
+    for a, b in edges:
+        succ[a].append(b)
+        pred[b].append(a)
+
+    def private(a: int, b: int) -> bool:
+        res = set(uops[a].get("out_operands", [])) - {"flag"}
+        return succ[a] == [b] and pred[b] == [a] and bool(res & set(uops[b].get("in_operands", [])))
+
+    def reads_only(a: int, b: int) -> bool:
+        res = {r for o in uops[a].get("out_operands", []) if o != "flag" for r in _locations(o)[1]}
+        return all(
+            _locations(o)[1] <= res and not _locations(o)[0]
+            for o in uops[b].get("in_operands", []) if o != "flag"
+        )
+
+    longest = max(len(p) for p in FUSE_PATTERNS)
+    w = LatencyDB.block_width(uops)
+    taken = [False] * N
+    members: List[List[int]] = []
+    for i in range(N):
+        if taken[i]:
+            continue
+        chain = [i]
+        while len(chain) < longest and len(succ[chain[-1]]) == 1:
+            j = succ[chain[-1]][0]
+            if taken[j] or not private(chain[-1], j):
+                break
+            if routed and not reads_only(chain[-1], j):
+                break
+            chain.append(j)
+        # a DSP compound needs its multiply on the DSP (not strength-reduced),
+        # any compound a block W it is bit-exact at
+        while len(chain) > 1 and (
+            (kind := FUSE_PATTERNS.get(tuple(node[c].op.upper() for c in chain))) is None
+            or (kind in LatencyDB.DSP_FUSED
+                and not node[chain[-1 if kind == "DEC_IMUL" else 0]].cyc)
+            or w > LatencyDB.FUSED_MAX_W.get(kind, w)
+        ):
+            chain.pop()
+        for c in chain:
+            taken[c] = True
+        members.append(chain)
+    if len(members) == N:
+        return node, edges, members
+
+    gid = {m: k for k, grp in enumerate(members) for m in grp}
+    new_edges = {(gid[a], gid[b]) for a, b in edges if gid[a] != gid[b]}
+    new_node: List[Uop] = []
+    for k, grp in enumerate(members):
+        if len(grp) == 1:
+            new_node.append(replace(node[grp[0]], idx=k, succ=0))
+            continue
+        kind = FUSE_PATTERNS[tuple(node[c].op.upper() for c in grp)]
+        bw = max(node[c].bw for c in grp)
+        dsp = int(kind in LatencyDB.DSP_FUSED)
+        lat = LatencyDB.fused_latency(kind, bw, delay)
+        if not dsp:  # never slower than the members, e.g. INC + constant SHL
+            lat = min(lat, sum(node[c].lat for c in grp))
+        new_node.append(
+            Uop(k, kind, bw, lat, dsp,
+                0 if dsp else sum(node[c].lut for c in grp),
+                cyc=LatencyDB.pipe_cycles(kind, bw, dsp))
+        )
+    for a, _ in new_edges:
+        new_node[a].succ += 1
+    for grp, n in zip(members, new_node):
+        if len(grp) > 1 and n.succ > LatencyDB.FANOUT_THRESH:
+            n.lat += LatencyDB.NET_PS if delay else 1
+    return new_node, new_edges, members
+
+
+def dsp_cascades(node: List[Uop], order: List[int], stage_ff: List[int]) -> int:
+    """uop_block slots whose ADD/SUB DSP takes a over PCIN (casc_at).
+
+    The slot before must be a DSP op with no FF behind it; the cascaded
+    DSP drops its input registers, so each one saves a pipeline cycle.  A
+    --fuse DSP compound ends in an absorbed OP_NOP slot (gen_len_table),
+    so nothing cascades behind it.
+    """
+    ff = set(stage_ff)
+
+    def on_dsp(u: Uop) -> bool:
+        return bool(u.cyc) and u.op.upper() not in {"DIV", "IDIV"}
+
+    return sum(
+        1
+        for p, k in zip(order, order[1:])
+        if node[k].op.upper() in {"ADD", "SUB"} and on_dsp(node[k])
+        and on_dsp(node[p]) and p not in ff
+        and node[p].op.upper() not in LatencyDB.DSP_FUSED
+    )
+
+
 def topo_sort(n: int, edges: set[tuple[int, int]]) -> Tuple[List[int], List[List[int]]]:
     succ = [[] for _ in range(n)]
     indeg = [0] * n
@@ -217,58 +727,545 @@ def topo_sort(n: int, edges: set[tuple[int, int]]) -> Tuple[List[int], List[List
     return order, succ
 
 
-# main analysis 
-def schedule_group(
-    group: dict, max_comb: int, max_dsp: int, trace: bool = False
-) -> Tuple[List[int], List[int], dict]:
-    """return (order, ff_list, stats)"""
-    node, edges = build_dag(group["instructions"])
+def list_schedule(
+    node: List[Uop], edges: set[tuple[int, int]], max_comb: int, max_dsp: int
+) -> Tuple[List[int], List[int], List[tuple]]:
+    """Greedy stage packing; return (order, ff_list, stage_metrics).
+
+    Each stage is filled first-fit in (lat, dsp, succ) priority order, ties
+    going to the node that became ready first.  Ready nodes sit in one heap
+    per (lat, dsp) class keyed on (-succ, arrival), so the best node that
+    still fits is the head of the largest class that fits: O(n log n).
+    """
     N = len(node)
     order0, succ = topo_sort(N, edges)
     indeg = [0] * N
     for _, b in edges:
         indeg[b] += 1
 
-    ready = [i for i in order0 if indeg[i] == 0]
+    classes = sorted({(n.lat, n.dsp) for n in node}, reverse=True)
+    heaps: Dict[Tuple[int, int], list] = {k: [] for k in classes}
+    arrival = 0
+
+    def push(i: int) -> None:
+        nonlocal arrival
+        u = node[i]
+        heapq.heappush(heaps[(u.lat, u.dsp)], (-u.succ, arrival, i))
+        arrival += 1
+
+    for i in order0:
+        if indeg[i] == 0:
+            push(i)
+    n_ready = arrival
+
     order: List[int] = []
     stage_ff: List[int] = []
     stage_metrics = []
-    stage_idx = 0
 
-    while ready:
-        ready.sort(key=lambda i: (node[i].lat, node[i].dsp, node[i].succ), reverse=True)
+    while n_ready:
         used_comb = used_dsp = used_lut = net_cong = 0
-        MAX_DSP_STAGE = max_dsp
         this_stage = []
-        i = 0
-        while i < len(ready):
-            u = node[ready[i]]
-            if used_comb + u.lat <= max_comb and used_dsp + u.dsp <= MAX_DSP_STAGE:
-                this_stage.append(ready.pop(i))
-                used_comb += u.lat
-                used_dsp += u.dsp
-                used_lut += u.lut
-                net_cong += u.succ * u.lat
+        while True:
+            for k in classes:
+                if heaps[k] and used_comb + k[0] <= max_comb and used_dsp + k[1] <= max_dsp:
+                    break
             else:
-                i += 1
+                break
+            u = node[heapq.heappop(heaps[k])[2]]
+            this_stage.append(u.idx)
+            used_comb += u.lat
+            used_dsp += u.dsp
+            used_lut += u.lut
+            net_cong += u.succ * u.lat
         if not this_stage:
-            this_stage.append(ready.pop(0))
+            # nothing fits: the top-priority node gets a stage of its own
+            k = next(k for k in classes if heaps[k])
+            this_stage.append(heapq.heappop(heaps[k])[2])
+        n_ready -= len(this_stage)
         order.extend(this_stage)
         stage_metrics.append((used_comb, used_dsp, used_lut, net_cong))
-        if ready:
+        if n_ready:
             stage_ff.append(this_stage[-1])
         for u in this_stage:
             for v in succ[u]:
                 indeg[v] -= 1
                 if indeg[v] == 0:
-                    ready.append(v)
-        stage_idx += 1
+                    push(v)
+                    n_ready += 1
+
+    return order, stage_ff, stage_metrics
+
+
+def fmax_schedule(
+    node: List[Uop], budget: int, max_dsp: int
+) -> Tuple[List[int], List[int], List[tuple]]:
+    """Fewest FF boundaries along the uop_block chain for a ps budget.
+
+    uop_block chains the uops in order, so a register-to-register path is
+    the running sum of delays since the last FF; cutting as late as
+    possible gives the minimum number of FFs.  Pipelined units (DSP48E2,
+    div_unit) register internally: unit_in_ps ends the incoming path, lat
+    starts a new one.
+    """
+    order = list(range(len(node)))
+    stage_ff: List[int] = []
+    stage_metrics = []
+    path = crit = used_dsp = used_lut = net_cong = n_in = 0
+    for i in order:
+        u = node[i]
+        head = LatencyDB.unit_in_ps(u.op, u.bw, u.dsp) if u.cyc else u.lat
+        if n_in and (path + head > budget or used_dsp + u.dsp > max_dsp):
+            stage_metrics.append((crit, used_dsp, used_lut, net_cong))
+            stage_ff.append(i - 1)
+            path = crit = used_dsp = used_lut = net_cong = n_in = 0
+        if u.cyc:
+            crit = max(crit, path + head, u.step)
+            path = u.lat
+        else:
+            path += u.lat
+        crit = max(crit, path)
+        used_dsp += u.dsp
+        used_lut += u.lut
+        net_cong += u.succ * u.lat
+        n_in += 1
+    stage_metrics.append((crit, used_dsp, used_lut, net_cong))
+    return order, stage_ff, stage_metrics
+
+
+def dataflow_schedule(
+    node: List[Uop], edges: set[tuple[int, int]], budget: int, delay: bool = False
+) -> Tuple[List[int], List[int], List[tuple], int]:
+    """Output registers for a DAG datapath (uop_dag), max_dsp not applied.
+
+    Independent uops run side by side, so delay only adds up along each
+    path.  Nodes are visited in topological order; a node's output is
+    registered when a successor would start past the budget.  uop_dag
+    delays the other operands to match.  Returns (order, ff_list,
+    per-level stage_metrics, cycles on the slowest path).
+    """
+    N = len(node)
+    order, succ = topo_sort(N, edges)
+    pred: List[List[int]] = [[] for _ in range(N)]
+    for a, b in edges:
+        pred[b].append(a)
+
+    def head(u: Uop) -> int:  # delay before the first register of u
+        if u.cyc:
+            return LatencyDB.unit_in_ps(u.op, u.bw, u.dsp) if delay else 0
+        return u.lat
+
+    cyc = [0] * N  # cycle the value reaches its consumers
+    t = [0] * N  # ... and the comb delay it has accumulated by then
+    lvl = [0] * N  # FFs crossed: the stage the node sits in
+    reg = [0] * N
+    ff: List[int] = []
+    metrics: Dict[int, list] = {}
+    for n in order:
+        u = node[n]
+        c_in = max((cyc[p] for p in pred[n]), default=0)
+        t_in = max((t[p] for p in pred[n] if cyc[p] == c_in), default=0)
+        lvl[n] = max((lvl[p] + reg[p] for p in pred[n]), default=0)
+        if u.cyc:
+            cyc[n], t[n] = c_in + u.cyc, u.lat
+            crit = max(t_in + head(u), u.step, u.lat)
+        else:
+            cyc[n], t[n] = c_in, t_in + u.lat
+            crit = t[n]
+        m = metrics.setdefault(lvl[n], [0, 0, 0, 0])
+        m[0] = max(m[0], crit)
+        m[1] += u.dsp
+        m[2] += u.lut
+        m[3] += u.succ * u.lat
+        if any(t[n] + head(node[s]) > budget for s in succ[n]):
+            ff.append(n)
+            reg[n] = 1
+            cyc[n], t[n] = cyc[n] + 1, 0
+    stage_metrics = [tuple(metrics[k]) for k in sorted(metrics)]
+    return order, ff, stage_metrics, max(cyc, default=0)
+
+
+OPT_MAX_UOPS = 20  # --scheduler optimal: larger groups stay greedy
+OPT_NODE_LIMIT = 200_000  # search states before giving up on a group
+
+
+class SearchLimit(Exception):
+    """optimal_schedule ran out of search states"""
+
+
+def _stage_metrics(node: List[Uop], stage: List[int], max_comb: int, max_dsp: int) -> tuple:
+    comb = sum(node[i].lat for i in stage)
+    dsp = sum(node[i].dsp for i in stage)
+    if len(stage) == 1 and (comb > max_comb or dsp > max_dsp):
+        return (0, 0, 0, 0)  # same as the greedy "nothing fits" stage
+    lut = sum(node[i].lut for i in stage)
+    return (comb, dsp, lut, sum(node[i].succ * node[i].lat for i in stage))
+
+
+def optimal_schedule(
+    node: List[Uop],
+    edges: set[tuple[int, int]],
+    max_comb: int,
+    max_dsp: int,
+    upper: int,
+    limit: int = OPT_NODE_LIMIT,
+) -> Optional[Tuple[List[int], List[int], List[tuple]]]:
+    """Minimum-stage schedule under the list scheduler's rules.
+
+    Same model as list_schedule: a stage is a set of ready nodes whose lat /
+    dsp sums fit max_comb / max_dsp (or one node alone).  Iterative
+    deepening on the stage count T from a lower bound up to upper - 1;
+    each level branches over the *maximal* feasible stages only (filling a
+    stage never hurts).  Pruning: remaining work / budget, longest remaining
+    chain (ALAP mobility: zero-slack nodes are forced into the stage) and a
+    memo of failed states.  Returns None when the greedy result (upper
+    stages) is already optimal; raises SearchLimit past `limit` states.
+    """
+    N = len(node)
+    order0, succ = topo_sort(N, edges)
+    pred = [0] * N
+    for a, b in edges:
+        pred[b] |= 1 << a
+    height = [1] * N  # nodes on the longest path to a sink
+    for i in reversed(order0):
+        for j in succ[i]:
+            height[i] = max(height[i], height[j] + 1)
+    over = [n.lat > max_comb or n.dsp > max_dsp for n in node]
+    prio = sorted(range(N), key=lambda i: (-height[i], -node[i].lat, -node[i].dsp, i))
+    full = (1 << N) - 1
+
+    def lower_bound(rem: List[int]) -> int:
+        if not rem:
+            return 0
+        n_over = sum(over[i] for i in rem)
+        lb = max(height[i] for i in rem)
+        if max_comb > 0:
+            lat = sum(node[i].lat for i in rem if not over[i])
+            lb = max(lb, n_over + -(-lat // max_comb))
+        if max_dsp > 0:
+            dsp = sum(node[i].dsp for i in rem if not over[i])
+            lb = max(lb, n_over + -(-dsp // max_dsp))
+        return lb
+
+    def stages(ready: List[int], must: List[int]):
+        """maximal feasible stages over `ready` that contain all of `must`"""
+        cand = must + [i for i in ready if i not in must]
+        chosen: List[int] = []
+        skipped: List[int] = []
+
+        def fits(i: int, comb: int, dsp: int) -> bool:
+            return not chosen or (
+                comb + node[i].lat <= max_comb and dsp + node[i].dsp <= max_dsp
+            )
+
+        def rec(k: int, comb: int, dsp: int):
+            if k == len(cand):
+                if chosen and not any(fits(r, comb, dsp) for r in skipped):
+                    yield list(chosen)
+                return
+            i = cand[k]
+            if fits(i, comb, dsp):
+                chosen.append(i)
+                yield from rec(k + 1, comb + node[i].lat, dsp + node[i].dsp)
+                chosen.pop()
+            if k >= len(must):
+                skipped.append(i)
+                yield from rec(k + 1, comb, dsp)
+                skipped.pop()
+
+        yield from rec(0, 0, 0)
+
+    budget = limit
+    failed: Dict[int, int] = {}
+
+    def dfs(done: int, d: int, T: int) -> Optional[List[List[int]]]:
+        nonlocal budget
+        if done == full:
+            return []
+        rem = [i for i in prio if not done >> i & 1]
+        if d + lower_bound(rem) > T or failed.get(done, T + 1) <= d:
+            return None
+        budget -= 1
+        if budget < 0:
+            raise SearchLimit
+        ready = [i for i in rem if not pred[i] & ~done]
+        must = [i for i in ready if d + height[i] == T]
+        for st in stages(ready, must):
+            mask = done
+            for i in st:
+                mask |= 1 << i
+            rest = dfs(mask, d + 1, T)
+            if rest is not None:
+                return [st] + rest
+        failed[done] = d
+        return None
+
+    for T in range(lower_bound(prio), upper):
+        failed.clear()
+        found = dfs(0, 0, T)
+        if found is not None:
+            break
+    else:
+        return None
+
+    key = lambda i: (-node[i].lat, -node[i].dsp, -node[i].succ, i)  # noqa: E731
+    found = [sorted(st, key=key) for st in found]
+    order = [i for st in found for i in st]
+    stage_ff = [st[-1] for st in found[:-1]]
+    return order, stage_ff, [_stage_metrics(node, st, max_comb, max_dsp) for st in found]
+
+
+def schedule_dag(
+    node: List[Uop],
+    edges: set[tuple[int, int]],
+    max_comb: int,
+    max_dsp: int,
+    scheduler: str = "greedy",
+    opt_max_uops: int = OPT_MAX_UOPS,
+) -> Tuple[List[int], List[int], List[tuple], int, Optional[str]]:
+    """(order, ff_list, stage_metrics, greedy_stages, note) for a built DAG
+
+    scheduler="fmax" expects a delay DAG and max_comb as the ps budget.
+    """
+    if scheduler == "fmax":
+        order, stage_ff, stage_metrics = fmax_schedule(node, max_comb, max_dsp)
+        return order, stage_ff, stage_metrics, len(stage_metrics), None
+    order, stage_ff, stage_metrics = list_schedule(node, edges, max_comb, max_dsp)
+    greedy_stages = len(stage_metrics)
+    note = None
+    if scheduler == "optimal":
+        if len(node) > opt_max_uops:
+            note = f"{len(node)} uops > --opt-max-uops, greedy kept"
+        else:
+            try:
+                opt = optimal_schedule(node, edges, max_comb, max_dsp, greedy_stages)
+            except SearchLimit:
+                opt, note = None, "search limit, greedy kept"
+            if opt is not None:
+                order, stage_ff, stage_metrics = opt
+    return order, stage_ff, stage_metrics, greedy_stages, note
+
+
+# schedule cache
+CACHE_DEFAULT = Path(__file__).resolve().parents[1] / ".cache" / "schedule.json"
+
+
+IMM_RE = re.compile(r"-?(0x[0-9a-f]+|\d+)", re.I)
+
+
+def imm_value(u: dict) -> Optional[int]:
+    """Immediate of an instruction (its last raw operand), as IMM_LUT holds
+    it: 32 bits, sign-extended like x86 imm32 (None without one)."""
+    raw = u.get("raw_operands", [])
+    if len(raw) < 2 or not IMM_RE.fullmatch(raw[-1]):
+        return None
+    t = raw[-1]
+    v = int(t, 16 if "x" in t.lower() else 10) & 0xFFFFFFFF
+    return v - (1 << 32) if v >> 31 else v
+
+
+def block_signature(uops: List[dict], literals: bool = False) -> list:
+    """Canonical form of everything build_dag reads from a group.
+
+    Per instruction: upper-cased opcode, bit width and the in/out operand
+    sets with names renamed in first-use order, so blocks that differ only
+    in register allocation (or PC / bench) share one signature.  Each
+    operand also carries its width and the renamed full registers it names
+    and addresses through (_locations), as dep_edges and operand_sources
+    alias eax / rax and read rdx for [rdx].
+    literals=True keeps immediates verbatim (they end up in the RTL).
+    """
+    names: Dict[str, int] = {}
+    regs: Dict[str, int] = {}
+
+    def reg(r: str) -> str:
+        return r if r == "mem" else f"r{regs.setdefault(r, len(regs))}"
+
+    def canon(o: str):
+        if o == "flag" or (literals and IMM_RE.fullmatch(o)):
+            return o.lower()
+        for t in ADDR_RE.findall(o.lower()):  # number registers in text order
+            if t in LatencyDB.REGS:
+                reg(LatencyDB.REGS[t][0])
+        addr, locs = _locations(o)
+        return (names.setdefault(o, len(names)), LatencyDB.operand_width(o),
+                tuple(sorted(map(reg, sorted(locs)))), tuple(sorted(map(reg, sorted(addr)))))
+
+    sig = []
+    w = LatencyDB.block_width(uops)
+    for u in uops:
+        ids = {}
+        for key in ("in_operands", "out_operands"):
+            ids[key] = sorted({canon(o) for o in u.get(key, [])}, key=str)
+        sig.append(
+            [
+                u["opcode"].upper(),
+                LatencyDB.bitwidth(u.get("raw_operands", [])),
+                ids["in_operands"],
+                ids["out_operands"],
+                LatencyDB.const_reduced(u["opcode"], imm_value(u), w),
+            ]
+        )
+    return sig
+
+
+class ScheduleCache:
+    """Persistent schedule results keyed by block signature + scheduler params.
+
+    The key also hashes this file, so any change to the latency model or the
+    schedulers invalidates old entries.  path=None keeps the cache in memory.
+    """
+
+    VERSION = 1
+    _model = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self.hits = self.misses = 0
+        self.new: Dict[str, dict] = {}
+        self.entries: Dict[str, dict] = {}
+        if path is not None:
+            try:
+                data = json.loads(path.read_text())
+                if data.get("version") == self.VERSION:
+                    self.entries = data["entries"]
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def key(self, uops: List[dict], max_comb: int, max_dsp: int, **sched) -> str:
+        spec = [self.VERSION, self._model, max_comb, max_dsp, sorted(sched.items()),
+                block_signature(uops)]
+        return hashlib.sha256(json.dumps(spec, separators=(",", ":")).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        e = self.entries.get(key)
+        if e is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return e
+
+    def put(self, key: str, entry: dict) -> None:
+        self.entries[key] = self.new[key] = entry
+
+    def save(self) -> None:
+        if self.path is None or not self.new:
+            return
+        # merge with whatever other runs stored meanwhile
+        merged = ScheduleCache(self.path).entries
+        merged.update(self.new)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"version": self.VERSION, "entries": merged}))
+        os.replace(tmp, self.path)
+        self.new = {}
+
+
+def group_dag(
+    uops: List[dict], delay: bool = False, fuse: bool = False,
+    deps: str = "conservative", datapath: str = "chain",
+) -> Tuple[List[Uop], set[tuple[int, int]], Optional[List[List[int]]]]:
+    """build_dag + fuse_dag as the estimator flags ask; members is None
+    without fuse"""
+    if datapath == "dataflow":  # uop_dag wires each operand to its producer
+        deps = "precise"
+    node, edges = build_dag(uops, delay=delay, deps=deps, flags=datapath != "dataflow")
+    members = None
+    if fuse:
+        node, edges, members = fuse_dag(node, edges, uops, delay=delay,
+                                        routed=datapath == "dataflow")
+    return node, edges, members
+
+
+def _schedule_entry(group: dict, max_comb: int, max_dsp: int, scheduler: str,
+                    opt_max_uops: int, target_mhz: Optional[float], fuse: bool,
+                    deps: str, datapath: str) -> dict:
+    node, edges, members = group_dag(group["instructions"], bool(target_mhz), fuse,
+                                     deps, datapath)
+    if target_mhz:
+        max_comb, scheduler = LatencyDB.stage_budget_ps(target_mhz), "fmax"
+    if datapath == "dataflow":
+        order, stage_ff, stage_metrics, path = dataflow_schedule(
+            node, edges, max_comb, delay=bool(target_mhz)
+        )
+        greedy_stages, opt_note = len(stage_metrics), None
+        stages, latency = len(stage_metrics), path + 1
+        pipe_cycles = latency - stages
+    else:
+        order, stage_ff, stage_metrics, greedy_stages, opt_note = schedule_dag(
+            node, edges, max_comb, max_dsp, scheduler, opt_max_uops
+        )
+        pipe_cycles = sum(n.cyc for n in node) - dsp_cascades(node, order, stage_ff)
+        stages = len(stage_ff) + 1
+        latency = stages + pipe_cycles
+    fused = []
+    if members is not None:
+        # back to instruction indices: members sit in adjacent slots, a
+        # boundary after a fused node falls after its last member
+        pos = 0
+        for k in order:
+            if len(members[k]) > 1:
+                fused.append({"at": pos, "op": node[k].op, "len": len(members[k])})
+            pos += len(members[k])
+        order = [m for k in order for m in members[k]]
+        stage_ff = [members[k][-1] for k in stage_ff]
+    if datapath == "dataflow":  # uop_dag FF_MASK is indexed by slot
+        stage_ff = sorted(order.index(i) for i in stage_ff)
+    return {
+        "order": order,
+        "ff": stage_ff,
+        "fused": fused,
+        "stage_metrics": stage_metrics,
+        "greedy_stages": greedy_stages,
+        "opt_note": opt_note,
+        "sum_lat": sum(n.lat for n in node),
+        "pipe_cycles": pipe_cycles,
+        "stages": stages,
+        "latency": latency,
+    }
+
+
+# main analysis 
+def schedule_group(
+    group: dict,
+    max_comb: int,
+    max_dsp: int,
+    trace: bool = False,
+    scheduler: str = "greedy",
+    opt_max_uops: int = OPT_MAX_UOPS,
+    target_mhz: Optional[float] = None,
+    fuse: bool = False,
+    deps: str = "conservative",
+    datapath: str = "chain",
+    cache: Optional[ScheduleCache] = None,
+) -> Tuple[List[int], List[int], dict]:
+    """return (order, ff_list, stats); target_mhz overrides max_comb / scheduler"""
+    e = None
+    if cache is not None:
+        key = cache.key(group["instructions"], max_comb, max_dsp, scheduler=scheduler,
+                        opt_max_uops=opt_max_uops, target_mhz=target_mhz, fuse=fuse,
+                        deps=deps, datapath=datapath)
+        e = cache.get(key)
+    if e is None:
+        e = _schedule_entry(group, max_comb, max_dsp, scheduler, opt_max_uops,
+                            target_mhz, fuse, deps, datapath)
+        if cache is not None:
+            cache.put(key, e)
+    order, stage_ff = list(e["order"]), list(e["ff"])
+    stage_metrics = [tuple(m) for m in e["stage_metrics"]]
+    greedy_stages, opt_note = e["greedy_stages"], e["opt_note"]
 
     cp_list = [m[0] for m in stage_metrics]
     stats = {
         "stage_metrics": stage_metrics,
         "crit_path_std": pstdev(cp_list) if len(cp_list) > 1 else 0.0,
+        "pipe_cycles": e["pipe_cycles"],
+        "stages": e["stages"],
+        "latency": e["latency"],
+        "fused": e["fused"],
     }
+    if scheduler == "optimal" and not target_mhz:
+        stats["greedy_stages"] = greedy_stages
+        stats["optimal_stages"] = None if opt_note else len(stage_metrics)
 
     # optional trace
     if trace:
@@ -280,8 +1277,19 @@ def schedule_group(
         for s, (c, d, l, cong) in enumerate(stage_metrics):
             warn = "warning" if l > max_comb * 4 else ""
             print(f"{s:5d} | {c:4d} {d:3d} {l:3d} {cong:4d} {warn}")
+        if stats["fused"]:
+            print("fused: " + ", ".join(f"{f['op']}@{f['at']}" for f in stats["fused"]))
+        if scheduler == "optimal" and not target_mhz:
+            if opt_note:
+                print(f"optimal: {opt_note} ({greedy_stages} stages)")
+            else:
+                gap = greedy_stages - len(stage_metrics)
+                print(
+                    f"optimal: {len(stage_metrics)} stages, greedy {greedy_stages}"
+                    f" (+{gap}, {100.0 * gap / len(stage_metrics):.0f}% over)"
+                )
 
-    return order, stage_ff, stats, sum(n.lat for n in node)
+    return order, stage_ff, stats, e["sum_lat"]
 
 
 def analyse(
@@ -290,20 +1298,45 @@ def analyse(
     max_dsp: int,
     trace: bool,
     stats_out: Optional[List[dict]] = None,
+    **sched,
 ) -> None:
-    order, ff, stats, _ = schedule_group(group, max_comb, max_dsp, trace)
+    order, ff, stats, _ = schedule_group(group, max_comb, max_dsp, trace, **sched)
     g = group
     g["instructions"] = [g["instructions"][i] for i in order]
+    for k in ("greedy_stage_count", "fuse", "fused", "deps", "datapath",
+              "scheduler", "opt_max_uops", "target_mhz", "no_rtl"):
+        g.pop(k, None)  # from an earlier run, maybe with other flags
     g.update(
         {
             "order_map": order,
             "ff_boundaries": ff,
-            "stage_count": len(ff) + 1,
-            "latency_cycles": len(ff) + 1,
+            "width": LatencyDB.block_width(g["instructions"]),
+            "stage_count": stats["stages"],
+            "latency_cycles": stats["latency"],
             "ff_mask": sum(1 << p for p in ff) & ((1 << len(order)) - 1),
             "crit_path_sigma": stats["crit_path_std"],
+            "max_comb": max_comb,
+            "max_dsp": max_dsp,
         }
     )
+    if "greedy_stages" in stats:
+        g["greedy_stage_count"] = stats["greedy_stages"]
+    if sched.get("scheduler") == "optimal":
+        g["scheduler"] = "optimal"
+        g["opt_max_uops"] = sched.get("opt_max_uops", OPT_MAX_UOPS)
+    if sched.get("target_mhz"):
+        g["target_mhz"] = sched["target_mhz"]
+    no_rtl = sorted({i["opcode"].upper() for i in g["instructions"]} & LatencyDB.NO_RTL)
+    if no_rtl:
+        g["no_rtl"] = no_rtl
+    if sched.get("fuse"):
+        g["fuse"] = True
+    if stats["fused"]:
+        g["fused"] = stats["fused"]
+    if sched.get("deps") == "precise":
+        g["deps"] = "precise"
+    if sched.get("datapath") == "dataflow":
+        g["datapath"] = "dataflow"
     if stats_out is not None:
         stats_out.append(
             {
@@ -312,10 +1345,63 @@ def analyse(
                 "crit_sigma": stats["crit_path_std"],
             }
         )
+        if "greedy_stages" in stats:
+            stats_out[-1]["greedy_stages"] = stats["greedy_stages"]
+            stats_out[-1]["optimal_stages"] = stats["optimal_stages"]
+
+
+def _depth(n: int, edges: set[tuple[int, int]]) -> int:
+    """uops on the longest dependence chain"""
+    order, succ = topo_sort(n, edges)
+    d = [1] * n
+    for i in order:
+        for j in succ[i]:
+            d[j] = max(d[j], d[i] + 1)
+    return max(d, default=0)
+
+
+def dump_deps(groups: List[dict], path: Path) -> str:
+    """NDJSON, one line per group: conservative edges and the precise
+    raw / war / waw / flag edges, each with its chain depth"""
+    tot = {"conservative": [0, 0.0], "precise": [0, 0.0]}  # edges, Σ uops/depth
+    with path.open("w") as f:
+        for g in groups:
+            uops = g["instructions"]
+            n = len(uops)
+            _, cons = build_dag(uops)
+            kinds = dep_edges(uops)
+            prec = kinds["raw"] | kinds["flag"]
+            rec = {
+                "rank": g.get("rank", 0),
+                "opcodes": [u["opcode"] for u in uops],
+                "conservative": {"edges": sorted(cons), "depth": _depth(n, cons)},
+                "precise": {k: sorted(e) for k, e in kinds.items()},
+            }
+            rec["precise"]["depth"] = _depth(n, prec)
+            for mode, e in (("conservative", cons), ("precise", prec)):
+                tot[mode][0] += len(e)
+                tot[mode][1] += n / max(rec[mode]["depth"], 1)
+            f.write(json.dumps(rec) + "\n")
+    k = max(len(groups), 1)
+    c, p = tot["conservative"], tot["precise"]
+    return (f"deps: {len(groups)} groups, edges {c[0]} -> {p[0]} precise, "
+            f"mean uops/depth {c[1] / k:.2f} -> {p[1] / k:.2f}  → {path}")
+
+
+def _analyse_job(job: tuple) -> Tuple[dict, dict, str, dict]:
+    """pool worker: analyse one group, capturing its --trace output and the
+    new schedule-cache entry for the parent to merge"""
+    g, max_comb, max_dsp, trace, sched = job
+    st: List[dict] = []
+    buf = io.StringIO()
+    cache = ScheduleCache(None)
+    with contextlib.redirect_stdout(buf):
+        analyse(g, max_comb, max_dsp, trace, st, cache=cache, **sched)
+    return g, st[0], buf.getvalue(), cache.new
 
 
 # 5 │ CLI
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("input_json")
     ap.add_argument("-o", "--out", default=None)
@@ -325,17 +1411,132 @@ def main() -> None:
     ap.add_argument("--emit-tcl", action="store_true")
     ap.add_argument("--trace", action="store_true")
     ap.add_argument("--json-stats", type=Path, help="dump per-stage metrics JSON")
-    args = ap.parse_args()
+    ap.add_argument(
+        "--out-format",
+        choices=("json", "ndjson", "ccpk"),
+        default="json",
+        help="format of the *_augmented file (ccpk = packed binary)",
+    )
+    ap.add_argument(
+        "-j", "--jobs", type=int, default=1, help="worker processes (0 = all cores)"
+    )
+    ap.add_argument(
+        "--scheduler",
+        choices=("greedy", "optimal"),
+        default="greedy",
+        help="optimal = minimum stage count (exact search, small groups)",
+    )
+    ap.add_argument(
+        "--opt-max-uops",
+        type=int,
+        default=OPT_MAX_UOPS,
+        help="largest group searched by --scheduler optimal",
+    )
+    ap.add_argument(
+        "--sched-cache",
+        type=Path,
+        default=CACHE_DEFAULT,
+        help="persistent schedule cache (default: .cache/schedule.json)",
+    )
+    ap.add_argument("--no-sched-cache", action="store_true")
+    ap.add_argument(
+        "--target-mhz",
+        type=float,
+        default=None,
+        help="place ff_boundaries for this clock (ns delay model; ignores --max-comb)",
+    )
+    ap.add_argument(
+        "--fuse",
+        action="store_true",
+        help="fuse AND-AND, ADD-ADD(-ADD), INC-SHL, NOT-ADD, SUB-SAR into compound ops",
+    )
+    ap.add_argument(
+        "--deps",
+        choices=DEPS,
+        default="conservative",
+        help="precise = true RAW + CF/OSZAP flag edges only (registers renamed)",
+    )
+    ap.add_argument("--dump-deps", type=Path, help="write the dependence graphs (NDJSON)")
+    ap.add_argument(
+        "--datapath",
+        choices=DATAPATHS,
+        default="chain",
+        help="dataflow = uop_dag: parallel uops, latency = critical path "
+        "(implies --deps precise, no --max-dsp)",
+    )
+    args = ap.parse_args(argv)
+    if args.target_mhz is not None and args.target_mhz <= 0:
+        ap.error("--target-mhz must be positive")
+    if args.target_mhz and args.scheduler == "optimal":
+        ap.error("--target-mhz and --scheduler optimal are exclusive")
+    jobs = args.jobs or os.cpu_count() or 1
+    sched = {
+        "scheduler": args.scheduler,
+        "opt_max_uops": args.opt_max_uops,
+        "target_mhz": args.target_mhz,
+        "fuse": args.fuse,
+        "deps": args.deps,
+        "datapath": args.datapath,
+    }
+    if args.target_mhz:
+        budget = LatencyDB.stage_budget_ps(args.target_mhz)
+        print(f"target {args.target_mhz:g} MHz: {budget} ps per stage")
 
-    groups = json.loads(Path(args.input_json).read_text())
+    groups = flow_io.load_groups(Path(args.input_json))
     groups = sorted(groups, key=lambda g: g.get("rank", 0))
+    if args.dump_deps:  # program order, before analyse() reorders
+        args.dump_deps.parent.mkdir(parents=True, exist_ok=True)
+        print(dump_deps(groups, args.dump_deps))
 
+    cache = ScheduleCache(None if args.no_sched_cache else args.sched_cache)
     stats_list: list[dict] = []
-    for idx, g in enumerate(groups):
-        analyse(g, args.max_comb, args.max_dsp, args.trace, stats_list)
-        print(
-            f"[{idx:02d}] stage={g['stage_count']} " f"critσ={g['crit_path_sigma']:.2f}"
+    # only the first copy of each uncached block goes to the pool; cache
+    # hits and repeats are filled in here, in rank order
+    todo: List[int] = []
+    if jobs > 1 and len(groups) > 1:
+        seen = set(cache.entries)
+        for idx, g in enumerate(groups):
+            k = cache.key(g["instructions"], args.max_comb, args.max_dsp, **sched)
+            if k not in seen:
+                seen.add(k)
+                todo.append(idx)
+    if len(todo) > 1:
+        work = [(groups[i], args.max_comb, args.max_dsp, args.trace, sched) for i in todo]
+        chunk = max(1, len(todo) // (jobs * 16))
+        ex = ProcessPoolExecutor(min(jobs, len(todo)))
+        done = ex.map(_analyse_job, work, chunksize=chunk)
+    else:
+        ex, todo, done = None, [], iter(())
+    pending = set(todo)
+    with ex or contextlib.nullcontext():
+        for idx, g in enumerate(groups):
+            if idx in pending:
+                g, st, log, new = next(done)
+                groups[idx] = g
+                stats_list.append(st)
+                sys.stdout.write(log)
+                for k, e in new.items():
+                    cache.misses += 1
+                    cache.put(k, e)
+            else:
+                analyse(g, args.max_comb, args.max_dsp, args.trace, stats_list,
+                        cache=cache, **sched)
+            print(
+                f"[{idx:02d}] stage={g['stage_count']} " f"critσ={g['crit_path_sigma']:.2f}"
+            )
+    cache.save()
+    if args.target_mhz:
+        slow = sum(
+            any(m[0] > budget for m in st["stage_metrics"]) for st in stats_list
         )
+        if slow:
+            print(f"warning: {slow} groups have a single uop slower than {budget} ps")
+    no_rtl = sum("no_rtl" in g for g in groups)
+    if no_rtl:
+        print(f"warning: {no_rtl} groups use {'/'.join(sorted(LatencyDB.NO_RTL))}, "
+              "which microop_unit passes through (\"no_rtl\")")
+    if cache.path is not None:
+        print(f"schedule cache: {cache.hits} hit, {cache.misses} scheduled")
 
     if args.out:
         out_base = Path(args.out)
@@ -347,10 +1548,10 @@ def main() -> None:
 
     out_base.parent.mkdir(parents=True, exist_ok=True)
 
-    aug_json = out_base.parent / f"{out_base.name}_augmented.json"
+    aug_json = out_base.parent / f"{out_base.name}_augmented.{args.out_format}"
     csv_out = out_base.parent / f"{out_base.name}_summary.csv"
 
-    aug_json.write_text(json.dumps(groups, indent=2))
+    flow_io.dump_groups(aug_json, groups)
     with csv_out.open("w", newline="") as f:
         csv.writer(f).writerows(
             [("idx", "stage", "lat", "critσ")]
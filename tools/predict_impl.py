@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+python tools/predict_impl.py examples/selected_blocks_result_augmented.json [--rows 60 --cols 8]
+python tools/predict_impl.py --muops "IMUL-ADD, AND-AND, INC-SHL"
+
+Predict post-route Slices / DSPs / Fmax of a block set before running Vivado.
+Per-opcode coefficients are fitted on reports/all_runs.csv (ridge regression
+pulled towards the LatencyDB priors, so opcodes never seen in a run keep the
+prior) and the error is the leave-one-out error over the distinct runs.
+
+  slices = s0 + Σ_op  n_op · W/64 · s_op  + Σ_W  n_W · s_W
+  dsps   = d0 + Σ_op  n_op · d_op         + Σ_W  n_W · d_W
+  period = t0 + Σ_op  m_op · W/64 · t_op  + t_W  (m = ops per stage of the slowest block)
+
+W is each block's "width" (W_LUT); --muops blocks use --width, history runs
+their "widths" column (W = 64 where it is empty).  Blocks fall into W buckets 8/16/32/64; n_W counts the uops in
+W-bit blocks and t_W is the term of the slowest block's W, for what does
+not scale with W/64 (DSP48E2 ports, a carry chain per 8 bits).  W = 64 is
+the reference the op terms describe, so only 8/16/32 get a term; they
+keep their prior of 0 until the history has runs at those widths.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import re
+import time
+from math import sqrt
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import flow_io
+import make_pblock
+from chose_block import RTL_W
+from pipeline_staging_estimator import LatencyDB
+
+ROOT = Path(__file__).resolve().parents[1]
+HISTORY = ROOT / "reports" / "all_runs.csv"
+
+OPS = sorted(LatencyDB.BASE)
+WIDTHS = (8, 16, 32, 64)  # block W buckets
+W_TERMS = WIDTHS[:-1]  # 64 is the reference
+NS_PER_LAT = 0.5  # prior: one LatencyDB latency unit ≈ one LUT level + route
+TARGETS = ("slices", "dsps", "period")
+
+Block = Tuple[List[str], int, int]  # (opcodes, stage_count, width)
+
+
+# ---------- block sets -----------------------------------------------------
+def parse_muops(
+    muops: str, stage_expr: str = "", width: int = RTL_W, width_expr: str = ""
+) -> List[Block]:
+    """'IMUL-ADD, AND-AND' or 'IMUL-ADD;AND-AND' → [(ops, stages, width), ...];
+    width_expr '64+32' gives each block its own W"""
+    blocks = [b.strip() for b in re.split(r"[;,]", muops) if b.strip()]
+    stages = [int(s) for s in stage_expr.split("+") if s.strip().isdigit()]
+    if len(stages) != len(blocks):
+        stages = [1] * len(blocks)
+    widths = [int(s) for s in width_expr.split("+") if s.strip().isdigit()]
+    if len(widths) != len(blocks):
+        widths = [width] * len(blocks)
+    return [(b.upper().split("-"), s, w) for b, s, w in zip(blocks, stages, widths)]
+
+
+def blocks_from_groups(groups: Sequence[dict]) -> List[Block]:
+    return [
+        (
+            [i["opcode"].upper() for i in g["instructions"]],
+            g.get("stage_count", 1),
+            g.get("width") or LatencyDB.block_width(g["instructions"]),
+        )
+        for g in groups
+    ]
+
+
+# ---------- features -------------------------------------------------------
+def _prior_delay(op: str, w: int) -> float:
+    return LatencyDB.latency(op, w) * NS_PER_LAT
+
+
+def features(blocks: List[Block]) -> Dict[str, List[float]]:
+    """design matrix row per target; index 0 is the intercept"""
+    cnt = {op: 0 for op in OPS}
+    area = {op: 0.0 for op in OPS}  # Σ W/64 per opcode
+    per_w = {w: 0 for w in WIDTHS}  # uops per block W
+    for ops, _, w in blocks:
+        per_w[_bucket(w)] += len(ops)
+        for op in ops:
+            if op in cnt:
+                cnt[op] += 1
+                area[op] += w / 64
+    # slowest block by prior delay per stage decides the clock
+    crit = {op: 0.0 for op in OPS}
+    crit_w = None
+    worst = -1.0
+    for ops, st, w in blocks:
+        d = sum(_prior_delay(op, w) for op in ops) / max(st, 1)
+        if d > worst:
+            worst = d
+            crit = {op: ops.count(op) / max(st, 1) * w / 64 for op in OPS}
+            crit_w = _bucket(w)
+    return {
+        "slices": [1.0] + [area[op] for op in OPS] + [float(per_w[w]) for w in W_TERMS],
+        "dsps": [1.0] + [float(cnt[op]) for op in OPS] + [float(per_w[w]) for w in W_TERMS],
+        "period": [1.0] + [crit[op] for op in OPS] + [float(w == crit_w) for w in W_TERMS],
+    }
+
+
+def _bucket(w: int) -> int:
+    """block W rounded up to WIDTHS"""
+    return next((b for b in WIDTHS if w <= b), WIDTHS[-1])
+
+
+def priors() -> Dict[str, List[float]]:
+    zero_w = [0.0] * len(W_TERMS)  # W/64 scaling alone
+    return {
+        "slices": [0.0]
+        + [0.0 if op in LatencyDB.DSP_OPS else LatencyDB.lut_est(op, 64) / 8 for op in OPS]
+        + zero_w,
+        "dsps": [0.0] + [float(op in LatencyDB.DSP_OPS) for op in OPS] + zero_w,
+        "period": [0.5] + [_prior_delay(op, 64) for op in OPS] + zero_w,
+    }
+
+
+# ---------- ridge towards the prior ---------------------------------------
+def _solve(A: List[List[float]], b: List[float]) -> List[float]:
+    """Gauss-Jordan with partial pivoting (A is small and SPD)"""
+    n = len(b)
+    M = [row[:] + [b[i]] for i, row in enumerate(A)]
+    for c in range(n):
+        p = max(range(c, n), key=lambda r: abs(M[r][c]))
+        M[c], M[p] = M[p], M[c]
+        piv = M[c][c]
+        for j in range(c, n + 1):
+            M[c][j] /= piv
+        for r in range(n):
+            if r != c and M[r][c]:
+                f = M[r][c]
+                for j in range(c, n + 1):
+                    M[r][j] -= f * M[c][j]
+    return [M[i][n] for i in range(n)]
+
+
+def ridge(X: List[List[float]], y: List[float], prior: List[float], lam: float) -> List[float]:
+    """argmin |y - Xβ|² + λ·|β - prior|²,  β ≥ 0
+
+    λ = lam × mean diagonal of XᵀX, i.e. lam=1 weighs the prior like one
+    typical run.  Negative coefficients are clipped (no opcode frees area).
+    """
+    n = len(prior)
+    r = [yi - _dot(x, prior) for x, yi in zip(X, y)]
+    A = [[sum(x[i] * x[j] for x in X) for j in range(n)] for i in range(n)]
+    diag = [A[i][i] for i in range(n) if A[i][i] > 0]
+    reg = lam * (sum(diag) / len(diag) if diag else 1.0)
+    for i in range(n):
+        A[i][i] += reg
+    rhs = [sum(x[i] * ri for x, ri in zip(X, r)) for i in range(n)]
+    return [max(0.0, p + d) for p, d in zip(prior, _solve(A, rhs))]
+
+
+def _dot(a: Sequence[float], b: Sequence[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+# ---------- history ---------------------------------------------------------
+def load_history(path: Path, w: int) -> List[dict]:
+    """distinct runs of all_runs.csv (re-collects of one run count once)"""
+    seen = set()
+    runs = []
+    with path.open(newline="") as f:
+        for r in csv.DictReader(f):
+            try:
+                y = {
+                    "slices": float(r["slice_total"]),
+                    "dsps": float(r["dsp_total"]),
+                    "period": 1000.0 / float(r["fmax_mhz"]),
+                }
+            except (KeyError, ValueError, ZeroDivisionError):
+                continue
+            key = (r["muops"], r["stage_count"], r["slice_total"], r["dsp_total"], r["fmax_mhz"])
+            if key in seen or not r["muops"]:
+                continue
+            seen.add(key)
+            blocks = parse_muops(r["muops"], r["stage_count"], w, r.get("widths") or "")
+            runs.append({"tag": r["run_tag"], "x": features(blocks), "y": y})
+    return runs
+
+
+def fit(runs: List[dict], lam: float) -> Dict[str, List[float]]:
+    pri = priors()
+    if not runs:
+        return pri
+    return {
+        t: ridge([r["x"][t] for r in runs], [r["y"][t] for r in runs], pri[t], lam)
+        for t in TARGETS
+    }
+
+
+def loo_error(runs: List[dict], lam: float) -> Dict[str, Optional[float]]:
+    """leave-one-out RMSE per target (None with fewer than two runs)"""
+    if len(runs) < 2:
+        return {t: None for t in TARGETS}
+    sq = {t: 0.0 for t in TARGETS}
+    for i, r in enumerate(runs):
+        coef = fit(runs[:i] + runs[i + 1 :], lam)
+        for t in TARGETS:
+            sq[t] += (_dot(coef[t], r["x"][t]) - r["y"][t]) ** 2
+    return {t: sqrt(sq[t] / len(runs)) for t in TARGETS}
+
+
+# ---------- CLI -------------------------------------------------------------
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("blocks", nargs="?", help="block set (json / ndjson / ccpk)")
+    ap.add_argument("--muops", help='block set as in all_runs.csv, e.g. "IMUL-ADD, AND-AND"')
+    ap.add_argument("--history", type=Path, default=HISTORY)
+    ap.add_argument("--width", type=int, default=RTL_W, help="W of --muops blocks")
+    ap.add_argument("--lam", type=float, default=1.0, help="pull towards the priors")
+    ap.add_argument("--rows", type=int, help="make_pblock rows (report utilisation)")
+    ap.add_argument("--cols", type=int, help="make_pblock cols")
+    ap.add_argument("--coef", action="store_true", help="print fitted coefficients")
+    args = ap.parse_args()
+
+    if bool(args.blocks) == bool(args.muops):
+        ap.error("give either a block file or --muops")
+
+    t0 = time.perf_counter()
+    runs = load_history(args.history, RTL_W) if args.history.is_file() else []
+    coef = fit(runs, args.lam)
+    err = loo_error(runs, args.lam)
+    if args.muops:
+        blocks = parse_muops(args.muops, width=args.width)
+    else:
+        blocks = blocks_from_groups(flow_io.load_groups(Path(args.blocks)))
+    x = features(blocks)
+    pred = {t: _dot(coef[t], x[t]) for t in TARGETS}
+    ms = (time.perf_counter() - t0) * 1e3
+
+    pm = lambda t, fmt: "" if err[t] is None else " ± " + fmt.format(err[t])
+    fmax = 1000.0 / pred["period"] if pred["period"] > 0 else float("inf")
+    print(f"{len(blocks)} blocks, fitted on {len(runs)} distinct runs, lam={args.lam}")
+    print(f"  slices : {pred['slices']:9.0f}{pm('slices', '{:.0f}')}")
+    print(f"  dsps   : {pred['dsps']:9.1f}{pm('dsps', '{:.1f}')}")
+    print(f"  period : {pred['period']:9.3f} ns{pm('period', '{:.3f}')}  (Fmax ≈ {fmax:.1f} MHz)")
+    if args.rows and args.cols:
+        slices, dsps = make_pblock.capacity(args.rows, args.cols)
+        print(
+            f"  pblock {args.rows}x{args.cols}: slices {100 * pred['slices'] / slices:.1f}% "
+            f"dsps {100 * pred['dsps'] / dsps:.1f}%"
+            + ("  -> does NOT fit" if pred["slices"] > slices or pred["dsps"] > dsps else "")
+        )
+    if args.coef:
+        print(f"{'op':>6} {'slices':>8} {'dsps':>6} {'ns':>7}")
+        for i, op in enumerate(["(base)"] + OPS + [f"W{w}" for w in W_TERMS]):
+            print(f"{op:>6} {coef['slices'][i]:8.1f} {coef['dsps'][i]:6.2f} {coef['period'][i]:7.3f}")
+    print(f"Done, {ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
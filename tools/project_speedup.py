@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+python tools/project_speedup.py examples/selected_blocks_result_augmented.json --run-tag my-run-tag
+python tools/project_speedup.py examples/blocks --sets sets.txt [--predict-fmax] [--top 20]
+
+Cycles a block set saves, per region and per benchmark, without Sniper:
+
+  saved = execution_count × (x86 cycles − ceil(latency_cycles × core MHz / Fmax))
+
+x86 cycles is the block's dependence critical path in core cycles (as in
+chose_block --auto), latency_cycles the estimator's pipeline latency in
+fabric clocks.  Fmax: --fmax, else the fmax_mhz of --run-tag, else
+predict_impl's model with --predict-fmax, else the 300 MHz target.
+Speedup is over the hot regions of each benchmark, or over the whole
+program with --bench-cycles (CSV bench,cycles).
+
+--sets ranks many candidate sets, one per line: block ids (the blkNNN_
+number of a split_block directory, else the index in the file).
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import re
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from math import ceil
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import flow_io
+from chose_block import block_cost
+from collect_results import CLK_TARGET_MHZ, RPT_DIR
+
+CORE_MHZ = 2660.0  # Sniper gainestown core clock
+
+
+@dataclass
+class Block:
+    """per-benchmark totals of one block, enough to price any Fmax"""
+    name: str
+    group: dict
+    x86: int
+    lat: int
+    count: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    regions: List[dict] = field(default_factory=list)
+
+    def custom(self, ratio: float) -> int:
+        """core cycles of one execution on the fabric (ratio = core / Fmax)"""
+        return ceil(self.lat * ratio)
+
+
+def load_blocks(path: Path) -> Dict[int, Block]:
+    if path.is_dir():
+        files = sorted(p for p in path.glob("blk*.json") if re.match(r"blk\d{3}_", p.name))
+        named = [(int(p.name[3:6]), p.name, json.loads(p.read_text())) for p in files]
+    else:
+        named = [(i, f"#{i}", g) for i, g in enumerate(flow_io.load_groups(path))]
+    blocks = {}
+    for i, name, g in named:
+        c = block_cost(g)
+        b = Block(name, g, c["x86_cycles"], c["latency"])
+        for occ in g.get("occurrences") or [g]:
+            n = occ.get("execution_count", 0)
+            b.count[occ.get("bench", "?")] += n
+            b.regions.append({"bench": occ.get("bench", "?"), "src": occ.get("src", "?"), "n": n})
+        blocks[i] = b
+    return blocks
+
+
+def project(blocks: List[Block], fmax: float, core_mhz: float) -> Dict[str, list]:
+    """bench -> [x86 cycles of its hot regions, cycles saved]"""
+    ratio = core_mhz / fmax
+    out: Dict[str, list] = defaultdict(lambda: [0, 0])
+    for b in blocks:
+        cust = b.custom(ratio)
+        for bench, n in b.count.items():
+            out[bench][0] += n * b.x86
+            out[bench][1] += n * (b.x86 - cust)
+    return out
+
+
+def speedup(base: float, saved: float) -> float:
+    return base / (base - saved) if base > saved else float("inf")
+
+
+class FmaxModel:
+    """predict_impl's ridge fit, loaded once and priced per set"""
+
+    def __init__(self):
+        import predict_impl as pi
+
+        self.pi = pi
+        runs = pi.load_history(pi.HISTORY, pi.RTL_W) if pi.HISTORY.is_file() else []
+        self.coef = pi.fit(runs, 1.0)["period"]
+
+    def __call__(self, blocks: List[Block]) -> float:
+        x = self.pi.features(self.pi.blocks_from_groups([b.group for b in blocks]))["period"]
+        period = self.pi._dot(self.coef, x)
+        return 1000.0 / period if period > 0 else float("inf")
+
+
+def run_fmax(tag: str) -> Optional[float]:
+    """slowest pblock Fmax of a collect_results run"""
+    p = RPT_DIR / f"impl_summary_{tag}.json"
+    if not p.is_file():
+        return None
+    f = [r["fmax_mhz"] for r in json.loads(p.read_text()) if r.get("fmax_mhz")]
+    return min(f) if f else None
+
+
+def read_sets(path: Path) -> List[List[int]]:
+    sets = []
+    for line in path.read_text().splitlines():
+        line = line.split("#")[0].strip()
+        if line:
+            sets.append([int(x) for x in re.split(r"[,\s]+", line) if x])
+    return sets
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("blocks", type=Path, help="augmented block file or split_block directory")
+    ap.add_argument("--fmax", type=float, help="achieved fabric clock (MHz)")
+    ap.add_argument("--run-tag", help="take Fmax from reports/impl_summary_<tag>.json")
+    ap.add_argument("--predict-fmax", action="store_true", help="Fmax per set from predict_impl")
+    ap.add_argument("--core-mhz", type=float, default=CORE_MHZ, help="simulated core clock")
+    ap.add_argument("--bench-cycles", type=Path, help="CSV bench,cycles: whole-program speedup")
+    ap.add_argument("--sets", type=Path, help="candidate sets, one line of block ids each")
+    ap.add_argument("--top", type=int, default=10, help="--sets: rows printed")
+    ap.add_argument("-o", "--out", type=Path, help="CSV (regions, or sets with --sets)")
+    args = ap.parse_args()
+
+    blocks = load_blocks(args.blocks)
+    if not blocks:
+        sys.exit("no blocks found")
+    fmax, how = args.fmax, "--fmax"
+    if fmax is None and args.run_tag:
+        fmax, how = run_fmax(args.run_tag), f"run {args.run_tag}"
+        if fmax is None:
+            sys.exit(f"no fmax_mhz in impl_summary_{args.run_tag}.json")
+    model = FmaxModel() if fmax is None and args.predict_fmax else None
+    if fmax is None and model is None:
+        fmax, how = CLK_TARGET_MHZ, "target"
+    total: Dict[str, int] = {}
+    if args.bench_cycles:
+        with args.bench_cycles.open(newline="") as f:
+            total = {r["bench"]: int(float(r["cycles"])) for r in csv.DictReader(f)}
+
+    if args.sets:
+        t0 = time.perf_counter()
+        ranked = []
+        for ids in read_sets(args.sets):
+            missing = [i for i in ids if i not in blocks]
+            if missing:
+                sys.exit(f"unknown block ids {missing} in {args.sets}")
+            chosen = [blocks[i] for i in ids]
+            f = model(chosen) if model else fmax
+            per = project(chosen, f, args.core_mhz)
+            saved = sum(s for _, s in per.values())
+            wins = sum(s > 0 for _, s in per.values())
+            ranked.append((saved, f, wins, len(per), ids))
+        ranked.sort(key=lambda r: -r[0])
+        ms = (time.perf_counter() - t0) * 1e3
+        print(f"{len(ranked)} sets of {len(blocks)} blocks, Fmax {'predicted' if model else how}")
+        for saved, f, wins, n, ids in ranked[: args.top]:
+            print(f"  {saved:>16,d} cycles  {f:7.1f} MHz  {wins}/{n} benchmarks  "
+                  + " ".join(map(str, ids)))
+        if args.out:
+            with args.out.open("w", newline="") as fh:
+                w = csv.writer(fh)
+                w.writerow(["saved_cycles", "fmax_mhz", "benches_gaining", "benches", "ids"])
+                w.writerows([s, round(f, 3), wi, n, " ".join(map(str, ids))]
+                            for s, f, wi, n, ids in ranked)
+        print(f"Done, {ms:.1f} ms")
+        return
+
+    chosen = list(blocks.values())
+    f = model(chosen) if model else fmax
+    ratio = args.core_mhz / f
+    per = project(chosen, f, args.core_mhz)
+    print(f"{len(chosen)} blocks, Fmax {f:.1f} MHz ({'predicted' if model else how}), "
+          f"core {args.core_mhz:g} MHz")
+    print(f"  {'bench':<28} {'hot x86 cycles':>16} {'saved':>16} {'hot spd':>8}"
+          + (f" {'prog spd':>8}" if total else ""))
+    for bench, (base, saved) in sorted(per.items(), key=lambda kv: -kv[1][1]):
+        line = f"  {bench:<28} {base:>16,d} {saved:>16,d} {speedup(base, saved):7.3f}x"
+        if total:
+            line += f" {speedup(total[bench], saved):7.4f}x" if bench in total else "        -"
+        print(line + ("  (slower)" if saved < 0 else ""))
+    gain = [b for b, (_, s) in per.items() if s > 0]
+    print(f"  {len(gain)} of {len(per)} benchmarks gain, "
+          f"{sum(s for _, s in per.values()):,d} cycles saved in total")
+    if args.out:
+        with args.out.open("w", newline="") as fh:
+            w = csv.writer(fh)
+            w.writerow(["block", "bench", "src", "execution_count", "x86_cycles",
+                        "custom_cycles", "saved_cycles"])
+            for b in chosen:
+                cust = b.custom(ratio)
+                w.writerows([b.name, r["bench"], r["src"], r["n"], b.x86, cust,
+                             r["n"] * (b.x86 - cust)] for r in b.regions)
+        print(f"Done, {args.out}")
+
+
+if __name__ == "__main__":
+    main()
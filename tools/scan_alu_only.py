@@ -1,10 +1,24 @@
 #!/usr/bin/env python3
 """
-scan_alu_only.py <DIR|FILE> [-o out.json] [--min-len N]
+scan_alu_only.py <DIR|FILE> [-o out.json] [--min-len N] [--stream] [--jobs N]
+
+--stream parses one group at a time and writes as it goes (NDJSON when the
+output ends in .ndjson/.jsonl), so memory stays flat on multi-GB dumps.
+--jobs N scans files on N processes; the merged output is identical to -j1.
+--cache DIR keeps a per-file scan manifest so only new/changed inputs are
+re-parsed on the next run.
 """
 import json
 import argparse
+import hashlib
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterable, Iterator
+
+import flow_io
 
 ALU_INSTRUCTIONS = {
     "ADD",
@@ -37,12 +51,8 @@ ALU_INSTRUCTIONS = {
 }
 
 
-def process_json(jpath: Path, min_len: int) -> list[dict]:
-    """Return ALU-only groups in the JSON file."""
-    with jpath.open() as f:
-        meta = json.load(f)
-
-    out = []
+def filter_groups(jpath: Path, meta: Iterable[dict], min_len: int) -> Iterator[dict]:
+    """Yield the ALU-only groups of `meta`, tagged with bench / src."""
     bench_root = jpath.parents[1].name        
     subdir     = jpath.parent.name            
     bench_id   = f"{bench_root}/{subdir}" 
@@ -55,8 +65,149 @@ def process_json(jpath: Path, min_len: int) -> list[dict]:
             gg          = g.copy()            
             gg["bench"] = bench_id            
             gg["src"]   = f"{subdir}/{json_tag}:{idx}"
-            out.append(gg)
-    return out
+            yield gg
+
+
+def process_json(jpath: Path, min_len: int) -> list[dict]:
+    """Return ALU-only groups in the JSON file."""
+    with jpath.open() as f:
+        meta = json.load(f)
+    return list(filter_groups(jpath, meta, min_len))
+
+
+def stream_json(jpath: Path, min_len: int) -> Iterator[dict]:
+    """Like process_json, but parses the file one group at a time."""
+    return filter_groups(jpath, flow_io.iter_json_array(jpath), min_len)
+
+
+def _report(jpath: Path, n: int, dt: float) -> None:
+    mb = jpath.stat().st_size / 1e6
+    print(f"  {jpath}  {n:6d} groups  {mb:9.1f} MB  {mb / max(dt, 1e-9):7.1f} MB/s")
+
+
+def _timed(jpath: Path, groups: Iterable[dict]) -> Iterator[dict]:
+    t0, n = time.perf_counter(), 0
+    for g in groups:
+        n += 1
+        yield g
+    _report(jpath, n, time.perf_counter() - t0)
+
+
+def _scan_list(job: tuple) -> tuple[list[dict], float]:
+    """pool worker: whole-file scan"""
+    jpath, min_len = job
+    t0 = time.perf_counter()
+    return process_json(jpath, min_len), time.perf_counter() - t0
+
+
+def _scan_part(job: tuple) -> tuple[int, float]:
+    """pool worker: streaming scan into an NDJSON part file"""
+    jpath, min_len, part = job
+    t0 = time.perf_counter()
+    with open(part, "w", encoding="utf-8") as f:
+        n = flow_io.write_ndjson(f, stream_json(jpath, min_len))
+    return n, time.perf_counter() - t0
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for blk in iter(lambda: f.read(1 << 20), b""):
+            h.update(blk)
+    return h.hexdigest()
+
+
+class ScanCache:
+    """Persistent scan manifest: the filtered groups of every input file.
+
+    Entries are keyed by resolved path and validated by size + mtime, then
+    by content hash.  The filter parameters (min_len, ALU_INSTRUCTIONS) are
+    stored per entry, so changing either re-scans the affected files.
+    """
+
+    VERSION = 1
+
+    def __init__(self, root: Path, min_len: int):
+        self.root = root
+        self.manifest = root / "manifest.json"
+        spec = {"v": self.VERSION, "min_len": min_len, "alu": sorted(ALU_INSTRUCTIONS)}
+        self.params = hashlib.sha256(json.dumps(spec).encode()).hexdigest()[:16]
+        try:
+            self.entries: dict = json.loads(self.manifest.read_text())["entries"]
+        except (OSError, ValueError, KeyError):
+            self.entries = {}
+
+    def part(self, jpath: Path) -> Path:
+        key = hashlib.sha1(str(jpath.resolve()).encode()).hexdigest()[:20]
+        return self.root / "groups" / f"{key}.ndjson"
+
+    def lookup(self, jpath: Path) -> bool:
+        e = self.entries.get(str(jpath.resolve()))
+        if not e or e["params"] != self.params or not self.part(jpath).is_file():
+            return False
+        st = jpath.stat()
+        if (e["size"], e["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+            return True
+        if e["size"] == st.st_size and e["sha256"] == file_sha256(jpath):
+            e["mtime_ns"] = st.st_mtime_ns  # touched, content unchanged
+            return True
+        return False
+
+    def store(self, jpath: Path, n: int, sha: str, size: int, mtime_ns: int) -> None:
+        self.entries[str(jpath.resolve())] = {
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "sha256": sha,
+            "params": self.params,
+            "groups": n,
+        }
+
+    def save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": self.VERSION, "entries": self.entries}, indent=1))
+        os.replace(tmp, self.manifest)
+
+
+def _scan_cached(job: tuple) -> tuple[int, float, str, int, int]:
+    """pool worker: scan one file into its cache part (atomically)"""
+    jpath, min_len, part = job
+    st = jpath.stat()
+    sha = file_sha256(jpath)
+    tmp = Path(part).with_suffix(".tmp")
+    n, dt = _scan_part((jpath, min_len, tmp))
+    os.replace(tmp, part)
+    return n, dt, sha, st.st_size, st.st_mtime_ns
+
+
+def _update_cache(cache: ScanCache, json_files: list[Path], min_len: int, jobs: int) -> None:
+    miss = [p for p in json_files if not cache.lookup(p)]
+    print(f"  cache: {len(json_files) - len(miss)} hit, {len(miss)} to scan")
+    if not miss:
+        return
+    (cache.root / "groups").mkdir(parents=True, exist_ok=True)
+    work = [(p, min_len, cache.part(p)) for p in miss]
+    if jobs > 1 and len(miss) > 1:
+        with ProcessPoolExecutor(min(jobs, len(miss))) as ex:
+            results = list(ex.map(_scan_cached, work))
+    else:
+        results = [_scan_cached(w) for w in work]
+    for p, (n, dt, sha, size, mtime_ns) in zip(miss, results):
+        _report(p, n, dt)
+        cache.store(p, n, sha, size, mtime_ns)
+
+
+def _parallel_stream(json_files: list[Path], min_len: int, jobs: int) -> Iterator[dict]:
+    with tempfile.TemporaryDirectory(prefix="scan_alu_") as tmp, ProcessPoolExecutor(
+        jobs
+    ) as ex:
+        parts = [Path(tmp) / f"{i:06d}.ndjson" for i in range(len(json_files))]
+        work = [(p, min_len, str(part)) for p, part in zip(json_files, parts)]
+        # map() yields in submission order -> deterministic merge
+        for p, part, (n, dt) in zip(json_files, parts, ex.map(_scan_part, work)):
+            _report(p, n, dt)
+            yield from flow_io.iter_groups(part)
+            part.unlink()
 
 
 def main():
@@ -68,25 +219,71 @@ def main():
         default=str(Path(__file__).resolve().parents[1] / "examples" / "alu_only.json"),
     )
     ap.add_argument("--min-len", type=int, default=1, help="minimum uops per group")
+    ap.add_argument(
+        "--stream",
+        action="store_true",
+        help="constant-memory mode: parse and write one group at a time",
+    )
+    ap.add_argument(
+        "-j", "--jobs", type=int, default=1, help="worker processes (0 = all cores)"
+    )
+    ap.add_argument(
+        "--cache",
+        metavar="DIR",
+        help="incremental mode: reuse per-file results stored in DIR",
+    )
     args = ap.parse_args()
+    jobs = args.jobs or os.cpu_count() or 1
 
     root = Path(args.root)
     json_files = []
     if root.is_file():
         json_files = [root]
     else:
-        json_files = list(root.glob("**/super_hot_regions.json"))
+        json_files = sorted(root.glob("**/super_hot_regions.json"))
 
     if not json_files:
         print("No JSON files found.")
         return
 
+    jobs = min(jobs, len(json_files))
+
+    if args.cache:
+        cache = ScanCache(Path(args.cache), args.min_len)
+        _update_cache(cache, json_files, args.min_len, jobs)
+        cache.save()
+        n = flow_io.dump_groups(
+            args.out, (g for p in json_files for g in flow_io.iter_groups(cache.part(p)))
+        )
+        print(f"✓ {n} ALU-only groups -> {args.out}")
+        return
+
+    if args.stream:
+        if jobs > 1:
+            groups = _parallel_stream(json_files, args.min_len, jobs)
+        else:
+            groups = (
+                g for p in json_files for g in _timed(p, stream_json(p, args.min_len))
+            )
+        n = flow_io.dump_groups(args.out, groups)
+        print(f"✓ {n} ALU-only groups -> {args.out}")
+        return
+
     filtered = []
-    for p in json_files:
-        filtered.extend(process_json(p, args.min_len))
+    if jobs > 1:
+        with ProcessPoolExecutor(jobs) as ex:
+            work = [(p, args.min_len) for p in json_files]
+            for p, (out, dt) in zip(json_files, ex.map(_scan_list, work)):
+                _report(p, len(out), dt)
+                filtered.extend(out)
+    else:
+        for p in json_files:
+            t0 = time.perf_counter()
+            out = process_json(p, args.min_len)
+            _report(p, len(out), time.perf_counter() - t0)
+            filtered.extend(out)
 
-    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
-    Path(args.out).write_text(json.dumps(filtered, indent=2))
+    flow_io.dump_groups(args.out, filtered)
     print(f"✓ {len(filtered)} ALU-only groups -> {args.out}")
 
 
@@ -1,34 +1,83 @@
 """
-python tools/split_block.py  examples/result_augmented.json
-"""
+python tools/split_block.py  examples/result_augmented.json [--pc-only]
 
-import json, pathlib, re, shutil, sys
+Blocks that compute the same thing (same opcodes, widths, immediates and
+dependency DAG up to register renaming) are merged into one blk*.json whose
+"occurrences" lists every (bench, src, pc) copy; execution_count is summed.
+--pc-only keeps the old behaviour: drop repeats of the first PC only.
+"""
 
-src = pathlib.Path(sys.argv[1]).resolve()
-out = src.parent / "blocks"
+import argparse, hashlib, json, pathlib, re, shutil
 
-if out.exists():
-    shutil.rmtree(out)
-out.mkdir(parents=True)
+import flow_io
+from pipeline_staging_estimator import block_signature
 
 safe = lambda s: re.sub(r"[^A-Za-z0-9\-]", "", s)[:30] or "BLK"
 
-groups = json.loads(src.read_text())
 
-seen_pc = set()
-kept = 0
+def block_key(g: dict) -> str:
+    sig = block_signature(g["instructions"], literals=True)
+    return hashlib.sha256(json.dumps(sig, separators=(",", ":")).encode()).hexdigest()
+
+
+def occurrence(g: dict) -> dict:
+    pcs = [i["address"] for i in g["instructions"]]
+    return {
+        "bench": g.get("bench", "?"),
+        "src": g.get("src", "?"),
+        "pc": pcs[0],
+        "pcs": pcs,
+        "execution_count": g.get("execution_count", 0),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("src")
+    ap.add_argument("--pc-only", action="store_true", help="dedup by first PC only")
+    args = ap.parse_args()
+
+    src = pathlib.Path(args.src).resolve()
+    out = src.parent / "blocks"
+
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True)
+
+    seen_pc = set()
+    kept: dict = {}  # key -> (idx, group), insertion order = first occurrence
+    total = 0
+
+    for idx, g in enumerate(flow_io.iter_groups(src)):
+        pc = g["instructions"][0]["address"]
+        if pc in seen_pc:
+            continue
+        seen_pc.add(pc)
+        g["pc"] = pc
+        total += 1
+
+        key = pc if args.pc_only else block_key(g)
+        if key in kept:
+            first = kept[key][1]
+            first["occurrences"].append(occurrence(g))
+            first["execution_count"] = first.get("execution_count", 0) + g.get(
+                "execution_count", 0
+            )
+            continue
+        if not args.pc_only:
+            g["occurrences"] = [occurrence(g)]
+        kept[key] = (idx, g)
+
+    for idx, g in kept.values():
+        rank = g.get("rank", 0)
+        sig  = "-".join(i["opcode"].upper() for i in g["instructions"])
+        blk  = f"blk{idx:03d}_r{rank:03d}_{safe(sig)}.json"
+        (out / blk).write_text(json.dumps(g, indent=2))
 
-for idx, g in enumerate(groups):
-    pc = g["instructions"][0]["address"]   
-    if pc in seen_pc:                      
-        continue
-    seen_pc.add(pc)
-    g["pc"] = pc
+    print("Done, ", len(kept), "unique blocks ->", out)
+    if total > len(kept):
+        print(f"  {total - len(kept)} equivalent blocks merged into occurrences")
 
-    rank = g.get("rank", 0)
-    sig  = "-".join(i["opcode"].upper() for i in g["instructions"])
-    blk  = f"blk{idx:03d}_r{rank:03d}_{safe(sig)}.json"
-    (out / blk).write_text(json.dumps(g, indent=2))
-    kept += 1
 
-print("Done, ", kept, "unique blocks ->", out)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+python tools/sweep_budgets.py examples/alu_only_2.json [--comb 1 2 3 4] [--dsp 0 1 2]
+                              [--scheduler optimal] [--fuse] [--deps precise]
+                              [--datapath dataflow] [-o reports/sweep_alu_only]
+
+Schedule every group over a --max-comb x --max-dsp grid (each DAG is built
+once, with the estimator's --fuse / --deps / --datapath; dataflow ignores
+--dsp) and export the Pareto frontier per group and for the whole design:
+
+  <out>_points.csv    every (group, budget) point, pareto flag per scope
+  <out>_pareto.json   frontier points only  {"design": [...], "groups": {...}}
+
+Objectives, all minimised:
+  stages   pipeline stages
+  dsp      DSP48s in the block: one per DSP uop, a fused compound counts
+           once (a PCIN cascade still takes one each), so it moves with
+           --fuse, not with the budget
+  lut      LUT estimate: sum of lut_need + one register slice per FF
+  sigma    std-dev of per-stage comb depth (critσ)
+
+dsp_peak, the most DSP48s in one stage (what --max-dsp bounds), is an
+extra column; at design scope it is the largest group's.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+from pathlib import Path
+from statistics import pstdev
+from typing import Dict, List, Sequence
+
+import flow_io
+from pipeline_staging_estimator import (
+    DATAPATHS,
+    DEPS,
+    OPT_MAX_UOPS,
+    LatencyDB,
+    dataflow_schedule,
+    group_dag,
+    schedule_dag,
+)
+
+OBJ = ("stages", "dsp", "lut", "sigma")
+
+
+def point_metrics(node, order: List[int], ff: List[int], metrics: List[tuple],
+                  dataflow: bool = False) -> dict:
+    """ff: nodes whose output is registered; metrics: the scheduler's
+    per-stage (comb, dsp, lut, cong)"""
+    comb = [m[0] for m in metrics]
+    if dataflow:  # stages are DAG levels, the metrics are all there is
+        n_stages, peak = len(metrics), max((m[1] for m in metrics), default=0)
+    else:
+        stages, cur = [], []
+        cut = set(ff)
+        for i in order:
+            cur.append(i)
+            if i in cut:
+                stages.append(cur)
+                cur = []
+        stages.append(cur)
+        n_stages, peak = len(stages), max(sum(node[i].dsp for i in st) for st in stages)
+    bw = max((n.bw for n in node), default=32)
+    return {
+        "stages": n_stages,
+        "dsp": sum(n.dsp for n in node),
+        "lut": sum(n.lut for n in node) + len(ff) * LatencyDB.lut_need(bw),
+        "sigma": round(pstdev(comb) if len(comb) > 1 else 0.0, 4),
+        "dsp_peak": peak,
+    }
+
+
+def pareto(points: Sequence[dict]) -> List[dict]:
+    """non-dominated points; equal objective vectors keep the first budget"""
+    front: List[dict] = []
+    seen = set()
+    for p in points:
+        v = tuple(p[k] for k in OBJ)
+        if v in seen:
+            continue
+        dominated = any(
+            all(q[k] <= p[k] for k in OBJ) and any(q[k] < p[k] for k in OBJ)
+            for q in points
+        )
+        if not dominated:
+            seen.add(v)
+            front.append(p)
+    return front
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("input_json")
+    ap.add_argument("--comb", type=int, nargs="+", default=[1, 2, 3, 4, 6, 8])
+    ap.add_argument("--dsp", type=int, nargs="+", default=[0, 1, 2, 4])
+    ap.add_argument("--scheduler", choices=("greedy", "optimal"), default="greedy")
+    ap.add_argument("--opt-max-uops", type=int, default=OPT_MAX_UOPS)
+    ap.add_argument("--fuse", action="store_true", help="as the estimator's --fuse")
+    ap.add_argument("--deps", choices=DEPS, default="conservative")
+    ap.add_argument("--datapath", choices=DATAPATHS, default="chain",
+                    help="dataflow implies --deps precise and ignores --dsp")
+    ap.add_argument("-o", "--out", default=None, help="output prefix")
+    args = ap.parse_args()
+
+    groups = flow_io.load_groups(Path(args.input_json))
+    groups = sorted(groups, key=lambda g: g.get("rank", 0))
+    grid = [(c, d) for c in sorted(set(args.comb)) for d in sorted(set(args.dsp))]
+
+    rows: List[dict] = []
+    per_group: Dict[int, List[dict]] = {}
+    design: Dict[tuple, dict] = {
+        b: {"max_comb": b[0], "max_dsp": b[1], "stages": 0, "dsp": 0, "lut": 0, "sigma": 0.0,
+            "dsp_peak": 0}
+        for b in grid
+    }
+    dataflow = args.datapath == "dataflow"
+    for idx, g in enumerate(groups):
+        node, edges, _ = group_dag(g["instructions"], fuse=args.fuse, deps=args.deps,
+                                   datapath=args.datapath)
+        pts = []
+        for c, d in grid:
+            if dataflow:
+                order, ff, metrics, _ = dataflow_schedule(node, edges, c)
+            else:
+                order, ff, metrics, _, _ = schedule_dag(
+                    node, edges, c, d, args.scheduler, args.opt_max_uops
+                )
+            m = point_metrics(node, order, ff, metrics, dataflow)
+            pts.append({"max_comb": c, "max_dsp": d, **m})
+            tot = design[(c, d)]
+            for k in ("stages", "dsp", "lut"):
+                tot[k] += m[k]
+            for k in ("sigma", "dsp_peak"):
+                tot[k] = max(tot[k], m[k])
+        front = pareto(pts)
+        per_group[idx] = front
+        for p in pts:
+            rows.append({"scope": "group", "idx": idx, "rank": g.get("rank", 0), **p,
+                         "pareto": int(p in front)})
+
+    design_pts = list(design.values())
+    design_front = pareto(design_pts)
+    for p in design_pts:
+        rows.append({"scope": "design", "idx": "", "rank": "", **p,
+                     "pareto": int(p in design_front)})
+
+    if args.out:
+        base = Path(args.out)
+    else:
+        in_p = Path(args.input_json).resolve()
+        base = in_p.with_name(in_p.stem + "_sweep")
+    base.parent.mkdir(parents=True, exist_ok=True)
+    pts_csv = base.parent / f"{base.name}_points.csv"
+    front_json = base.parent / f"{base.name}_pareto.json"
+
+    with pts_csv.open("w", newline="") as f:
+        w = csv.DictWriter(f, rows[0].keys())
+        w.writeheader()
+        w.writerows(rows)
+    front_json.write_text(
+        json.dumps(
+            {
+                "objectives": OBJ,
+                "grid": {"max_comb": sorted(set(args.comb)), "max_dsp": sorted(set(args.dsp))},
+                "design": design_front,
+                "groups": {
+                    str(i): {"rank": groups[i].get("rank", 0), "pareto": fr}
+                    for i, fr in per_group.items()
+                },
+            },
+            indent=2,
+        )
+    )
+
+    print("design Pareto frontier (uniform budgets):")
+    print(" comb dsp | stages  dsp    lut  critσ  peak")
+    for p in sorted(design_front, key=lambda p: (p["stages"], p["lut"])):
+        print(
+            f" {p['max_comb']:4d} {p['max_dsp']:3d} | {p['stages']:6d} {p['dsp']:4d}"
+            f" {p['lut']:6d} {p['sigma']:6.2f} {p['dsp_peak']:5d}"
+        )
+    print(f"Done, {len(groups)} groups x {len(grid)} budgets -> {pts_csv.name}, {front_json.name}")
+
+
+if __name__ == "__main__":
+    main()